@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import models, transaction
 
 
 class UserManager(BaseUserManager):
@@ -99,6 +99,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Khóa/mở khóa user -> vô hiệu cache redirect của toàn bộ links (O(1))"""
+        from applications.links.cache import bump_owner_generation
+
+        loaded = getattr(self, '_loaded_is_active', None)
+        super().save(*args, **kwargs)
+
+        if loaded is not None and loaded != self.is_active:
+            user_id = self.pk
+            transaction.on_commit(lambda: bump_owner_generation(user_id))
+        self._loaded_is_active = self.is_active
+
     @property
     def full_name(self):
         """Trả về họ tên đầy đủ"""
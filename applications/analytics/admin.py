@@ -5,6 +5,7 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
 from django.views import View
 
+from applications.analytics.leaderboard import LeaderboardService
 from applications.links.models import Link
 from applications.accounts.models import User
 from applications.common.redis_client import RedisClient
@@ -45,10 +46,24 @@ class DashboardView(View):
             return 0
 
     def _get_top_links(self):
-        """Lấy top 10 links"""
-        return Link.objects.filter(
+        """Lấy top 10 links trong 24h (Redis leaderboard)"""
+        try:
+            top = LeaderboardService.top(window='24h', limit=10)
+        except Exception:
+            return []
+
+        links = Link.objects.filter(
+            id__in=[row['_id'] for row in top],
             deleted_at__isnull=True
-        ).order_by('-click_count')[:10]
+        ).in_bulk()
+
+        result = []
+        for row in top:
+            link = links.get(row['_id'])
+            if link is not None:
+                link.window_clicks = row['total_clicks']
+                result.append(link)
+        return result
 
 
 @method_decorator(staff_member_required, name='dispatch')
@@ -0,0 +1,211 @@
+"""
+Leaderboard realtime bằng Redis sorted set
+- Ingest: ZINCRBY vào bucket theo giờ và theo ngày (member = "<link_id>:<short_code>")
+- Rolling window (1h/24h/7d): ZUNIONSTORE các bucket, cache vài giây
+- Top-K: ZREVRANGE, O(log N + K)
+- Rebuild từ link_stats (MongoDB) khi Redis mất dữ liệu
+"""
+from datetime import datetime, timedelta
+
+from applications.common.redis_client import get_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("analytics.leaderboard")
+
+HOUR_KEY = "leaderboard:hour:{date}:{hour:02d}"
+DAY_KEY = "leaderboard:day:{date}"
+WINDOW_KEY = "leaderboard:window:{name}"
+
+# Bucket giờ chỉ dùng cho window 1h/24h, bucket ngày cho window theo ngày
+HOUR_TTL = 2 * 86400
+DAY_TTL = 35 * 86400
+WINDOW_CACHE_TTL = 5
+
+# window -> (loại bucket, số bucket)
+WINDOWS = {
+    "1h": ("hour", 1),
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+}
+
+
+def _member(link_id, short_code) -> str:
+    return f"{link_id}:{short_code}"
+
+
+def _parse_member(member: str) -> tuple:
+    link_id, short_code = member.split(":", 1)
+    return int(link_id), short_code
+
+
+class LeaderboardService:
+    """
+    Usage:
+        LeaderboardService.record({(link_id, short_code, date_str, hour): clicks})
+        LeaderboardService.top(window="24h", limit=10)
+        LeaderboardService.top_days(days=7, limit=10)
+    """
+
+    @staticmethod
+    def record(increments: dict, pipeline=None):
+        """
+        ZINCRBY bucket giờ + bucket ngày cho một batch clicks
+
+        Args:
+            increments: {(link_id, short_code, date_str, hour): click_count}
+        """
+        if not increments:
+            return
+
+        pipe = pipeline if pipeline is not None else get_redis().pipeline(transaction=False)
+
+        touched = {}
+        for (link_id, short_code, date_str, hour), click_count in increments.items():
+            member = _member(link_id, short_code)
+            hour_key = HOUR_KEY.format(date=date_str, hour=hour)
+            day_key = DAY_KEY.format(date=date_str)
+
+            pipe.zincrby(hour_key, click_count, member)
+            pipe.zincrby(day_key, click_count, member)
+            touched[hour_key] = HOUR_TTL
+            touched[day_key] = DAY_TTL
+
+        for key, ttl in touched.items():
+            pipe.expire(key, ttl)
+
+        if pipeline is None:
+            pipe.execute()
+
+    @staticmethod
+    def top(window: str = "24h", limit: int = 10) -> list:
+        """
+        Top links trong rolling window
+
+        Returns:
+            [{"_id": link_id, "short_code": ..., "total_clicks": ...}]
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+
+        unit, count = WINDOWS[window]
+        return LeaderboardService._top(window, LeaderboardService._buckets(unit, count), limit)
+
+    @staticmethod
+    def top_days(days: int = 1, limit: int = 10) -> list:
+        """Top links theo ngày (calendar) từ hôm nay lùi lại N ngày, giống get_top_links cũ"""
+        today = datetime.utcnow().date()
+        buckets = [
+            (DAY_KEY.format(date=(today - timedelta(days=i)).strftime("%Y-%m-%d")), 1)
+            for i in range(days + 1)
+        ]
+        return LeaderboardService._top(f"days:{days}", buckets, limit)
+
+    @staticmethod
+    def daily_clicks(link_id: int, short_code: str, days: int = 7) -> dict:
+        """{date_str: clicks} của một link từ bucket ngày, một round trip"""
+        today = datetime.utcnow().date()
+        dates = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        member = _member(link_id, short_code)
+
+        pipe = get_redis().pipeline(transaction=False)
+        for date_str in dates:
+            pipe.zscore(DAY_KEY.format(date=date_str), member)
+        scores = pipe.execute()
+
+        return {date_str: int(score or 0) for date_str, score in zip(dates, scores)}
+
+    @staticmethod
+    def _buckets(unit: str, count: int) -> list:
+        """
+        Các bucket của rolling window kèm weight
+        Bucket cũ nhất chỉ tính phần còn nằm trong window (xấp xỉ sliding window)
+        """
+        now = datetime.utcnow()
+
+        if unit == "hour":
+            step = timedelta(hours=1)
+            elapsed = (now.minute * 60 + now.second) / 3600
+
+            def key_for(moment):
+                return HOUR_KEY.format(date=moment.strftime("%Y-%m-%d"), hour=moment.hour)
+        else:
+            step = timedelta(days=1)
+            elapsed = (now.hour * 3600 + now.minute * 60 + now.second) / 86400
+
+            def key_for(moment):
+                return DAY_KEY.format(date=moment.strftime("%Y-%m-%d"))
+
+        buckets = [(key_for(now - step * i), 1) for i in range(count)]
+        oldest_weight = round(1 - elapsed, 4)
+        if oldest_weight > 0:
+            buckets.append((key_for(now - step * count), oldest_weight))
+        return buckets
+
+    @staticmethod
+    def _top(name: str, buckets: list, limit: int) -> list:
+        redis = get_redis()
+        key = WINDOW_KEY.format(name=name)
+
+        pipe = redis.pipeline(transaction=False)
+        pipe.exists(key)
+        pipe.zrevrange(key, 0, limit - 1, withscores=True)
+        exists, rows = pipe.execute()
+
+        if not exists:
+            pipe = redis.pipeline(transaction=False)
+            pipe.zunionstore(key, dict(buckets))
+            pipe.expire(key, WINDOW_CACHE_TTL)
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            _, _, rows = pipe.execute()
+
+        results = []
+        for member, score in rows:
+            link_id, short_code = _parse_member(member)
+            results.append({
+                "_id": link_id,
+                "short_code": short_code,
+                "total_clicks": int(round(score)),
+            })
+        return results
+
+    @staticmethod
+    def rebuild(days: int = 7) -> int:
+        """
+        Dựng lại bucket giờ/ngày từ hourly link_stats trong MongoDB
+        Ghi vào key tạm rồi RENAME để reader không thấy leaderboard rỗng
+
+        Returns:
+            Số buckets đã dựng lại
+        """
+        from applications.analytics.services import LinkStatsService
+
+        start_date = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        rows = LinkStatsService.aggregate_hourly_clicks(start_date)
+
+        buckets = {}
+        for row in rows:
+            member = _member(row["link_id"], row["short_code"])
+            hour_key = HOUR_KEY.format(date=row["date"], hour=row["hour"])
+            day_key = DAY_KEY.format(date=row["date"])
+
+            hour_bucket = buckets.setdefault(hour_key, {})
+            hour_bucket[member] = hour_bucket.get(member, 0) + row["click_count"]
+            day_bucket = buckets.setdefault(day_key, {})
+            day_bucket[member] = day_bucket.get(member, 0) + row["click_count"]
+
+        redis = get_redis()
+        pipe = redis.pipeline(transaction=False)
+        for key, scores in buckets.items():
+            tmp_key = f"{key}:rebuild"
+            ttl = HOUR_TTL if key.startswith("leaderboard:hour:") else DAY_TTL
+            pipe.delete(tmp_key)
+            pipe.zadd(tmp_key, scores)
+            pipe.rename(tmp_key, key)
+            pipe.expire(key, ttl)
+        pipe.execute()
+
+        logger.info(
+            "Leaderboard rebuilt",
+            extra={"extra": {"days": days, "buckets": len(buckets), "rows": len(rows)}}
+        )
+        return len(buckets)
@@ -0,0 +1,20 @@
+"""
+Dựng lại Redis leaderboard từ hourly link_stats (MongoDB)
+Dùng khi Redis bị mất dữ liệu hoặc lệch so với MongoDB
+
+    python manage.py rebuild_leaderboard --days 7
+"""
+from django.core.management.base import BaseCommand
+
+from applications.analytics.leaderboard import LeaderboardService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Redis leaderboard sorted sets from MongoDB link_stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        buckets = LeaderboardService.rebuild(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Leaderboard rebuilt: {buckets} buckets'))
@@ -0,0 +1,34 @@
+"""
+Replay click spool (local disk) vào Redis click stream
+
+    python manage.py replay_click_spool          # chạy một lần
+    python manage.py replay_click_spool --loop   # chạy liên tục (sidecar)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.analytics.stream import replay_spool, REPLAY_INTERVAL
+
+
+class Command(BaseCommand):
+    help = 'Replay spooled clicks into the Redis click stream'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running')
+        parser.add_argument('--interval', type=int, default=REPLAY_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                replayed = replay_spool()
+                if replayed or not options['loop']:
+                    self.stdout.write(f'Replayed {replayed} clicks')
+            except Exception as e:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Replay failed, will retry: {e}')
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
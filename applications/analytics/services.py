@@ -3,6 +3,8 @@ Analytics Services - Xử lý dữ liệu click events với MongoDB
 """
 from datetime import datetime, timedelta
 from typing import Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from applications.common.mongo_client import get_collection
 from applications.common.logger import get_logger
 
@@ -61,6 +63,39 @@ class ClickEventService:
 
         return str(result.inserted_id)
 
+    @staticmethod
+    def record_clicks(events: list) -> list:
+        """
+        Ghi nhiều click events bằng một insert_many
+
+        Event có _id trùng (batch được xử lý lại sau crash) bị bỏ qua.
+
+        Returns:
+            Danh sách events được insert mới
+        """
+        if not events:
+            return []
+
+        collection = get_collection(CLICK_EVENTS_COLLECTION)
+
+        for event in events:
+            event.setdefault("processed", False)
+
+        try:
+            collection.insert_many(events, ordered=False)
+            return events
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            # 11000: duplicate key
+            if any(err.get("code") != 11000 for err in errors):
+                raise
+            duplicates = {err["index"] for err in errors}
+            logger.info(
+                "Skipped duplicate click events",
+                extra={"extra": {"duplicates": len(duplicates)}}
+            )
+            return [event for i, event in enumerate(events) if i not in duplicates]
+
     @staticmethod
     def get_clicks_by_link(link_id: int, limit: int = 100) -> list:
         """Lấy danh sách click events của một link"""
@@ -164,6 +199,48 @@ class LinkStatsService:
 
         return result
 
+    @staticmethod
+    def bulk_update_stats(increments: dict):
+        """
+        Cộng dồn stats cho nhiều link bằng một bulk_write
+
+        Args:
+            increments: {(link_id, short_code, date_str, hour): click_count}
+                        hour=None cho daily stats
+        """
+        if not increments:
+            return None
+
+        collection = get_collection(LINK_STATS_COLLECTION)
+        now = datetime.utcnow()
+
+        operations = []
+        for (link_id, short_code, date_str, hour), click_count in increments.items():
+            filter_key = {
+                "link_id": link_id,
+                "date": date_str,
+                "type": "hourly" if hour is not None else "daily",
+            }
+            if hour is not None:
+                filter_key["hour"] = hour
+
+            operations.append(UpdateOne(
+                filter_key,
+                {
+                    "$inc": {"click_count": click_count},
+                    "$set": {
+                        "short_code": short_code,
+                        "updated_at": now,
+                    },
+                    "$setOnInsert": {
+                        "created_at": now,
+                    }
+                },
+                upsert=True
+            ))
+
+        return collection.bulk_write(operations, ordered=False)
+
     @staticmethod
     def get_daily_stats(link_id: int, days: int = 30) -> list:
         """Lấy thống kê daily của link trong N ngày gần nhất"""
@@ -194,10 +271,53 @@ class LinkStatsService:
 
     @staticmethod
     def get_top_links(limit: int = 10, days: int = 1) -> list:
-        """Lấy top links có nhiều click nhất"""
+        """Lấy top links có nhiều click nhất (Redis leaderboard)"""
+        from applications.analytics.leaderboard import LeaderboardService
+
+        return LeaderboardService.top_days(days=days, limit=limit)
+
+    @staticmethod
+    def aggregate_hourly_clicks(start_date: str) -> list:
+        """
+        Tổng clicks theo (link, ngày, giờ) từ hourly stats
+        Chỉ dùng để rebuild leaderboard
+        """
         collection = get_collection(LINK_STATS_COLLECTION)
 
-        start_date = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        pipeline = [
+            {
+                "$match": {
+                    "type": "hourly",
+                    "date": {"$gte": start_date}
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"link_id": "$link_id", "date": "$date", "hour": "$hour"},
+                    "short_code": {"$first": "$short_code"},
+                    "click_count": {"$sum": "$click_count"}
+                }
+            }
+        ]
+
+        return [
+            {
+                "link_id": row["_id"]["link_id"],
+                "date": row["_id"]["date"],
+                "hour": row["_id"]["hour"],
+                "short_code": row["short_code"],
+                "click_count": row["click_count"],
+            }
+            for row in collection.aggregate(pipeline)
+        ]
+
+    @staticmethod
+    def top_link_ids(start_date: str, limit: int) -> list:
+        """
+        ID các links nhiều clicks nhất từ start_date (daily stats), giảm dần
+        Dùng để warm link cache
+        """
+        collection = get_collection(LINK_STATS_COLLECTION)
 
         pipeline = [
             {
@@ -209,15 +329,14 @@ class LinkStatsService:
             {
                 "$group": {
                     "_id": "$link_id",
-                    "short_code": {"$first": "$short_code"},
-                    "total_clicks": {"$sum": "$click_count"}
+                    "click_count": {"$sum": "$click_count"}
                 }
             },
-            {"$sort": {"total_clicks": -1}},
-            {"$limit": limit}
+            {"$sort": {"click_count": -1}},
+            {"$limit": limit},
         ]
 
-        return list(collection.aggregate(pipeline))
+        return [row["_id"] for row in collection.aggregate(pipeline)]
 
     @staticmethod
     def get_total_clicks_today() -> int:
@@ -0,0 +1,333 @@
+"""
+Click ingestion qua Redis Stream
+- Redirect path: XADD một entry cho mỗi click (một round trip, không qua broker)
+- Batch consumer (consumer group): insert_many click_events +
+  một bulk_write link_stats + ZINCRBY leaderboard / PFADD unique visitors
+  cho mỗi batch, sau đó XACK + XDEL
+- Aggregates tính từ mọi entry của batch (không phụ thuộc kết quả insert),
+  mỗi bước ghi nhận stream ID đã áp dụng -> batch được giao lại sau crash
+  chỉ áp dụng phần còn thiếu. Marker bị xóa cùng MULTI với XACK nên chỉ
+  tồn tại khi entry còn pending (bị chặn bởi kích thước PEL, không theo traffic)
+- Khi Redis không khả dụng: ghi vào spool trên local disk,
+  replay vào stream khi Redis hoạt động lại
+"""
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from applications.common.redis_client import get_redis, get_async_redis
+from applications.common.spool import Spool
+from applications.common.logger import get_logger
+
+logger = get_logger("analytics.stream")
+
+CLICK_STREAM = "clicks:stream"
+CLICK_GROUP = "click-ingest"
+
+# Giới hạn an toàn cho bộ nhớ Redis; entry đã xử lý được XDEL ngay
+STREAM_MAXLEN = 10_000_000
+
+BATCH_SIZE = 1000
+# Entry pending quá lâu (consumer chết giữa batch) sẽ được claim lại
+CLAIM_IDLE_MS = 60_000
+
+# Stream IDs (còn pending) đã áp dụng vào aggregates, theo bước: SET
+APPLIED_KEY = "clicks:applied:{step}"
+APPLIED_STEPS = ("stats", "redis")
+
+REPLAY_CHUNK = 500
+REPLAY_INTERVAL = 15
+
+_spool = None
+_replayer_pid = None
+_replayer_lock = threading.Lock()
+
+
+def click_fields(link_id: int, short_code: str, ip_address: str,
+                 user_agent: str = "", referer: str = "", ts: float = None, owner_id: int = None) -> dict:
+    """Encode click thành fields của stream entry"""
+    return {
+        "link_id": str(link_id),
+        "owner_id": "" if owner_id is None else str(owner_id),
+        "short_code": short_code,
+        "ip_address": ip_address or "",
+        "user_agent": user_agent or "",
+        "referer": referer or "",
+        "ts": repr(ts if ts is not None else time.time()),
+    }
+
+
+def enqueue_click(link_id: int, short_code: str, ip_address: str,
+                  user_agent: str = "", referer: str = "", owner_id: int = None):
+    """Đẩy click vào stream và tăng counter write-behind (một round trip)"""
+    pipe = get_redis().pipeline(transaction=False)
+    _add_click(pipe, click_fields(link_id, short_code, ip_address, user_agent, referer, owner_id=owner_id))
+    pipe.execute()
+
+
+async def aenqueue_click(link_id: int, short_code: str, ip_address: str,
+                         user_agent: str = "", referer: str = "", owner_id: int = None):
+    """Bản async của enqueue_click"""
+    pipe = get_async_redis().pipeline(transaction=False)
+    _add_click(pipe, click_fields(link_id, short_code, ip_address, user_agent, referer, owner_id=owner_id))
+    await pipe.execute()
+
+
+def _add_click(pipe, fields: dict):
+    """XADD + HINCRBY click counter vào pipeline"""
+    from applications.links.counters import incr_pending
+
+    pipe.xadd(CLICK_STREAM, fields, maxlen=STREAM_MAXLEN, approximate=True)
+    incr_pending(pipe, fields["link_id"], owner_id=fields.get("owner_id"))
+
+
+def get_click_spool() -> Spool:
+    global _spool
+    if _spool is None:
+        _spool = Spool(settings.CLICK_SPOOL_DIR, "clicks")
+    return _spool
+
+
+def spool_click(link_id: int, short_code: str, ip_address: str,
+                user_agent: str = "", referer: str = "", owner_id: int = None):
+    """
+    Ghi click vào spool local (khi không XADD được)
+    Chỉ một lệnh write, fsync theo batch
+    """
+    fields = click_fields(link_id, short_code, ip_address, user_agent, referer, owner_id=owner_id)
+    get_click_spool().append(json.dumps(fields).encode())
+    _ensure_replayer()
+
+
+def replay_spool() -> int:
+    """
+    Đẩy các segment đã sealed trong spool vào click stream
+
+    Returns:
+        Số clicks đã replay (không tính record hỏng bị bỏ qua)
+    """
+    spool = get_click_spool()
+    redis = get_redis()
+    replayed = 0
+
+    for path in spool.sealed_segments():
+        with spool.claim(path) as reader:
+            if not reader.locked:
+                continue
+
+            segment_count = skipped = 0
+            for chunk in reader.chunks(REPLAY_CHUNK):
+                pipe = redis.pipeline(transaction=False)
+                for payload in chunk:
+                    try:
+                        fields = json.loads(payload)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    _add_click(pipe, fields)
+                    segment_count += 1
+                pipe.execute()
+                reader.commit()
+
+            reader.finish()
+            replayed += segment_count
+
+        if skipped:
+            logger.warning(
+                "Skipped corrupt spool records",
+                extra={"extra": {"path": str(path), "skipped": skipped}}
+            )
+        logger.info(
+            "Spool segment replayed",
+            extra={"extra": {"path": str(path), "replayed": segment_count, "skipped": skipped}}
+        )
+
+    return replayed
+
+
+def _ensure_replayer():
+    """Start thread replay spool của process hiện tại (nếu chưa chạy)"""
+    global _replayer_pid
+
+    pid = os.getpid()
+    if _replayer_pid == pid:
+        return
+
+    with _replayer_lock:
+        if _replayer_pid == pid:
+            return
+        _replayer_pid = pid
+        threading.Thread(target=_replay_loop, name="click-spool-replay", daemon=True).start()
+
+
+def _replay_loop():
+    global _replayer_pid
+
+    spool = get_click_spool()
+    while True:
+        time.sleep(REPLAY_INTERVAL)
+        try:
+            replay_spool()
+        except Exception as e:
+            logger.warning(f"Click spool replay failed, will retry: {e}")
+
+        with _replayer_lock:
+            if not spool.has_segments():
+                _replayer_pid = None
+                return
+
+
+class ClickStreamConsumer:
+    """
+    Usage:
+        consumer = ClickStreamConsumer()
+        processed = consumer.consume()
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.redis = get_redis()
+        self._group_ready = False
+
+    def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.redis.xgroup_create(CLICK_STREAM, CLICK_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def consume(self, count: int = BATCH_SIZE, block_ms: int = None) -> int:
+        """
+        Xử lý một batch
+
+        Returns:
+            Số entries đã xử lý
+        """
+        self.ensure_group()
+
+        # Ưu tiên entries bị bỏ dở bởi consumer khác
+        _, entries, _ = self.redis.xautoclaim(
+            CLICK_STREAM, CLICK_GROUP, self.name,
+            min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=count,
+        )
+
+        if not entries:
+            response = self.redis.xreadgroup(
+                CLICK_GROUP, self.name, {CLICK_STREAM: ">"},
+                count=count, block=block_ms,
+            )
+            entries = response[0][1] if response else []
+
+        if not entries:
+            return 0
+
+        # Entry đã bị XDEL/trim trả về fields None, chỉ cần ack
+        live = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if live:
+            self.process(live)
+
+        # Entry không còn được giao lại sau XACK -> bỏ marker cùng lúc
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xack(CLICK_STREAM, CLICK_GROUP, *entry_ids)
+        pipe.xdel(CLICK_STREAM, *entry_ids)
+        for step in APPLIED_STEPS:
+            pipe.srem(APPLIED_KEY.format(step=step), *entry_ids)
+        pipe.execute()
+
+        return len(live)
+
+    def process(self, entries: list):
+        """Ghi batch vào MongoDB (insert_many + bulk_write), leaderboard và HLL visitors"""
+        from applications.analytics.services import ClickEventService, LinkStatsService
+        from applications.analytics.leaderboard import LeaderboardService
+        from applications.analytics.visitors import UniqueVisitorService
+
+        events = []
+        # Owner của các links trong batch (sketch visitors theo owner)
+        owners = {}
+        for entry_id, fields in entries:
+            # Entry ghi trước khi có field owner_id không được tính vào sketch owner
+            if fields.get("owner_id"):
+                owners[int(fields["link_id"])] = int(fields["owner_id"])
+            events.append({
+                # Stream id làm _id để xử lý lại batch không tạo bản ghi trùng
+                "_id": entry_id,
+                "link_id": int(fields["link_id"]),
+                "short_code": fields["short_code"],
+                "ip_address": fields.get("ip_address", ""),
+                "user_agent": fields.get("user_agent", ""),
+                "referer": fields.get("referer", ""),
+                "country": "",
+                "city": "",
+                "clicked_at": datetime.fromtimestamp(float(fields["ts"]), tz=timezone.utc),
+            })
+
+        # Trùng _id (batch giao lại) bị bỏ qua, aggregates không dựa vào kết quả này
+        inserted = ClickEventService.record_clicks(events)
+
+        stats_events, redis_events = self._unapplied(events, APPLIED_STEPS)
+
+        # Realtime stats (hourly) trong MongoDB, marker ghi sau khi bulk_write thành công
+        # (crash giữa hai bước -> batch giao lại cộng lần nữa, không bao giờ mất)
+        stats_increments = _hourly_increments(stats_events)
+        LinkStatsService.bulk_update_stats(stats_increments)
+        self._mark_applied("stats", stats_events)
+
+        # Leaderboard + unique visitors + marker: một MULTI (áp dụng đúng một lần)
+        pipe = self.redis.pipeline(transaction=True)
+        LeaderboardService.record(_hourly_increments(redis_events), pipeline=pipe)
+        UniqueVisitorService.record(redis_events, pipeline=pipe, owners=owners)
+        self._mark_applied("redis", redis_events, pipeline=pipe)
+        pipe.execute()
+
+        logger.info(
+            "Click batch ingested",
+            extra={
+                "extra": {
+                    "consumer": self.name,
+                    "entries": len(entries),
+                    "inserted": len(inserted),
+                    "stats_updates": len(stats_increments),
+                    "already_applied": len(entries) - len(stats_events),
+                }
+            }
+        )
+
+    def _unapplied(self, events: list, steps: tuple) -> list:
+        """Với mỗi bước: các events có stream ID chưa được ghi nhận (một round trip)"""
+        ids = [event["_id"] for event in events]
+        pipe = self.redis.pipeline(transaction=False)
+        for step in steps:
+            pipe.smismember(APPLIED_KEY.format(step=step), ids)
+        return [
+            [event for event, applied in zip(events, flags) if not applied]
+            for flags in pipe.execute()
+        ]
+
+    def _mark_applied(self, step: str, events: list, pipeline=None):
+        if not events:
+            return
+        key = APPLIED_KEY.format(step=step)
+        if pipeline is not None:
+            pipeline.sadd(key, *[event["_id"] for event in events])
+        else:
+            self.redis.sadd(key, *[event["_id"] for event in events])
+
+
+def _hourly_increments(events: list) -> Counter:
+    """{(link_id, short_code, date_str, hour): clicks}"""
+    return Counter(
+        (event["link_id"], event["short_code"],
+         event["clicked_at"].strftime("%Y-%m-%d"), event["clicked_at"].hour)
+        for event in events
+    )
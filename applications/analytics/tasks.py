@@ -1,6 +1,7 @@
 """
 Celery tasks cho analytics
 """
+import time
 from celery import shared_task
 from datetime import datetime, timedelta
 from applications.common.logger import get_logger
@@ -64,6 +65,32 @@ def record_click_event(self, link_id: int, short_code: str, ip_address: str,
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True)
+def consume_click_stream(self, max_seconds: float = 5.0):
+    """
+    Task đọc click stream theo batch và ghi vào MongoDB
+    Chạy định kỳ (beat), dừng khi stream rỗng hoặc hết thời gian
+    """
+    try:
+        from applications.analytics.stream import ClickStreamConsumer
+
+        consumer = ClickStreamConsumer()
+        deadline = time.monotonic() + max_seconds
+        processed = 0
+
+        while time.monotonic() < deadline:
+            count = consumer.consume()
+            processed += count
+            if count == 0:
+                break
+
+        return {"status": "success", "processed": processed}
+
+    except Exception as exc:
+        logger.error(f"Failed to consume click stream: {exc}")
+        raise
+
+
 @shared_task(bind=True)
 def aggregate_clicks(self, link_id: int = None):
     """
@@ -1,3 +1,169 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from applications.analytics.stream import CLICK_STREAM, ClickStreamConsumer, enqueue_click
+from applications.common.redis_client import get_redis
+
+
+class ClickStreamTests(TestCase):
+    def setUp(self):
+        from applications.analytics.stream import APPLIED_KEY
+        get_redis().delete(CLICK_STREAM, APPLIED_KEY.format(step='stats'), APPLIED_KEY.format(step='redis'))
+
+    def test_batch_written_with_bulk_operations(self):
+        enqueue_click(1, 'aaaa111', '1.1.1.1', 'ua', '')
+        enqueue_click(1, 'aaaa111', '2.2.2.2', 'ua', '')
+        enqueue_click(2, 'bbbb222', '1.1.1.1', 'ua', 'http://ref')
+
+        with mock.patch('applications.analytics.services.ClickEventService.record_clicks',
+                        side_effect=lambda events: events) as record_clicks, \
+                mock.patch('applications.analytics.services.LinkStatsService.bulk_update_stats') as bulk_stats:
+            processed = ClickStreamConsumer(name='test').consume()
+
+        self.assertEqual(processed, 3)
+        record_clicks.assert_called_once()
+        self.assertEqual(len(record_clicks.call_args[0][0]), 3)
+
+        increments = bulk_stats.call_args[0][0]
+        self.assertEqual(sorted(increments.values()), [1, 2])
+
+        # Entry đã xử lý được ack và xóa khỏi stream
+        self.assertEqual(get_redis().xlen(CLICK_STREAM), 0)
+        self.assertEqual(ClickStreamConsumer(name='test').consume(), 0)
+
+    def test_redelivered_batch_applies_aggregates_once(self):
+        from datetime import datetime
+        from applications.analytics.leaderboard import LeaderboardService
+        from applications.analytics.visitors import UniqueVisitorService, OWNER_DAY_KEY
+        redis = get_redis()
+        for key in redis.scan_iter('leaderboard:*'):
+            redis.delete(key)
+        today = datetime.utcnow().strftime('%Y-%m-%d')
+        redis.delete(OWNER_DAY_KEY.format(owner_id=70, date=today))
+        enqueue_click(7, 'ccc7777', '1.1.1.1', 'ua', '', owner_id=70)
+        enqueue_click(7, 'ccc7777', '2.2.2.2', 'ua', '', owner_id=70)
+
+        # Crash sau khi đã cộng link_stats, trước MULTI leaderboard/visitors
+        with mock.patch('applications.analytics.services.ClickEventService.record_clicks',
+                        side_effect=lambda events: events), \
+                mock.patch('applications.analytics.services.LinkStatsService.bulk_update_stats') as bulk_stats, \
+                mock.patch.object(LeaderboardService, 'record', side_effect=RuntimeError('crash')):
+            with self.assertRaises(RuntimeError):
+                ClickStreamConsumer(name='crashed').consume()
+        self.assertEqual(sum(bulk_stats.call_args[0][0].values()), 2)
+        self.assertEqual(redis.scard('clicks:applied:stats'), 2)
+
+        # Giao lại: link_stats không cộng lần hai, phần còn thiếu được áp dụng
+        with mock.patch('applications.analytics.stream.CLAIM_IDLE_MS', 0), \
+                mock.patch('applications.analytics.services.ClickEventService.record_clicks',
+                           return_value=[]), \
+                mock.patch('applications.analytics.services.LinkStatsService.bulk_update_stats') as bulk_stats:
+            self.assertEqual(ClickStreamConsumer(name='retry').consume(), 2)
+        self.assertEqual(sum(bulk_stats.call_args[0][0].values()), 0)
+        self.assertEqual(LeaderboardService.daily_clicks(7, 'ccc7777', days=1), {today: 2})
+        # Owner lấy từ field owner_id của entry, không query MySQL
+        self.assertEqual(UniqueVisitorService.count_owner_today(70), 2)
+
+        # Marker bị xóa cùng XACK: state dedup không tăng theo traffic
+        self.assertEqual(redis.scard('clicks:applied:stats'), 0)
+        self.assertEqual(redis.scard('clicks:applied:redis'), 0)
+        self.assertEqual(redis.xpending(CLICK_STREAM, 'click-ingest')['pending'], 0)
+
+
+class ClickSpoolTests(TestCase):
+    def test_spooled_clicks_are_replayed_into_stream(self):
+        import tempfile
+        from django.test import override_settings
+        from applications.analytics import stream
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(CLICK_SPOOL_DIR=tmp), \
+                mock.patch.object(stream, '_spool', None), \
+                mock.patch.object(stream, '_ensure_replayer'):
+            get_redis().delete(CLICK_STREAM)
+            stream.spool_click(1, 'aaaa111', '1.1.1.1', 'ua', '')
+            stream.spool_click(2, 'bbbb222', '2.2.2.2', 'ua', '')
+            stream.get_click_spool().append(b'not json')
+
+            # Segment đang được ghi chưa được replay
+            self.assertEqual(stream.replay_spool(), 0)
+
+            with mock.patch('applications.common.spool.Spool.SEGMENT_SECONDS', -10):
+                self.assertEqual(stream.replay_spool(), 2)
+
+            entries = get_redis().xrange(CLICK_STREAM)
+            self.assertEqual([fields['short_code'] for _, fields in entries], ['aaaa111', 'bbbb222'])
+            self.assertFalse(stream.get_click_spool().has_segments())
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        from datetime import datetime
+        redis = get_redis()
+        for key in redis.scan_iter('leaderboard:*'):
+            redis.delete(key)
+        now = datetime.utcnow()
+        self.date = now.strftime('%Y-%m-%d')
+        self.hour = now.hour
+
+    def test_top_links_from_sorted_sets(self):
+        from applications.analytics.leaderboard import LeaderboardService
+        from applications.analytics.services import LinkStatsService
+
+        LeaderboardService.record({
+            (1, 'aaaa111', self.date, self.hour): 3,
+            (2, 'bbbb222', self.date, self.hour): 5,
+        })
+        LeaderboardService.record({(1, 'aaaa111', self.date, self.hour): 4})
+
+        expected = [
+            {'_id': 1, 'short_code': 'aaaa111', 'total_clicks': 7},
+            {'_id': 2, 'short_code': 'bbbb222', 'total_clicks': 5},
+        ]
+        self.assertEqual(LeaderboardService.top(window='1h'), expected)
+        self.assertEqual(LeaderboardService.top(window='7d', limit=1), expected[:1])
+        self.assertEqual(LinkStatsService.get_top_links(limit=10, days=1), expected)
+
+    def test_rebuild_from_link_stats(self):
+        from applications.analytics.leaderboard import LeaderboardService
+
+        rows = [
+            {'link_id': 1, 'short_code': 'aaaa111', 'date': self.date, 'hour': self.hour, 'click_count': 2},
+            {'link_id': 2, 'short_code': 'bbbb222', 'date': self.date, 'hour': self.hour, 'click_count': 9},
+        ]
+        with mock.patch('applications.analytics.services.LinkStatsService.aggregate_hourly_clicks',
+                        return_value=rows):
+            LeaderboardService.rebuild(days=1)
+
+        top = LeaderboardService.top(window='24h')
+        self.assertEqual([(row['_id'], row['total_clicks']) for row in top], [(2, 9), (1, 2)])
+
+
+class UniqueVisitorTests(TestCase):
+    def setUp(self):
+        redis = get_redis()
+        for key in redis.scan_iter('visitors:*'):
+            redis.delete(key)
+
+    def test_visitors_counted_per_ip_and_user_agent(self):
+        from datetime import datetime
+        from applications.analytics.visitors import UniqueVisitorService
+
+        now = datetime.utcnow()
+        events = [
+            {'link_id': 1, 'ip_address': '1.1.1.1', 'user_agent': 'a', 'clicked_at': now},
+            {'link_id': 1, 'ip_address': '1.1.1.1', 'user_agent': 'a', 'clicked_at': now},
+            {'link_id': 1, 'ip_address': '1.1.1.1', 'user_agent': 'b', 'clicked_at': now},
+            {'link_id': 2, 'ip_address': '1.1.1.1', 'user_agent': 'a', 'clicked_at': now},
+            {'link_id': 2, 'ip_address': '3.3.3.3', 'user_agent': 'a', 'clicked_at': now},
+        ]
+        UniqueVisitorService.record(events)
+
+        self.assertEqual(UniqueVisitorService.count_link(1, days=7), 2)
+        self.assertEqual(UniqueVisitorService.daily_counts(2, days=2)[now.strftime('%Y-%m-%d')], 2)
+
+        # Hợp các sketch: visitor (1.1.1.1, a) chỉ tính một lần
+        keys = UniqueVisitorService.day_keys([1, 2])
+        self.assertEqual(UniqueVisitorService.count(keys), 3)
+        with mock.patch('applications.analytics.visitors.MERGE_CHUNK', 1):
+            self.assertEqual(UniqueVisitorService.count(keys), 3)
@@ -0,0 +1,126 @@
+"""
+Unique visitors bằng Redis HyperLogLog
+- Visitor = hash(IP + User-Agent), không lưu dữ liệu thô
+- Ingest: PFADD vào sketch theo giờ và theo ngày của từng link, và sketch ngày của owner
+- Đếm một khoảng bất kỳ: PFCOUNT/PFMERGE nhiều sketch (sai số ~0.81%)
+- Mỗi sketch tối đa ~12 KB, không phụ thuộc lượng traffic
+"""
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+
+from applications.common.redis_client import get_redis
+
+HOUR_KEY = "visitors:{link_id}:{date}:{hour:02d}"
+DAY_KEY = "visitors:{link_id}:{date}"
+OWNER_DAY_KEY = "visitors:owner:{owner_id}:{date}"
+
+HOUR_TTL = 8 * 86400
+DAY_TTL = 400 * 86400
+
+# Số key tối đa cho một lệnh PFCOUNT/PFMERGE
+MERGE_CHUNK = 1000
+
+
+def visitor_id(ip_address: str, user_agent: str) -> str:
+    """Hash IP + UA (64 bit là đủ cho HLL)"""
+    raw = f"{ip_address or ''}\x00{user_agent or ''}".encode()
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+class UniqueVisitorService:
+    """
+    Usage:
+        UniqueVisitorService.record(events)
+        UniqueVisitorService.count_link(link_id, days=7)
+        UniqueVisitorService.daily_counts(link_id, days=7)
+    """
+
+    @staticmethod
+    def record(events: list, pipeline=None, owners: dict = None):
+        """
+        PFADD visitor của các click events vào sketch giờ + ngày
+
+        Args:
+            events: dicts có link_id, ip_address, user_agent, clicked_at
+            owners: {link_id: owner_id} -> ghi thêm sketch ngày của owner
+        """
+        owners = owners or {}
+        if not events:
+            return
+
+        sketches = {}
+        for event in events:
+            clicked_at = event["clicked_at"]
+            date_str = clicked_at.strftime("%Y-%m-%d")
+            visitor = visitor_id(event.get("ip_address"), event.get("user_agent"))
+
+            hour_key = HOUR_KEY.format(link_id=event["link_id"], date=date_str, hour=clicked_at.hour)
+            day_key = DAY_KEY.format(link_id=event["link_id"], date=date_str)
+            sketches.setdefault(hour_key, (HOUR_TTL, set()))[1].add(visitor)
+            sketches.setdefault(day_key, (DAY_TTL, set()))[1].add(visitor)
+
+            owner_id = owners.get(event["link_id"])
+            if owner_id is not None:
+                owner_key = OWNER_DAY_KEY.format(owner_id=owner_id, date=date_str)
+                sketches.setdefault(owner_key, (DAY_TTL, set()))[1].add(visitor)
+
+        pipe = pipeline if pipeline is not None else get_redis().pipeline(transaction=False)
+        for key, (ttl, visitors) in sketches.items():
+            pipe.pfadd(key, *visitors)
+            pipe.expire(key, ttl)
+
+        if pipeline is None:
+            pipe.execute()
+
+    @staticmethod
+    def day_keys(link_ids, days: int = 1) -> list:
+        """Key sketch ngày của các link, từ hôm nay lùi lại days - 1 ngày"""
+        today = datetime.utcnow().date()
+        dates = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        return [DAY_KEY.format(link_id=link_id, date=date_str) for link_id in link_ids for date_str in dates]
+
+    @staticmethod
+    def count(keys: list) -> int:
+        """
+        Số visitor khác nhau trong hợp các sketch
+        Nhiều key: PFMERGE theo chunk vào key tạm rồi PFCOUNT
+        """
+        if not keys:
+            return 0
+
+        redis = get_redis()
+        if len(keys) <= MERGE_CHUNK:
+            return redis.pfcount(*keys)
+
+        tmp_key = f"visitors:merge:{uuid.uuid4().hex}"
+        pipe = redis.pipeline(transaction=False)
+        for start in range(0, len(keys), MERGE_CHUNK):
+            # Liệt kê tmp_key như một source để cộng dồn qua các chunk
+            pipe.pfmerge(tmp_key, tmp_key, *keys[start:start + MERGE_CHUNK])
+        pipe.pfcount(tmp_key)
+        pipe.delete(tmp_key)
+        return pipe.execute()[-2]
+
+    @staticmethod
+    def count_link(link_id: int, days: int = 1) -> int:
+        """Unique visitors của link trong N ngày gần nhất (tính cả hôm nay)"""
+        return UniqueVisitorService.count(UniqueVisitorService.day_keys([link_id], days))
+
+    @staticmethod
+    def count_owner_today(owner_id: int) -> int:
+        """Unique visitors hôm nay trên tất cả links của owner (một PFCOUNT)"""
+        date_str = datetime.utcnow().strftime("%Y-%m-%d")
+        return get_redis().pfcount(OWNER_DAY_KEY.format(owner_id=owner_id, date=date_str))
+
+    @staticmethod
+    def daily_counts(link_id: int, days: int = 7) -> dict:
+        """{date_str: unique_visitors} cho N ngày gần nhất, một round trip"""
+        keys = UniqueVisitorService.day_keys([link_id], days)
+
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.pfcount(key)
+        counts = pipe.execute()
+
+        return {key.rsplit(":", 1)[1]: count for key, count in zip(keys, counts)}
@@ -0,0 +1,141 @@
+"""
+Bloom filter lưu trong Redis (bitmap), có bản mirror in-process
+- Redis là bản chính, được cập nhật bằng SETBIT
+- Mirror local cho phép kiểm tra membership không cần network
+- Filter chỉ được dùng khi đã build xong (key {name}:ready tồn tại)
+"""
+import math
+import threading
+from hashlib import blake2b
+
+from applications.common.redis_client import get_redis, get_binary_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("bloom")
+
+
+class BloomFilter:
+    """
+    Usage:
+        bloom = BloomFilter("link_codes:bloom", capacity=10_000_000, error_rate=0.01)
+        bloom.add(["abc1234"])
+        bloom.might_contain("abc1234")  # True
+    """
+
+    def __init__(self, key: str, capacity: int, error_rate: float):
+        self.key = key
+        self.ready_key = f"{key}:ready"
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._mirror = None
+        self._lock = threading.Lock()
+
+    def positions(self, item: str) -> list:
+        """Double hashing: h1 + i * h2"""
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._mirror is not None
+
+    def might_contain(self, item: str) -> bool:
+        """
+        Kiểm tra bằng mirror local
+        Trả về True (không lọc) khi mirror chưa được load
+        """
+        mirror = self._mirror
+        if mirror is None:
+            return True
+
+        return all(
+            mirror[pos >> 3] & (0x80 >> (pos & 7))
+            for pos in self.positions(item)
+        )
+
+    def add(self, items, pipeline=None):
+        """Thêm items vào Redis bitmap và mirror local"""
+        pipe = pipeline if pipeline is not None else get_redis().pipeline(transaction=False)
+
+        for item in items:
+            for pos in self.positions(item):
+                pipe.setbit(self.key, pos, 1)
+
+        if pipeline is None:
+            pipe.execute()
+
+        self.add_local(items)
+
+    def add_local(self, items):
+        """Chỉ cập nhật mirror (khi nhận broadcast từ worker khác)"""
+        with self._lock:
+            mirror = self._mirror
+            if mirror is None:
+                return
+            for item in items:
+                for pos in self.positions(item):
+                    mirror[pos >> 3] |= 0x80 >> (pos & 7)
+
+    def load(self) -> bool:
+        """
+        Load bitmap từ Redis vào mirror local
+
+        Returns:
+            False nếu filter chưa được build
+        """
+        redis = get_binary_redis()
+
+        if not redis.exists(self.ready_key):
+            with self._lock:
+                self._mirror = None
+            return False
+
+        data = redis.get(self.key) or b''
+        mirror = bytearray(data)
+        nbytes = (self.size + 7) // 8
+        if len(mirror) < nbytes:
+            mirror.extend(b'\x00' * (nbytes - len(mirror)))
+
+        with self._lock:
+            self._mirror = mirror
+
+        logger.info(
+            "Bloom filter mirror loaded",
+            extra={"extra": {"key": self.key, "bytes": len(mirror)}}
+        )
+        return True
+
+    def unload(self):
+        with self._lock:
+            self._mirror = None
+
+    def rebuild(self, items) -> int:
+        """
+        Build lại filter từ đầu rồi thay thế atomically (RENAME)
+
+        Returns:
+            Số items đã thêm
+        """
+        bits = bytearray((self.size + 7) // 8)
+        count = 0
+
+        for item in items:
+            for pos in self.positions(item):
+                bits[pos >> 3] |= 0x80 >> (pos & 7)
+            count += 1
+
+        redis = get_binary_redis()
+        tmp_key = f"{self.key}:rebuild"
+        redis.set(tmp_key, bytes(bits))
+        pipe = redis.pipeline()
+        pipe.rename(tmp_key, self.key)
+        pipe.set(self.ready_key, 1)
+        pipe.execute()
+
+        logger.info(
+            "Bloom filter rebuilt",
+            extra={"extra": {"key": self.key, "items": count, "bits": self.size}}
+        )
+        return count
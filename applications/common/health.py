@@ -2,12 +2,16 @@
 Health Check Endpoints
 - /health/ : Liveness check (app đang chạy)
 - /readyz/ : Readiness check (app sẵn sàng nhận request)
+- /metrics/ : Counters của worker process hiện tại
 """
+import os
+
 from django.http import JsonResponse
 from django.views import View
 
 from applications.common.redis_client import RedisClient
 from applications.common.mongo_client import MongoDBClient
+from applications.common.metrics import get_counters
 from applications.common.logger import get_logger
 
 logger = get_logger("health")
@@ -109,4 +113,16 @@ class ReadinessCheckView(View):
             return False, "No workers available"
         except Exception as e:
             logger.error(f"Celery health check failed: {e}")
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+class MetricsView(View):
+    """
+    Counters in-process (cache hit/miss theo tier, ...)
+    Mỗi worker có bộ đếm riêng, pid giúp phân biệt khi scrape nhiều lần
+    """
+
+    def get(self, request):
+        return JsonResponse({
+            "pid": os.getpid(),
+            "counters": get_counters(request.GET.get("prefix")),
+        })
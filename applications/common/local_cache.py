@@ -0,0 +1,126 @@
+"""
+In-process cache (L1) đặt trước Redis
+- LRU + TTL, giới hạn số phần tử
+- Admission theo tần suất (TinyLFU): key mới chỉ được nhận khi
+  được truy cập nhiều hơn key sắp bị evict, tránh one-off scan đẩy hot key ra
+"""
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+
+MISSING = object()
+
+
+# Bảng tra byte -> byte >> 1 cho FrequencySketch._reset
+_HALVE = bytes(value >> 1 for value in range(256))
+
+
+class FrequencySketch:
+    """
+    Count-min sketch 4 hàng, counter tối đa 15
+    Định kỳ chia đôi các counter (aging) để tần suất cũ giảm dần
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, width: int):
+        self.width = max(64, width)
+        self.rows = [bytearray(self.width) for _ in range(self.DEPTH)]
+        self.sample_size = self.width * 10
+        self.additions = 0
+
+    def _indexes(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        for i in range(self.DEPTH):
+            yield i, int.from_bytes(digest[i * 4:(i + 1) * 4], 'little') % self.width
+
+    def increment(self, key: str):
+        for row, idx in self._indexes(key):
+            if self.rows[row][idx] < self.MAX_COUNT:
+                self.rows[row][idx] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def frequency(self, key: str) -> int:
+        return min(self.rows[row][idx] for row, idx in self._indexes(key))
+
+    def _reset(self):
+        """Aging: chia đôi toàn bộ counter (translate chạy trong C, không lặp từng byte)"""
+        for row in self.rows:
+            row[:] = row.translate(_HALVE)
+        self.additions //= 2
+
+
+class LocalCache:
+    """
+    LRU/TTL cache thread-safe dùng trong một worker process
+
+    Usage:
+        cache = LocalCache(maxsize=10000, ttl=30)
+        cache.set("abc", {...})
+        value = cache.get("abc")  # MISSING nếu không có
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._sketch = FrequencySketch(maxsize * 4)
+
+    def get(self, key: str):
+        """Lấy value, trả về MISSING nếu không có hoặc đã hết hạn"""
+        now = time.monotonic()
+        with self._lock:
+            self._sketch.increment(key)
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                return MISSING
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float = None) -> bool:
+        """
+        Lưu value vào cache
+
+        Returns:
+            False nếu key bị từ chối bởi admission policy
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+                return True
+
+            if len(self._data) >= self.maxsize:
+                victim = next(iter(self._data))
+                victim_expired = self._data[victim][0] <= time.monotonic()
+                if not victim_expired and \
+                        self._sketch.frequency(key) <= self._sketch.frequency(victim):
+                    return False
+                del self._data[victim]
+
+            self._data[key] = (expires_at, value)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
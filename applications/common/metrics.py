@@ -0,0 +1,42 @@
+"""
+In-process counters
+Mỗi worker process giữ bộ đếm riêng, đọc qua /metrics/ để sizing cache
+"""
+import threading
+from collections import defaultdict
+
+_counters = defaultdict(int)
+_gauges = {}
+_lock = threading.Lock()
+
+
+def incr(name: str, amount: int = 1):
+    """Tăng counter"""
+    with _lock:
+        _counters[name] += amount
+
+
+def register_gauge(name: str, func):
+    """Đăng ký gauge, giá trị được tính lại mỗi lần đọc"""
+    _gauges[name] = func
+
+
+def get_counters(prefix: str = None) -> dict:
+    """Lấy snapshot các counters và gauges (lọc theo prefix nếu có)"""
+    with _lock:
+        values = dict(_counters)
+
+    for name, func in _gauges.items():
+        values[name] = func()
+
+    return {
+        name: value
+        for name, value in sorted(values.items())
+        if prefix is None or name.startswith(prefix)
+    }
+
+
+def reset_counters():
+    """Reset toàn bộ counters (dùng cho test)"""
+    with _lock:
+        _counters.clear()
@@ -1,21 +1,49 @@
 import time
 import uuid
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
 from applications.common.logger import get_logger
 
 logger = get_logger("middleware")
 
 
 class RequestLogMiddleware:
+    # Hỗ trợ cả sync và async để async view không bị chuyển về thread
+    sync_capable = True
+    async_capable = True
+
+    # Skip logging cho static files và health check
+    skip_paths = ['/static/', '/favicon.ico', '/health/', '/readyz/', '/metrics/']
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Skip logging cho static files và health check
-        skip_paths = ['/static/', '/favicon.ico', '/health/', '/readyz/']
-        if any(request.path.startswith(path) for path in skip_paths):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if self._should_skip(request):
             return self.get_response(request)
 
+        start_time = self._log_started(request)
+        response = self.get_response(request)
+        return self._log_finished(request, response, start_time)
+
+    async def __acall__(self, request):
+        if self._should_skip(request):
+            return await self.get_response(request)
+
+        start_time = self._log_started(request)
+        response = await self.get_response(request)
+        return self._log_finished(request, response, start_time)
+
+    def _should_skip(self, request):
+        return any(request.path.startswith(path) for path in self.skip_paths)
+
+    def _log_started(self, request):
         start_time = time.time()
 
         # Lấy request_id từ header hoặc tạo mới
@@ -34,16 +62,16 @@ class RequestLogMiddleware:
                 }
             }
         )
+        return start_time
 
-        response = self.get_response(request)
-
+    def _log_finished(self, request, response, start_time):
         duration_ms = int((time.time() - start_time) * 1000)
 
         logger.info(
             "Request finished",
             extra={
                 "extra": {
-                    "request_id": request_id,
+                    "request_id": request.request_id,
                     "method": request.method,
                     "path": request.path,
                     "status_code": response.status_code,
@@ -53,7 +81,7 @@ class RequestLogMiddleware:
         )
 
         # Thêm request_id vào response header
-        response['X-Request-ID'] = request_id
+        response['X-Request-ID'] = request.request_id
         return response
 
     def _get_client_ip(self, request):
@@ -61,4 +89,4 @@ class RequestLogMiddleware:
         x_forwarded_for = request.headers.get('X-Forwarded-For')
         if x_forwarded_for:
             return x_forwarded_for.split(',')[0].strip()
-        return request.META.get('REMOTE_ADDR', '')
\ No newline at end of file
+        return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,126 @@
+"""
+Packed binary encoding cho cache entry nhỏ (thay cho Redis hash nhiều field)
+
+Layout (version 2):
+    version (1 byte) | flags (1 byte) | reason (1 byte) | varint id
+    | varint owner | varint gen
+    | [varint expires_at ms nếu FLAG_EXPIRES] | varint soft (giây) | varint delta (ms)
+    | original_url (UTF-8, phần còn lại)
+Version 1: như trên nhưng không có owner, gen (vẫn decode được)
+Negative entry: version | FLAG_NEGATIVE
+
+Codec nhận và trả về cùng mapping (str -> str) với dạng hash,
+nên hai format có thể cùng tồn tại trong lúc chuyển đổi.
+"""
+
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+FLAG_ACCESSIBLE = 0x01
+FLAG_NEGATIVE = 0x02
+FLAG_EXPIRES = 0x04
+
+
+class CodecError(ValueError):
+    pass
+
+
+def encode_varint(value: int) -> bytes:
+    """Unsigned LEB128"""
+    if value < 0:
+        raise CodecError("varint must be non-negative")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, pos: int):
+    """Returns: (value, vị trí sau varint)"""
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise CodecError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class PackedEntryCodec:
+    """
+    Usage:
+        codec = PackedEntryCodec(reasons=('', 'Link has been deleted', ...))
+        blob = codec.encode(mapping)
+        mapping = codec.decode(blob)
+
+    reasons: bảng enum cho field reason, index 0 là chuỗi rỗng
+    Reason không có trong bảng được lưu là 0
+    """
+
+    def __init__(self, reasons: tuple):
+        self.reasons = tuple(reasons)
+        self._reason_index = {reason: index for index, reason in enumerate(self.reasons)}
+
+    def encode(self, mapping: dict) -> bytes:
+        if mapping.get('missing'):
+            return bytes((VERSION, FLAG_NEGATIVE))
+
+        flags = 0
+        if mapping['is_accessible'] == 'True':
+            flags |= FLAG_ACCESSIBLE
+        if mapping.get('expires_at'):
+            flags |= FLAG_EXPIRES
+
+        out = bytearray((VERSION, flags, self._reason_index.get(mapping.get('reason', ''), 0)))
+        out += encode_varint(int(mapping['id']))
+        out += encode_varint(int(mapping['owner']))
+        out += encode_varint(int(mapping.get('gen') or 0))
+        if flags & FLAG_EXPIRES:
+            out += encode_varint(round(float(mapping['expires_at']) * 1000))
+        out += encode_varint(int(float(mapping.get('soft') or 0)))
+        out += encode_varint(round(float(mapping.get('delta') or 0) * 1000))
+        out += mapping['original_url'].encode()
+        return bytes(out)
+
+    def decode(self, data: bytes) -> dict:
+        if len(data) < 2 or data[0] not in SUPPORTED_VERSIONS:
+            raise CodecError(f"unsupported entry version: {data[:1]!r}")
+
+        flags = data[1]
+        if flags & FLAG_NEGATIVE:
+            return {'missing': '1'}
+        if len(data) < 3:
+            raise CodecError("truncated entry")
+
+        version, reason = data[0], data[2]
+        link_id, pos = decode_varint(data, 3)
+        owner = {}
+        if version >= 2:
+            owner_id, pos = decode_varint(data, pos)
+            generation, pos = decode_varint(data, pos)
+            owner = {'owner': str(owner_id), 'gen': str(generation)}
+        expires_at = ''
+        if flags & FLAG_EXPIRES:
+            expires_ms, pos = decode_varint(data, pos)
+            expires_at = str(expires_ms / 1000)
+        soft, pos = decode_varint(data, pos)
+        delta_ms, pos = decode_varint(data, pos)
+
+        return {
+            'id': str(link_id),
+            'original_url': data[pos:].decode(),
+            'is_accessible': 'True' if flags & FLAG_ACCESSIBLE else 'False',
+            'reason': self.reasons[reason] if reason < len(self.reasons) else '',
+            'expires_at': expires_at,
+            'soft': str(soft),
+            'delta': str(delta_ms / 1000),
+            **owner,
+        }
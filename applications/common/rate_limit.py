@@ -12,7 +12,7 @@ class RateLimitExceeded(Exception):
         self.retry_after = retry_after
 
 
-def check_rate_limit(key: str, limit: int, window_seconds: int) -> int:
+def check_rate_limit(key: str, limit: int, window_seconds: int, cost: int = 1) -> int:
     """
     Kiểm tra rate limit cho một key.
 
@@ -20,6 +20,7 @@ def check_rate_limit(key: str, limit: int, window_seconds: int) -> int:
         key: Unique identifier (e.g., user_id, ip_address)
         limit: Số request tối đa cho phép
         window_seconds: Khoảng thời gian tính bằng giây
+        cost: Số đơn vị request này tiêu tốn (vd: số items của bulk request)
 
     Returns:
         Số request hiện tại
@@ -30,9 +31,9 @@ def check_rate_limit(key: str, limit: int, window_seconds: int) -> int:
     redis = get_redis()
     redis_key = f"rate_limit:{key}"
 
-    current = redis.incr(redis_key)
+    current = redis.incrby(redis_key, cost)
 
-    if current == 1:
+    if current == cost:
         redis.expire(redis_key, window_seconds)
 
     if current > limit:
@@ -45,6 +46,7 @@ def check_rate_limit(key: str, limit: int, window_seconds: int) -> int:
                     "limit": limit,
                     "window": window_seconds,
                     "current": current,
+                    "cost": cost,
                     "retry_after": ttl,
                 }
             }
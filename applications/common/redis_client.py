@@ -1,12 +1,44 @@
+import asyncio
+import hashlib
+import weakref
+
 import redis
+import redis.asyncio as aioredis
+from redis.exceptions import NoScriptError
+
 from applications.common.config import get_config
 from applications.common.logger import get_logger
 
 logger = get_logger("redis")
 
+# Đọc key là hash hoặc string (hai format cache cùng tồn tại)
+# String: trả về {'__string__', value}; hash: HGETALL; không tồn tại: {}
+GET_HASH_OR_STRING_SCRIPT = """
+local kind = redis.call('TYPE', KEYS[1])['ok']
+if kind == 'string' then
+    return {'__string__', redis.call('GET', KEYS[1])}
+end
+if kind == 'hash' then
+    return redis.call('HGETALL', KEYS[1])
+end
+return {}
+"""
+
+STRING_MARKER = b'__string__'
+
+# Ghi đè toàn bộ hash và đặt TTL atomically
+SET_WITH_TTL_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
 
 class RedisClient:
     _client = None
+    _binary_client = None
+    _scripts = {}
 
     @classmethod
     def get_client(cls):
@@ -31,6 +63,31 @@ class RedisClient:
             )
         return cls._client
 
+    @classmethod
+    def get_binary_client(cls):
+        """Client không decode response (dùng cho bitmap, giá trị nhị phân)"""
+        if cls._binary_client is None:
+            cfg = get_config("redis")
+            cls._binary_client = redis.Redis(
+                host=cfg.get("host", "localhost"),
+                port=cfg.get("port", 6379),
+                db=cfg.get("db", 0),
+                decode_responses=False,
+                socket_connect_timeout=5,
+                retry_on_timeout=True,
+            )
+        return cls._binary_client
+
+    @classmethod
+    def get_script(cls, name: str, source: str, binary: bool = False):
+        """Đăng ký Lua script một lần (redis-py tự fallback EVAL khi NOSCRIPT)"""
+        script = cls._scripts.get((name, binary))
+        if script is None:
+            client = cls.get_binary_client() if binary else cls.get_client()
+            script = client.register_script(source)
+            cls._scripts[(name, binary)] = script
+        return script
+
     @classmethod
     def health_check(cls):
         """Kiểm tra kết nối Redis"""
@@ -43,11 +100,132 @@ class RedisClient:
             return False
 
 
+class AsyncRedisClient:
+    """
+    redis.asyncio client cho ASGI
+    Connection pool gắn với event loop nên mỗi loop có một pool dùng chung
+    """
+    _clients = weakref.WeakKeyDictionary()
+    _binary_clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_client(cls):
+        return cls._get(cls._clients, decode_responses=True)
+
+    @classmethod
+    def get_binary_client(cls):
+        """Client không decode response (giá trị nhị phân)"""
+        return cls._get(cls._binary_clients, decode_responses=False)
+
+    @classmethod
+    def _get(cls, clients, decode_responses: bool):
+        loop = asyncio.get_running_loop()
+        client = clients.get(loop)
+        if client is None:
+            cfg = get_config("redis")
+            pool = aioredis.ConnectionPool(
+                host=cfg.get("host", "localhost"),
+                port=cfg.get("port", 6379),
+                db=cfg.get("db", 0),
+                decode_responses=decode_responses,
+                socket_connect_timeout=5,
+                retry_on_timeout=True,
+                max_connections=cfg.get("max_connections", 200),
+            )
+            client = aioredis.Redis(connection_pool=pool)
+            clients[loop] = client
+            logger.info(
+                "Async Redis client initialized",
+                extra={
+                    "extra": {
+                        "host": cfg.get("host"),
+                        "port": cfg.get("port"),
+                        "binary": not decode_responses,
+                    }
+                }
+            )
+        return client
+
+
 def get_redis():
     """Lấy Redis client instance"""
     return RedisClient.get_client()
 
 
+def get_async_redis():
+    """Lấy redis.asyncio client của event loop hiện tại"""
+    return AsyncRedisClient.get_client()
+
+
+def get_binary_redis():
+    """Lấy Redis client trả về bytes"""
+    return RedisClient.get_binary_client()
+
+
+def get_async_binary_redis():
+    """Lấy redis.asyncio client trả về bytes của event loop hiện tại"""
+    return AsyncRedisClient.get_binary_client()
+
+
+def _hash_or_string(data: list):
+    if not data:
+        return {}
+    if data[0] == STRING_MARKER:
+        return data[1]
+    return {field.decode(): value.decode() for field, value in zip(data[::2], data[1::2])}
+
+
+def get_hash_or_string(key: str):
+    """
+    Đọc key có thể là hash hoặc string trong một round trip
+
+    Returns:
+        bytes nếu là string, dict (str) nếu là hash, dict rỗng nếu không tồn tại
+    """
+    script = RedisClient.get_script("get_hash_or_string", GET_HASH_OR_STRING_SCRIPT, binary=True)
+    return _hash_or_string(script(keys=[key]))
+
+
+def hset_with_ttl(key: str, mapping: dict, ttl: int):
+    """Ghi đè hash và đặt TTL trong một round trip"""
+    args = [ttl]
+    for field, value in mapping.items():
+        args.extend((field, value))
+
+    script = RedisClient.get_script("set_with_ttl", SET_WITH_TTL_SCRIPT)
+    script(keys=[key], args=args)
+
+
+_SCRIPT_SHAS = {}
+
+
+async def _aeval(source: str, keys: list, args: list, client=None):
+    """EVALSHA, gửi source (EVAL) chỉ khi server chưa có script"""
+    client = client or get_async_redis()
+    sha = _SCRIPT_SHAS.get(source)
+    if sha is None:
+        sha = _SCRIPT_SHAS[source] = hashlib.sha1(source.encode()).hexdigest()
+    try:
+        return await client.evalsha(sha, len(keys), *keys, *args)
+    except NoScriptError:
+        return await client.eval(source, len(keys), *keys, *args)
+
+
+async def ahset_with_ttl(key: str, mapping: dict, ttl: int):
+    """Bản async của hset_with_ttl"""
+    args = [ttl]
+    for field, value in mapping.items():
+        args.extend((field, value))
+
+    await _aeval(SET_WITH_TTL_SCRIPT, [key], args)
+
+
+async def aget_hash_or_string(key: str):
+    """Bản async của get_hash_or_string"""
+    data = await _aeval(GET_HASH_OR_STRING_SCRIPT, [key], [], client=get_async_binary_redis())
+    return _hash_or_string(data)
+
+
 # Backward compatibility
 redis_client = None
 
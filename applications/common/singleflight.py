@@ -0,0 +1,166 @@
+"""
+Single-flight: gộp các lần load cùng một key khi cache miss
+- Trong process: thread/coroutine đầu tiên load, các request khác chờ kết quả của nó
+- Giữa các process: lease SET NX PX trong Redis, process không giữ lease
+  poll cache trong thời gian ngắn thay vì cùng query DB
+- Hết thời gian chờ (leader chết / chậm) -> tự load, không bao giờ chặn vô hạn
+"""
+import asyncio
+import threading
+import time
+import uuid
+
+from applications.common.metrics import incr
+from applications.common.redis_client import RedisClient, get_redis, get_async_redis, _aeval
+
+LEASE_MS = 2000
+WAIT_TIMEOUT = 0.5
+POLL_INTERVAL = 0.02
+
+# Chỉ xóa lease nếu vẫn là của mình (lease có thể đã hết hạn và bị process khác lấy)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Usage:
+        flight = SingleFlight("link_cache")
+        data = flight.do(code, load, peek)
+
+    load(): query nguồn và ghi cache, trả về kết quả
+    peek(): (found, value) - đọc cache mà leader ở process khác ghi
+    Counters: {name}.singleflight.leader / coalesced_local / coalesced_remote / wait_timeout
+    """
+
+    def __init__(self, name: str, lease_ms: int = LEASE_MS,
+                 wait_timeout: float = WAIT_TIMEOUT, poll_interval: float = POLL_INTERVAL):
+        self.name = name
+        self.lease_ms = lease_ms
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def lease_key(self, key: str) -> str:
+        return f"{self.name}:lease:{key}"
+
+    def _incr(self, event: str):
+        incr(f"{self.name}.singleflight.{event}")
+
+    def do(self, key: str, load, peek):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            # Leader tự giới hạn bởi wait_timeout + một lần load
+            if call.event.wait(self.wait_timeout + self.lease_ms / 1000):
+                self._incr("coalesced_local")
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            self._incr("wait_timeout")
+            return load()
+
+        try:
+            call.result = self._load_with_lease(key, load, peek)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _load_with_lease(self, key: str, load, peek):
+        redis = get_redis()
+        token = uuid.uuid4().hex
+        lease_key = self.lease_key(key)
+
+        if redis.set(lease_key, token, nx=True, px=self.lease_ms):
+            self._incr("leader")
+            try:
+                return load()
+            finally:
+                release = RedisClient.get_script("singleflight_release", RELEASE_SCRIPT)
+                release(keys=[lease_key], args=[token])
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            found, value = peek()
+            if found:
+                self._incr("coalesced_remote")
+                return value
+
+        self._incr("wait_timeout")
+        return load()
+
+    async def ado(self, key: str, load, peek):
+        """Bản async: load/peek là coroutine functions"""
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+
+        future = self._async_calls.get(call_key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.shield(future), self.wait_timeout + self.lease_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                self._incr("wait_timeout")
+                return await load()
+            self._incr("coalesced_local")
+            return result
+
+        future = self._async_calls[call_key] = loop.create_future()
+        try:
+            result = await self._aload_with_lease(key, load, peek)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Không ai chờ -> tránh cảnh báo "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._async_calls.pop(call_key, None)
+
+    async def _aload_with_lease(self, key: str, load, peek):
+        redis = get_async_redis()
+        token = uuid.uuid4().hex
+        lease_key = self.lease_key(key)
+
+        if await redis.set(lease_key, token, nx=True, px=self.lease_ms):
+            self._incr("leader")
+            try:
+                return await load()
+            finally:
+                await _aeval(RELEASE_SCRIPT, [lease_key], [token], client=redis)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            found, value = await peek()
+            if found:
+                self._incr("coalesced_remote")
+                return value
+
+        self._incr("wait_timeout")
+        return await load()
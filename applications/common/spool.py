@@ -0,0 +1,199 @@
+"""
+Append-only spool trên local disk
+- Record: 4 byte độ dài (big-endian) + payload
+- Mỗi process ghi vào segment riêng, segment mới sau SEGMENT_SECONDS
+- fsync theo batch (mỗi N records hoặc T giây)
+- Segment "sealed" (không còn được ghi) mới được đọc/replay
+"""
+import fcntl
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from applications.common.logger import get_logger
+
+logger = get_logger("spool")
+
+HEADER = struct.Struct(">I")
+SUFFIX = ".spool"
+OFFSET_SUFFIX = ".offset"
+
+
+class Spool:
+    """
+    Usage:
+        spool = Spool("/var/spool/shorter", "clicks")
+        spool.append(b'...')
+
+        for path in spool.sealed_segments():
+            with spool.claim(path) as reader:
+                ...
+    """
+
+    SEGMENT_SECONDS = 60
+    FSYNC_EVERY = 100
+    FSYNC_INTERVAL = 1.0
+
+    def __init__(self, directory, name: str):
+        self.directory = Path(directory)
+        self.name = name
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+        self._segment_started = 0.0
+        self._unsynced = 0
+        self._last_fsync = 0.0
+
+    def append(self, payload: bytes):
+        """Ghi một record (một syscall write)"""
+        data = HEADER.pack(len(payload)) + payload
+        with self._lock:
+            fd = self._current_fd()
+            os.write(fd, data)
+            self._unsynced += 1
+
+            now = time.monotonic()
+            if self._unsynced >= self.FSYNC_EVERY or now - self._last_fsync >= self.FSYNC_INTERVAL:
+                os.fsync(fd)
+                self._unsynced = 0
+                self._last_fsync = now
+
+    def _current_fd(self):
+        now = time.time()
+        pid = os.getpid()
+
+        if self._fd is not None and self._pid == pid and \
+                now - self._segment_started < self.SEGMENT_SECONDS:
+            return self._fd
+
+        if self._fd is not None and self._pid == pid:
+            os.fsync(self._fd)
+            os.close(self._fd)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self.name}-{pid}-{int(now * 1000)}{SUFFIX}"
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._pid = pid
+        self._segment_started = now
+        self._unsynced = 0
+        return self._fd
+
+    def sealed_segments(self) -> list:
+        """Các segment đã quá SEGMENT_SECONDS (writer không còn ghi), cũ nhất trước"""
+        if not self.directory.exists():
+            return []
+
+        # Thêm khoảng đệm cho write đang dở ở cuối segment
+        cutoff_ms = (time.time() - self.SEGMENT_SECONDS - 5) * 1000
+        segments = []
+        for path in self.directory.glob(f"{self.name}-*{SUFFIX}"):
+            try:
+                started_ms = int(path.stem.rsplit("-", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            if started_ms < cutoff_ms:
+                segments.append((started_ms, path))
+
+        return [path for _, path in sorted(segments)]
+
+    def has_segments(self) -> bool:
+        return self.directory.exists() and any(self.directory.glob(f"{self.name}-*{SUFFIX}"))
+
+    def claim(self, path):
+        """Lock segment (flock) để chỉ một replayer xử lý"""
+        return SegmentReader(path)
+
+
+class SegmentReader:
+    """
+    Đọc records từ offset đã commit, commit offset sau mỗi chunk,
+    xóa segment khi đọc hết
+
+    Usage:
+        with SegmentReader(path) as reader:
+            if reader.locked:
+                for chunk in reader.chunks(500):
+                    send(chunk)
+                    reader.commit()
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offset_path = self.path.with_name(self.path.name + OFFSET_SUFFIX)
+        self.locked = False
+        self._file = None
+        self._offset = 0
+        self._pending_offset = 0
+        self.truncated = False
+
+    def __enter__(self):
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return self
+
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return self
+
+        # Segment có thể đã được replayer khác xử lý xong và xóa
+        try:
+            if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+                return self
+        except FileNotFoundError:
+            return self
+
+        self.locked = True
+        if self.offset_path.exists():
+            self._offset = int(self.offset_path.read_text() or 0)
+        self._pending_offset = self._offset
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            self._file.close()
+        return False
+
+    def chunks(self, size: int):
+        """Yield list payloads, tối đa size records mỗi chunk"""
+        self._file.seek(self._offset)
+        chunk = []
+
+        while True:
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                self.truncated = bool(header)
+                break
+            (length,) = HEADER.unpack(header)
+            payload = self._file.read(length)
+            if len(payload) < length:
+                # Record ghi dở (process chết giữa chừng)
+                self.truncated = True
+                break
+
+            chunk.append(payload)
+            self._pending_offset = self._file.tell()
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def commit(self):
+        """Lưu offset đã xử lý xong"""
+        self._offset = self._pending_offset
+        self.offset_path.write_text(str(self._offset))
+
+    def finish(self):
+        """Xóa segment sau khi đã replay toàn bộ"""
+        if self.truncated:
+            logger.warning(
+                "Spool segment ended with a partial record",
+                extra={"extra": {"path": str(self.path), "offset": self._offset}}
+            )
+        self.path.unlink(missing_ok=True)
+        self.offset_path.unlink(missing_ok=True)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.utils import timezone
+from .bulk import bulk_update_links
 from .models import Link
+from .search import search_links
 
 
 @admin.register(Link)
@@ -35,6 +36,15 @@ class LinkAdmin(admin.ModelAdmin):
 
     actions = ['activate_links', 'deactivate_links', 'soft_delete_links', 'restore_links']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Tìm qua search index thay vì LIKE trên 4 cột (kèm join users)"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if '@' in search_term:
+            return queryset.filter(owner__email=search_term), False
+        return search_links(queryset, search_term), False
+
     def short_url_display(self, obj):
         """Hiển thị short URL có thể click"""
         url = f"/r/{obj.short_code}"
@@ -65,20 +75,21 @@ class LinkAdmin(admin.ModelAdmin):
 
     @admin.action(description='Activate selected links')
     def activate_links(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = bulk_update_links(queryset, 'activate')
         self.message_user(request, f'{updated} links activated.')
 
     @admin.action(description='Deactivate selected links')
     def deactivate_links(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = bulk_update_links(queryset, 'deactivate')
         self.message_user(request, f'{updated} links deactivated.')
 
     @admin.action(description='Soft delete selected links')
     def soft_delete_links(self, request, queryset):
-        updated = queryset.update(deleted_at=timezone.now())
+        updated = bulk_update_links(queryset, 'delete')
         self.message_user(request, f'{updated} links soft deleted.')
 
     @admin.action(description='Restore selected links')
     def restore_links(self, request, queryset):
-        updated = queryset.update(deleted_at=None)
-        self.message_user(request, f'{updated} links restored.')
\ No newline at end of file
+        updated = bulk_update_links(queryset, 'restore')
+        self.message_user(request, f'{updated} links restored.')
+
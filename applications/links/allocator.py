@@ -0,0 +1,195 @@
+"""
+Short code allocator
+- Sequence chung trong Redis, mỗi process giữ trước một block (INCRBY)
+- Số thứ tự -> short code qua hoán vị Feistel có khóa trên không gian base62
+  (bijective nên không trùng, không đoán được code kế tiếp)
+- Mỗi độ dài chỉ dùng tới TIER_FILL của không gian rồi tự chuyển sang độ dài kế tiếp
+"""
+import hashlib
+import os
+import string
+import threading
+
+from django.conf import settings
+
+from applications.common.redis_client import get_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("code_allocator")
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+
+SEQUENCE_KEY = "link_codes:seq"
+BLOCK_SIZE = 100
+
+START_LENGTH = 7
+MAX_LENGTH = 12
+TIER_FILL = 0.9
+FEISTEL_ROUNDS = 4
+
+# Số link gần nhất dùng để dựng lại sequence khi key Redis bị mất
+RESEED_SAMPLE = 1000
+
+
+def encode_base62(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, BASE)
+        chars.append(ALPHABET[rem])
+    return ''.join(reversed(chars))
+
+
+def decode_base62(code: str) -> int:
+    value = 0
+    for char in code:
+        value = value * BASE + ALPHABET.index(char)
+    return value
+
+
+class FeistelPermutation:
+    """
+    Hoán vị có khóa trên [0, domain)
+    Feistel cân bằng trên 2 * half_bits bit, cycle-walking để quay về domain
+    """
+
+    def __init__(self, domain: int, key: bytes, rounds: int = FEISTEL_ROUNDS):
+        self.domain = domain
+        self.rounds = rounds
+        self.half_bits = ((domain - 1).bit_length() + 1) // 2
+        self.mask = (1 << self.half_bits) - 1
+        self.keys = [
+            hashlib.blake2b(key + bytes([i]) + str(domain).encode(), digest_size=16).digest()
+            for i in range(rounds)
+        ]
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hashlib.blake2b(value.to_bytes(8, 'big'), key=self.keys[i], digest_size=8).digest()
+        return int.from_bytes(digest, 'big') & self.mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.mask
+        for i in range(self.rounds):
+            left, right = right, left ^ self._round(i, right)
+        return (left << self.half_bits) | right
+
+    def _decrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.mask
+        for i in reversed(range(self.rounds)):
+            left, right = right ^ self._round(i, left), left
+        return (left << self.half_bits) | right
+
+    def permute(self, value: int) -> int:
+        value = self._encrypt(value)
+        while value >= self.domain:
+            value = self._encrypt(value)
+        return value
+
+    def invert(self, value: int) -> int:
+        value = self._decrypt(value)
+        while value >= self.domain:
+            value = self._decrypt(value)
+        return value
+
+
+class ShortCodeAllocator:
+    """
+    Usage:
+        allocator = ShortCodeAllocator()
+        code = allocator.allocate()
+    """
+
+    def __init__(self, key: bytes = None, start_length: int = START_LENGTH,
+                 max_length: int = MAX_LENGTH, block_size: int = BLOCK_SIZE):
+        self.key = key
+        self.block_size = block_size
+        self.tiers = []
+        self._lengths = range(start_length, max_length + 1)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = 0
+        self._end = 0
+
+    def _tier_list(self) -> list:
+        """[(length, capacity, permutation)], dựng lazily vì cần settings"""
+        if not self.tiers:
+            key = self.key or settings.SHORT_CODE_KEY.encode()
+            self.tiers = [
+                (length, int(BASE ** length * TIER_FILL), FeistelPermutation(BASE ** length, key))
+                for length in self._lengths
+            ]
+        return self.tiers
+
+    def allocate(self) -> str:
+        """Short code tiếp theo (không cần query DB)"""
+        return self.encode(self._next_sequence())
+
+    def allocate_many(self, count: int) -> list:
+        """count short codes từ một lần INCRBY (bulk create)"""
+        if count <= 0:
+            return []
+        end = self._reserve(count)
+        return [self.encode(sequence) for sequence in range(end - count, end)]
+
+    def encode(self, sequence: int) -> str:
+        for length, capacity, permutation in self._tier_list():
+            if sequence < capacity:
+                return encode_base62(permutation.permute(sequence), length)
+            sequence -= capacity
+        raise ValueError("Short code space exhausted")
+
+    def decode(self, code: str):
+        """Sequence của một code do allocator sinh ra, None nếu không thể là code sinh ra"""
+        if not code or any(char not in ALPHABET for char in code):
+            return None
+
+        offset = 0
+        for length, capacity, permutation in self._tier_list():
+            if len(code) == length:
+                sequence = permutation.invert(decode_base62(code))
+                return offset + sequence if sequence < capacity else None
+            offset += capacity
+        return None
+
+    def _next_sequence(self) -> int:
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid or self._next >= self._end:
+                self._end = self._reserve(self.block_size)
+                self._next = self._end - self.block_size
+                self._pid = pid
+
+            sequence = self._next
+            self._next += 1
+            return sequence
+
+    def _reserve(self, count: int) -> int:
+        """INCRBY count sequence, trả về cuối khoảng (exclusive)"""
+        redis = get_redis()
+        end = redis.incrby(SEQUENCE_KEY, count)
+
+        if end == count:
+            # Key vừa được tạo: lần chạy đầu tiên hoặc Redis bị mất dữ liệu
+            floor = self._reseed_floor()
+            if floor:
+                end = redis.incrby(SEQUENCE_KEY, floor)
+                logger.warning(
+                    "Short code sequence reseeded",
+                    extra={"extra": {"floor": floor, "sequence": end}}
+                )
+        return end
+
+    def _reseed_floor(self) -> int:
+        """Sequence lớn nhất decode được từ các link gần nhất"""
+        from .models import Link
+
+        codes = Link.objects.order_by('-id').values_list('short_code', flat=True)[:RESEED_SAMPLE]
+        sequences = [seq for seq in (self.decode(code) for code in codes) if seq is not None]
+        return max(sequences) + 1 if sequences else 0
+
+
+code_allocator = ShortCodeAllocator()
+
+
+def allocate_short_code() -> str:
+    return code_allocator.allocate()
@@ -0,0 +1,92 @@
+"""
+ASGI fast path cho /r/<code>
+Xử lý redirect trực tiếp ở tầng ASGI, không đi qua Django middleware/URL resolver.
+Cache/DB lookup giống hệt AsyncRedirectView (aget_link_data).
+Mọi path khác được chuyển cho Django application.
+"""
+from django.utils.encoding import iri_to_uri
+
+from .cache import aget_link_data
+from .models import is_valid_short_code
+from .redirect import dispatch_click
+from applications.common.logger import get_logger
+
+logger = get_logger("redirect")
+
+PREFIX = '/r/'
+CONTENT_TYPE = (b'content-type', b'text/html; charset=utf-8')
+
+
+class RedirectFastPath:
+    """
+    Usage (shorter/asgi.py):
+        application = RedirectFastPath(get_asgi_application())
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') \
+                and scope['path'].startswith(PREFIX):
+            code = scope['path'][len(PREFIX):]
+            if is_valid_short_code(code):
+                await self._redirect(scope, send, code)
+                return
+
+        await self.app(scope, receive, send)
+
+    async def _redirect(self, scope, send, code):
+        link_data = await aget_link_data(code)
+
+        if link_data is None:
+            logger.info(
+                "Link not found",
+                extra={"extra": {"short_code": code}}
+            )
+            await self._respond(scope, send, 404, body=b'Link not found')
+            return
+
+        if not link_data['is_accessible']:
+            reason = link_data.get('reason', 'Link is not available')
+            logger.info(
+                "Link not accessible",
+                extra={"extra": {"short_code": code, "reason": reason}}
+            )
+            await self._respond(scope, send, 410, body=reason.encode())
+            return
+
+        dispatch_click(link_data['id'], code, *self._click_info(scope), owner_id=link_data.get('owner_id'))
+
+        location = iri_to_uri(link_data['original_url']).encode('latin-1')
+        await self._respond(scope, send, 301, headers=[(b'location', location)])
+
+    async def _respond(self, scope, send, status, body=b'', headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                CONTENT_TYPE,
+                (b'content-length', str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'' if scope['method'] == 'HEAD' else body,
+        })
+
+    def _click_info(self, scope) -> tuple:
+        """(ip_address, user_agent, referer) từ ASGI scope, giống get_click_info"""
+        headers = {}
+        for name, value in scope.get('headers', []):
+            headers[name.decode('latin-1')] = value.decode('latin-1')
+
+        x_forwarded_for = headers.get('x-forwarded-for')
+        if x_forwarded_for:
+            ip_address = x_forwarded_for.split(',')[0].strip()
+        else:
+            client = scope.get('client')
+            ip_address = client[0] if client else ''
+
+        return ip_address, headers.get('user-agent', ''), headers.get('referer', '')
@@ -0,0 +1,241 @@
+"""
+Tạo và cập nhật links theo batch
+- Short codes cấp một lần (một INCRBY) cho cả batch
+- INSERT bằng bulk_create theo chunk
+- Bloom filter + Redis cache được ghi bằng pipeline, search tokens bằng bulk_create
+- Activate/deactivate/delete/restore: UPDATE theo chunk (chỉ các hàng đã khóa),
+  ghi lại cache một pipeline mỗi chunk
+"""
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from .allocator import code_allocator
+from .cache import register_codes, prime_link_cache, refresh_link_cache
+from .models import Link, is_short_code_conflict, compute_url_hash
+from .owner_stats import apply_deltas, link_contribution, diff_contribution
+from .search import index_links
+from applications.common.logger import get_logger
+
+logger = get_logger("links.bulk")
+
+BULK_CHUNK = 500
+# Giới hạn số tham số cho IN (...)
+LOOKUP_CHUNK = 1000
+
+CODE_TAKEN_ERROR = {'short_code': ["This short code is already taken."]}
+
+# action -> (điều kiện của link cần thay đổi, giá trị mới)
+BULK_ACTIONS = {
+    'activate': ({'is_active': False}, lambda: {'is_active': True}),
+    'deactivate': ({'is_active': True}, lambda: {'is_active': False}),
+    'delete': ({'deleted_at__isnull': True}, lambda: {'deleted_at': timezone.now()}),
+    'restore': ({'deleted_at__isnull': False}, lambda: {'deleted_at': None}),
+}
+
+
+def bulk_create_links(owner, items: list, prime_cache: bool = True) -> list:
+    """
+    Tạo nhiều links cho owner
+
+    Args:
+        items: validated_data của LinkCreateSerializer
+        prime_cache: ghi sẵn Redis cache (tắt khi import hàng triệu links)
+
+    Returns:
+        List cùng thứ tự với items: Link đã tạo hoặc dict lỗi
+    """
+    results = [None] * len(items)
+    url_hashes = [compute_url_hash(item['original_url']) for item in items]
+
+    # reuse_existing: một IN query trên index (owner, url_hash)
+    reusable = _reusable_links(owner, [
+        url_hash for item, url_hash in zip(items, url_hashes)
+        if item.get('reuse_existing') and not item.get('short_code')
+    ])
+
+    # Custom codes: trùng trong request hoặc đã tồn tại -> lỗi của item đó
+    taken = _existing_codes([item['short_code'] for item in items if item.get('short_code')])
+    seen = set()
+    accepted = []
+    for index, data in enumerate(items):
+        existing = reusable.get(url_hashes[index]) if data.get('reuse_existing') else None
+        if existing is not None and not data.get('short_code'):
+            existing.reused = True
+            results[index] = existing
+            continue
+
+        code = data.get('short_code')
+        if code:
+            if code in taken or code in seen:
+                results[index] = CODE_TAKEN_ERROR
+                continue
+            seen.add(code)
+        accepted.append(index)
+
+    generated = iter(code_allocator.allocate_many(
+        sum(1 for index in accepted if not items[index].get('short_code'))
+    ))
+
+    links = []
+    for index in accepted:
+        data = dict(items[index])
+        data.pop('reuse_existing', None)
+        code = data.pop('short_code', None) or next(generated)
+        links.append((index, Link(owner=owner, short_code=code, url_hash=url_hashes[index], **data)))
+
+    # Bloom trước INSERT (giống Link.save)
+    register_codes([link.short_code for _, link in links])
+
+    created = []
+    inserted = []
+    for start in range(0, len(links), BULK_CHUNK):
+        chunk = links[start:start + BULK_CHUNK]
+        try:
+            with transaction.atomic():
+                Link.objects.bulk_create([link for _, link in chunk])
+        except IntegrityError as e:
+            if not is_short_code_conflict(e):
+                raise
+            # Hiếm: code trùng với link vừa được tạo song song -> từng link một
+            _create_one_by_one(chunk, items, results)
+            created.extend(link for _, link in chunk if link.pk)
+            continue
+
+        for index, link in chunk:
+            results[index] = link
+        created.extend(link for _, link in chunk)
+        inserted.extend(link for _, link in chunk)
+
+    _fill_missing_pks(inserted)
+    # Link.save (nhánh từng link một) đã tự index và cập nhật stats
+    index_links(inserted, replace=False)
+    apply_deltas(_stats_deltas(inserted))
+
+    if prime_cache:
+        transaction.on_commit(lambda: prime_link_cache(created))
+
+    logger.info(
+        "Links bulk created",
+        extra={
+            "extra": {
+                "owner_id": owner.id,
+                "requested": len(items),
+                "created": len(created),
+            }
+        }
+    )
+
+    return results
+
+
+def bulk_update_links(queryset, action: str) -> int:
+    """
+    Áp dụng action cho các links trong queryset
+
+    Mỗi chunk: khóa (SELECT ... FOR UPDATE) các link vẫn thỏa điều kiện, UPDATE đúng
+    các link đó, delta stats của owners tính từ chính các hàng đã khóa;
+    sau commit ghi lại cache các code trong một pipeline + một broadcast
+
+    Returns:
+        Số links đã thay đổi
+    """
+    condition, make_values = BULK_ACTIONS[action]
+    values = dict(make_values(), updated_at=timezone.now())
+
+    ids = list(queryset.filter(**condition).order_by('id').values_list('id', flat=True))
+
+    updated = 0
+    for start in range(0, len(ids), BULK_CHUNK):
+        with transaction.atomic():
+            # Điều kiện lặp lại: bỏ qua link đã bị request khác thay đổi / xóa
+            rows = list(
+                Link.objects.select_for_update()
+                .filter(id__in=ids[start:start + BULK_CHUNK], **condition)
+                .order_by('id')
+                .values_list('id', 'short_code', 'owner_id', 'is_active', 'deleted_at', 'click_count')
+            )
+            if not rows:
+                continue
+            updated += Link.objects.filter(id__in=[row[0] for row in rows]).update(**values)
+            apply_deltas(_update_deltas(rows, values))
+
+            codes = [row[1] for row in rows]
+            transaction.on_commit(lambda codes=codes: refresh_link_cache(codes))
+
+    logger.info(
+        "Links bulk updated",
+        extra={"extra": {"action": action, "updated": updated}}
+    )
+    return updated
+
+
+def _update_deltas(rows: list, values: dict) -> dict:
+    deltas = {}
+    for _, _, owner_id, is_active, deleted_at, click_count in rows:
+        before = link_contribution(is_active, deleted_at is not None, click_count)
+        after = link_contribution(
+            values.get('is_active', is_active),
+            values.get('deleted_at', deleted_at) is not None,
+            click_count,
+        )
+        owner_delta = deltas.setdefault(owner_id, {})
+        for field, value in diff_contribution(before, after).items():
+            owner_delta[field] = owner_delta.get(field, 0) + value
+    return deltas
+
+
+def _reusable_links(owner, url_hashes: list) -> dict:
+    """{url_hash: link đang active cũ nhất} của owner"""
+    reusable = {}
+    for start in range(0, len(url_hashes), LOOKUP_CHUNK):
+        links = Link.objects.filter(
+            owner=owner, url_hash__in=url_hashes[start:start + LOOKUP_CHUNK]
+        ).active().order_by('-id')
+        for link in links:
+            reusable[link.url_hash] = link
+    return reusable
+
+
+def _stats_deltas(links: list) -> dict:
+    deltas = {}
+    for link in links:
+        owner_delta = deltas.setdefault(link.owner_id, {})
+        for field, value in link_contribution(link.is_active, link.is_deleted, link.click_count).items():
+            owner_delta[field] = owner_delta.get(field, 0) + value
+    return deltas
+
+
+def _existing_codes(codes: list) -> set:
+    taken = set()
+    for start in range(0, len(codes), LOOKUP_CHUNK):
+        taken.update(Link.objects.filter(
+            short_code__in=codes[start:start + LOOKUP_CHUNK]
+        ).values_list('short_code', flat=True))
+    return taken
+
+
+def _create_one_by_one(chunk: list, items: list, results: list):
+    for index, link in chunk:
+        if not items[index].get('short_code'):
+            # Link.save cấp lại code nếu trùng
+            link.short_code = ''
+        try:
+            link.save()
+        except IntegrityError as e:
+            if not is_short_code_conflict(e):
+                raise
+            results[index] = CODE_TAKEN_ERROR
+            continue
+        results[index] = link
+
+
+def _fill_missing_pks(links: list):
+    """MySQL không trả về id sau bulk_create -> lấy theo short_code"""
+    missing = [link for link in links if link.pk is None]
+    for start in range(0, len(missing), LOOKUP_CHUNK):
+        chunk = missing[start:start + LOOKUP_CHUNK]
+        ids = dict(Link.objects.filter(
+            short_code__in=[link.short_code for link in chunk]
+        ).values_list('short_code', 'id'))
+        for link in chunk:
+            link.pk = ids.get(link.short_code)
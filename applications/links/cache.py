@@ -0,0 +1,855 @@
+"""
+Link cache cho redirect path
+Bloom filter -> L1 (in-process) -> L2 (Redis hash link:{code}) -> MySQL
+
+Invalidation được broadcast qua Redis pub/sub để mọi worker
+xóa entry L1 cũ ngay lập tức.
+Code không tồn tại được cache âm (negative cache) với TTL ngắn.
+Cache miss đi qua single-flight: mỗi code chỉ một request query MySQL.
+
+Entry Redis có hai mốc hết hạn:
+- soft (field 'soft'): quá mốc này vẫn trả về giá trị cũ và refresh nền một lần
+  (stale-while-revalidate); refresh sớm ngẫu nhiên kiểu XFetch để các key
+  ghi cùng lúc không cùng hết hạn
+- hard (TTL của key): entry không ai đọc tự biến mất
+Đọc chỉ là một lệnh (không EXPIRE mỗi lần hit).
+
+Format entry theo settings.LINK_CACHE_ENCODING:
+- 'hash': Redis hash nhiều field (mặc định)
+- 'packed': một string nhị phân (applications/common/packed.py), ít bộ nhớ hơn
+Đọc luôn chấp nhận cả hai format nên có thể chuyển đổi khi đang chạy.
+
+Entry mang expires_at, kiểm tra mỗi lần đọc (cả L1) nên link hết hạn
+không bao giờ được redirect dù entry còn trong cache. Sorted set
+link_cache:expiries giữ các mốc hết hạn sắp tới, sweeper định kỳ ghi lại
+entry của các link đã hết hạn (xem sweep_expired_links).
+
+Mỗi entry ghi owner và generation của owner (owner_gen:{owner_id} trong Redis,
+mirror trong process). Bump generation (bump_owner_generation) làm mọi entry
+của owner thành stale trong O(1), không cần xóa từng key.
+Generation phải được chốt trước khi đọc MySQL: owner chưa biết trước khi load
+nên loader đọc epoch (tăng cùng mọi lần bump) trước, sau khi load epoch đổi ->
+không ghi cache vì dữ liệu có thể đọc trước commit của lần bump.
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from applications.common.bloom import BloomFilter
+from applications.common.local_cache import LocalCache, MISSING
+from applications.common.metrics import incr, get_counters, register_gauge
+from applications.common.packed import PackedEntryCodec, CodecError
+from applications.common.redis_client import (
+    RedisClient, get_redis, get_async_redis, hset_with_ttl, ahset_with_ttl,
+    get_hash_or_string, aget_hash_or_string,
+)
+from applications.common.singleflight import SingleFlight
+from applications.common.logger import get_logger
+
+logger = get_logger("link_cache")
+
+# Redis cache TTL (hard): expires_at được kiểm tra khi đọc nên TTL có thể dài
+CACHE_TTL = 2 * 86400
+
+# Soft expiry: sau mốc này entry được refresh nền, jitter ±10%
+SOFT_TTL = 600
+SOFT_TTL_JITTER = 0.1
+
+# XFetch: refresh sớm với xác suất tăng dần theo delta (thời gian load) * beta
+XFETCH_BETA = 1.0
+
+# Lease Redis cho refresh nền: một process refresh mỗi code
+REFRESH_LEASE_MS = 5000
+REFRESH_WORKERS = 2
+
+# L1 cache: TTL ngắn để giới hạn độ stale khi mất kết nối pub/sub
+L1_MAXSIZE = 10000
+L1_TTL = 30
+
+# Negative cache cho code không tồn tại
+NEGATIVE_TTL = 60
+L1_NEGATIVE_TTL = 10
+
+# Bloom filter của toàn bộ short_code (~12MB với 10M codes, 1% false positive)
+BLOOM_KEY = "link_codes:bloom"
+BLOOM_CAPACITY = 10_000_000
+BLOOM_ERROR_RATE = 0.01
+
+INVALIDATION_CHANNEL = "link_cache:invalidate"
+
+# Sorted set short_code -> expires_at (unix ts) của các entry đang cache
+EXPIRY_KEY = "link_cache:expiries"
+SWEEP_BATCH = 500
+
+# Chỉ xóa member nếu mốc vẫn đã qua (link có thể vừa được gia hạn)
+ZREM_IF_DUE_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV - 1 do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) <= tonumber(ARGV[#ARGV]) then
+        removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+# Generation theo owner: Redis là nguồn, mirror trong process cập nhật qua pub/sub
+OWNER_GEN_KEY = "owner_gen:{owner_id}"
+OWNER_GEN_EPOCH_KEY = "owner_gen:epoch"
+OWNER_GEN_MAXSIZE = 100_000
+OWNER_GEN_TTL = 60
+
+# Sentinel cho negative entry trong L1, marker trong Redis
+NOT_FOUND = object()
+NEGATIVE_MAPPING = {'missing': '1'}
+
+# Enum reason cho packed encoding (index 0 = không có reason)
+REASONS = ('', 'Link has been deleted', 'Link is disabled', 'Link has expired', 'Link owner is disabled')
+_codec = PackedEntryCodec(REASONS)
+
+_l1 = LocalCache(maxsize=L1_MAXSIZE, ttl=L1_TTL)
+_owner_gens = LocalCache(maxsize=OWNER_GEN_MAXSIZE, ttl=OWNER_GEN_TTL)
+_flight = SingleFlight("link_cache")
+link_bloom = BloomFilter(BLOOM_KEY, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE)
+register_gauge("link_cache.l1.size", lambda: len(_l1))
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+_refresher = None
+_refresher_pid = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+# Tăng mỗi khi nhận invalidation, tránh ghi lại entry cũ vào L1
+# khi invalidation đến giữa lúc đang đọc Redis/MySQL
+_invalidation_seq = 0
+
+
+def cache_key(code: str) -> str:
+    return f"link:{code}"
+
+
+def owner_gen_key(owner_id: int) -> str:
+    return OWNER_GEN_KEY.format(owner_id=owner_id)
+
+
+def bump_owner_generation(owner_id: int) -> int:
+    """
+    Vô hiệu toàn bộ entry cache của owner (vd user bị khóa)
+    Một INCR + một PUBLISH, không phụ thuộc số links
+    """
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.incr(owner_gen_key(owner_id))
+    pipe.incr(OWNER_GEN_EPOCH_KEY)
+    generation = pipe.execute()[0]
+    _owner_gens.set(str(owner_id), generation)
+    get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"owner_gen": {str(owner_id): generation}}))
+
+    logger.info(
+        "Owner cache generation bumped",
+        extra={"extra": {"owner_id": owner_id, "generation": generation}}
+    )
+    return generation
+
+
+def _fetch_generations(owner_ids) -> dict:
+    """Generation hiện tại của các owners (một MGET), cập nhật mirror"""
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return {}
+    values = get_redis().mget([owner_gen_key(owner_id) for owner_id in owner_ids])
+    generations = {owner_id: int(value or 0) for owner_id, value in zip(owner_ids, values)}
+    for owner_id, generation in generations.items():
+        _owner_gens.set(str(owner_id), generation)
+    return generations
+
+
+def _current_generation(owner_id: int) -> int:
+    generation = _owner_gens.get(str(owner_id))
+    if generation is MISSING:
+        generation = _fetch_generations([owner_id])[owner_id]
+    return generation
+
+
+async def _acurrent_generation(owner_id: int) -> int:
+    generation = _owner_gens.get(str(owner_id))
+    if generation is MISSING:
+        generation = int(await get_async_redis().get(owner_gen_key(owner_id)) or 0)
+        _owner_gens.set(str(owner_id), generation)
+    return generation
+
+
+def _generation_epoch() -> int:
+    """Epoch đọc trước khi load MySQL (xem _generation_since)"""
+    return int(get_redis().get(OWNER_GEN_EPOCH_KEY) or 0)
+
+
+async def _ageneration_epoch() -> int:
+    return int(await get_async_redis().get(OWNER_GEN_EPOCH_KEY) or 0)
+
+
+def _generation_since(owner_id: int, epoch: int) -> int | None:
+    """
+    Generation của owner, hợp lệ cho dữ liệu load sau thời điểm đọc epoch
+
+    Epoch không đổi -> không owner nào bị bump trong lúc load, generation đọc
+    bây giờ bằng generation trước khi load. Epoch đổi -> None (không ghi cache).
+    """
+    generation, current = get_redis().mget(owner_gen_key(owner_id), OWNER_GEN_EPOCH_KEY)
+    return _checked_generation(owner_id, generation, current, epoch)
+
+
+async def _ageneration_since(owner_id: int, epoch: int) -> int | None:
+    generation, current = await get_async_redis().mget(owner_gen_key(owner_id), OWNER_GEN_EPOCH_KEY)
+    return _checked_generation(owner_id, generation, current, epoch)
+
+
+def _checked_generation(owner_id: int, generation, current, epoch: int) -> int | None:
+    if int(current or 0) != epoch:
+        incr("link_cache.generation.race")
+        return None
+    generation = int(generation or 0)
+    _owner_gens.set(str(owner_id), generation)
+    return generation
+
+
+def _is_stale(cached: dict, generation: int) -> bool:
+    """Entry không có owner (format cũ) hoặc generation cũ hơn -> stale"""
+    if not cached.get('owner'):
+        return True
+    return int(cached.get('gen') or 0) != generation
+
+
+def get_link_data(code: str) -> dict | None:
+    """
+    Lấy link data theo thứ tự L1 -> Bloom filter -> Redis -> MySQL
+    """
+    found, link_data, seq = _lookup_local(code)
+    if found:
+        return link_data
+
+    cached = _read_entry(code)
+
+    found, link_data = _from_redis(code, cached, seq)
+    if found:
+        return link_data
+
+    return _flight.do(
+        code,
+        lambda: _load_and_store(code, seq),
+        lambda: _peek(code, _read_entry(code), seq),
+    )
+
+
+def _load_and_store(code: str, seq: int) -> dict | None:
+    started = time.monotonic()
+    epoch = _generation_epoch()
+    link_data = load_link_data(code)
+    if link_data is None:
+        incr("link_cache.db.miss")
+        set_negative(code)
+        _set_l1(code, NOT_FOUND, seq, ttl=L1_NEGATIVE_TTL)
+        return None
+
+    incr("link_cache.db.hit")
+    generation = _generation_since(link_data['owner_id'], epoch)
+    if generation is None:
+        return link_data
+    set_link_data(code, link_data, generation, delta=time.monotonic() - started)
+    _set_l1(code, link_data, seq)
+    return link_data
+
+
+async def aget_link_data(code: str) -> dict | None:
+    """
+    Bản async của get_link_data (redis.asyncio + async ORM)
+    """
+    found, link_data, seq = _lookup_local(code)
+    if found:
+        return link_data
+
+    cached = await _aread_entry(code)
+
+    found, link_data = _from_redis(code, cached, seq)
+    if found:
+        return link_data
+
+    async def peek():
+        return _peek(code, await _aread_entry(code), seq)
+
+    return await _flight.ado(code, lambda: _aload_and_store(code, seq), peek)
+
+
+async def _aload_and_store(code: str, seq: int) -> dict | None:
+    started = time.monotonic()
+    epoch = await _ageneration_epoch()
+    link_data = await aload_link_data(code)
+    if link_data is None:
+        incr("link_cache.db.miss")
+        await _astore_mapping(code, NEGATIVE_MAPPING, NEGATIVE_TTL)
+        _set_l1(code, NOT_FOUND, seq, ttl=L1_NEGATIVE_TTL)
+        return None
+
+    incr("link_cache.db.hit")
+    generation = await _ageneration_since(link_data['owner_id'], epoch)
+    if generation is None:
+        return link_data
+    link_data['gen'] = generation
+    mapping = _to_mapping(link_data, delta=time.monotonic() - started)
+    await _astore_mapping(code, mapping, CACHE_TTL)
+    if _expiry_score(link_data) is not None:
+        await get_async_redis().zadd(EXPIRY_KEY, {code: _expiry_score(link_data)})
+    _set_l1(code, link_data, seq)
+    return link_data
+
+
+def _lookup_local(code: str):
+    """
+    Kiểm tra L1 và Bloom filter (không cần network)
+
+    Returns:
+        (found, link_data, seq)
+    """
+    _ensure_listener()
+
+    link_data = _l1.get(code)
+    if link_data is NOT_FOUND:
+        incr("link_cache.l1.hit")
+        return True, None, None
+    if link_data is not MISSING:
+        generation = _owner_gens.get(str(link_data['owner_id']))
+        if generation == link_data['gen']:
+            incr("link_cache.l1.hit")
+            return True, _check_expiry(link_data), None
+        # Mirror hết TTL không có nghĩa là entry stale, chỉ cần đọc lại Redis
+        if generation is not MISSING:
+            incr("link_cache.generation.stale")
+        _l1.delete(code)
+    incr("link_cache.l1.miss")
+    seq = _invalidation_seq
+
+    if not link_bloom.might_contain(code):
+        incr("link_cache.bloom.reject")
+        _set_l1(code, NOT_FOUND, seq, ttl=L1_NEGATIVE_TTL)
+        return True, None, seq
+
+    return False, None, seq
+
+
+def _from_redis(code: str, cached: dict, seq: int):
+    """
+    Decode hash đọc từ Redis
+
+    Returns:
+        (found, link_data) - found=False nghĩa là cache miss
+    """
+    if cached.get('missing'):
+        incr("link_cache.redis.negative_hit")
+    elif cached:
+        incr("link_cache.redis.hit")
+        if _should_refresh(cached):
+            _schedule_refresh(code)
+    else:
+        incr("link_cache.redis.miss")
+        logger.debug(
+            "Cache miss",
+            extra={"extra": {"short_code": code}}
+        )
+    return _peek(code, cached, seq)
+
+
+def _peek(code: str, cached: dict, seq: int):
+    """Decode hash, không đếm hit/miss (dùng khi chờ leader của single-flight)"""
+    if cached.get('missing'):
+        _set_l1(code, NOT_FOUND, seq, ttl=L1_NEGATIVE_TTL)
+        return True, None
+
+    if cached:
+        link_data = {
+            'id': int(cached['id']),
+            'original_url': cached['original_url'],
+            'is_accessible': cached['is_accessible'] == 'True',
+            'reason': cached.get('reason', ''),
+            'expires_at': float(cached['expires_at']) if cached.get('expires_at') else None,
+            'owner_id': int(cached['owner']),
+            'gen': int(cached['gen']),
+        }
+        _set_l1(code, link_data, seq)
+        return True, _check_expiry(link_data)
+
+    return False, None
+
+
+def _check_expiry(link_data: dict) -> dict:
+    """Link hết hạn sau khi được cache -> trả về bản 'gone' (không sửa entry L1)"""
+    expires_at = link_data.get('expires_at')
+    if link_data['is_accessible'] and expires_at is not None and expires_at <= time.time():
+        return {**link_data, 'is_accessible': False, 'reason': 'Link has expired'}
+    return link_data
+
+
+def _to_mapping(link_data: dict, delta: float = 0.0) -> dict:
+    """Encode link data thành Redis hash (kèm soft expiry và thời gian load)"""
+    soft_ttl = SOFT_TTL * random.uniform(1 - SOFT_TTL_JITTER, 1 + SOFT_TTL_JITTER)
+    return {
+        'id': str(link_data['id']),
+        'original_url': link_data['original_url'],
+        'is_accessible': str(link_data['is_accessible']),
+        'reason': link_data.get('reason', ''),
+        'expires_at': '' if link_data.get('expires_at') is None else str(link_data['expires_at']),
+        'owner': str(link_data['owner_id']),
+        'gen': str(link_data.get('gen', 0)),
+        'soft': f"{time.time() + soft_ttl:.3f}",
+        'delta': f"{delta:.4f}",
+    }
+
+
+def _should_refresh(cached: dict) -> bool:
+    """
+    XFetch: now - delta * beta * ln(rand) >= soft
+    Entry cũ không có 'soft' -> refresh ngay để ghi lại theo format mới
+    """
+    soft = float(cached.get('soft', 0))
+    delta = float(cached.get('delta', 0))
+    return time.time() - delta * XFETCH_BETA * math.log(1.0 - random.random()) >= soft
+
+
+def _schedule_refresh(code: str):
+    """Refresh nền, không chặn request (mỗi code một lần trong process)"""
+    global _refresher, _refresher_pid
+
+    with _refresh_lock:
+        if code in _refreshing:
+            return
+        pid = os.getpid()
+        if _refresher_pid != pid:
+            # Thread pool không sống qua fork
+            _refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="link-cache-refresh")
+            _refresher_pid = pid
+            _refreshing.clear()
+        _refreshing.add(code)
+
+    incr("link_cache.refresh.scheduled")
+    _refresher.submit(_refresh_in_background, code)
+
+
+def _refresh_in_background(code: str):
+    try:
+        lease = get_redis().set(f"link_cache:refresh:{code}", 1, nx=True, px=REFRESH_LEASE_MS)
+        if not lease:
+            return
+        close_old_connections()
+        _reload(code)
+    except Exception as e:
+        logger.warning(f"Link cache refresh failed: {e}", extra={"extra": {"short_code": code}})
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(code)
+        close_old_connections()
+
+
+def _reload(code: str):
+    """Load lại từ MySQL và ghi đè entry Redis"""
+    started = time.monotonic()
+    epoch = _generation_epoch()
+    link_data = load_link_data(code)
+    if link_data is None:
+        set_negative(code)
+    else:
+        generation = _generation_since(link_data['owner_id'], epoch)
+        if generation is not None:
+            set_link_data(code, link_data, generation, delta=time.monotonic() - started)
+    incr("link_cache.refresh.done")
+
+
+def _set_l1(code: str, link_data, seq: int, ttl: float = None):
+    if seq == _invalidation_seq:
+        _l1.set(code, link_data, ttl=ttl)
+
+
+def load_link_data(code: str) -> dict | None:
+    """Query MySQL và build link data"""
+    from .models import Link
+
+    try:
+        link = Link.objects.select_related('owner').get(short_code=code)
+    except Link.DoesNotExist:
+        return None
+
+    return build_link_data(link)
+
+
+async def aload_link_data(code: str) -> dict | None:
+    """Bản async của load_link_data"""
+    return await sync_to_async(_load_link_data_fresh)(code)
+
+
+def _load_link_data_fresh(code: str) -> dict | None:
+    # ASGI fast path không đi qua request_started/finished của Django,
+    # nên tự dọn connection hết hạn (CONN_MAX_AGE) trước khi query
+    close_old_connections()
+    return load_link_data(code)
+
+
+def build_link_data(link) -> dict:
+    """Build dict được cache từ Link instance (cần owner đã load)"""
+    is_accessible = link.is_accessible and link.owner.is_active
+    reason = ''
+
+    if not is_accessible:
+        if link.is_deleted:
+            reason = 'Link has been deleted'
+        elif not link.is_active:
+            reason = 'Link is disabled'
+        elif link.is_expired:
+            reason = 'Link has expired'
+        else:
+            reason = 'Link owner is disabled'
+
+    return {
+        'id': link.id,
+        'original_url': link.original_url,
+        'is_accessible': is_accessible,
+        'reason': reason,
+        'expires_at': link.expires_at.timestamp() if link.expires_at else None,
+        'owner_id': link.owner_id,
+    }
+
+
+def _expiry_score(link_data: dict):
+    """Mốc cần sweep: chỉ link đang truy cập được và có expires_at"""
+    if link_data['is_accessible'] and link_data.get('expires_at') is not None:
+        return link_data['expires_at']
+    return None
+
+
+def _packed() -> bool:
+    return settings.LINK_CACHE_ENCODING == 'packed'
+
+
+def _decode_entry(code: str, value) -> dict:
+    """Hash -> mapping như cũ; string -> decode packed (lỗi decode coi như miss)"""
+    if isinstance(value, dict):
+        return value
+    try:
+        return _codec.decode(value)
+    except (CodecError, UnicodeDecodeError) as e:
+        incr("link_cache.redis.decode_error")
+        logger.warning(f"Invalid packed cache entry: {e}", extra={"extra": {"short_code": code}})
+        return {}
+
+
+def _read_entry(code: str) -> dict:
+    """Entry trong Redis, entry có generation cũ coi như miss"""
+    cached = _decode_entry(code, get_hash_or_string(cache_key(code)))
+    if cached and not cached.get('missing'):
+        generation = _current_generation(int(cached.get('owner') or 0))
+        if _is_stale(cached, generation):
+            incr("link_cache.generation.stale")
+            return {}
+    return cached
+
+
+async def _aread_entry(code: str) -> dict:
+    cached = _decode_entry(code, await aget_hash_or_string(cache_key(code)))
+    if cached and not cached.get('missing'):
+        generation = await _acurrent_generation(int(cached.get('owner') or 0))
+        if _is_stale(cached, generation):
+            incr("link_cache.generation.stale")
+            return {}
+    return cached
+
+
+def _store_mapping(code: str, mapping: dict, ttl: int):
+    if _packed():
+        get_redis().set(cache_key(code), _codec.encode(mapping), ex=ttl)
+    else:
+        hset_with_ttl(cache_key(code), mapping, ttl)
+
+
+async def _astore_mapping(code: str, mapping: dict, ttl: int):
+    if _packed():
+        await get_async_redis().set(cache_key(code), _codec.encode(mapping), ex=ttl)
+    else:
+        await ahset_with_ttl(cache_key(code), mapping, ttl)
+
+
+def _pipe_store(pipe, code: str, mapping: dict, ttl: int):
+    key = cache_key(code)
+    if _packed():
+        # SET ghi đè cả hash cũ
+        pipe.set(key, _codec.encode(mapping), ex=ttl)
+    else:
+        # DEL trước: xóa negative entry / string packed cũ
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ttl)
+
+
+def set_link_data(code: str, link_data: dict, generation: int, delta: float = 0.0):
+    """
+    Ghi link data vào Redis (HSET + EXPIRE atomically), kèm generation của owner
+    generation phải được chốt trước khi đọc link_data từ MySQL
+    """
+    link_data['gen'] = generation
+    _store_mapping(code, _to_mapping(link_data, delta), CACHE_TTL)
+    if _expiry_score(link_data) is not None:
+        get_redis().zadd(EXPIRY_KEY, {code: _expiry_score(link_data)})
+
+
+def set_negative(code: str):
+    """Cache âm cho code không tồn tại"""
+    _store_mapping(code, NEGATIVE_MAPPING, NEGATIVE_TTL)
+
+
+def register_code(short_code: str):
+    """
+    Thêm code mới vào Bloom filter và broadcast cho mirror của các worker
+    Gọi trước khi INSERT để không có khoảng thời gian filter trả về 404 sai
+    """
+    register_codes([short_code])
+
+
+def register_codes(codes: list):
+    """Bản batch của register_code: SETBIT + PUBLISH trong một pipeline"""
+    if not codes:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    link_bloom.add(codes, pipeline=pipe)
+    pipe.publish(INVALIDATION_CHANNEL, json.dumps({"bloom": list(codes)}))
+    pipe.execute()
+
+
+def prime_link_cache(links: list):
+    """
+    Ghi link data của các link vừa tạo/cập nhật vào Redis (một pipeline)
+    DEL trước để xóa negative entry / field cũ, broadcast để worker khác bỏ entry L1
+    """
+    if not links:
+        return
+
+    codes = [link.short_code for link in links]
+    _drop_local(codes)
+
+    generations = _fetch_generations({link.owner_id for link in links})
+
+    pipe = get_redis().pipeline(transaction=False)
+    for link in links:
+        _pipe_link(pipe, link, generations[link.owner_id])
+    pipe.publish(INVALIDATION_CHANNEL, json.dumps({"codes": codes}))
+    pipe.execute()
+
+
+def warm_links(links: list) -> int:
+    """
+    Ghi entry cho các links chưa có trong Redis (warm-up sau flush/failover)
+    Không ghi đè entry đang có (có thể mới hơn), không broadcast: L1 không bị ảnh hưởng
+
+    Returns:
+        Số entry đã ghi
+    """
+    if not links:
+        return 0
+
+    redis = get_redis()
+    pipe = redis.pipeline(transaction=False)
+    for link in links:
+        pipe.exists(cache_key(link.short_code))
+    missing = [link for link, exists in zip(links, pipe.execute()) if not exists]
+    if not missing:
+        return 0
+
+    generations = _fetch_generations({link.owner_id for link in missing})
+    pipe = redis.pipeline(transaction=False)
+    for link in missing:
+        _pipe_link(pipe, link, generations[link.owner_id])
+    pipe.execute()
+    return len(missing)
+
+
+def _pipe_link(pipe, link, generation: int):
+    link_data = build_link_data(link)
+    link_data['gen'] = generation
+    _pipe_store(pipe, link.short_code, _to_mapping(link_data), CACHE_TTL)
+    if _expiry_score(link_data) is not None:
+        pipe.zadd(EXPIRY_KEY, {link.short_code: _expiry_score(link_data)})
+
+
+def refresh_link_cache(codes: list):
+    """
+    Write-through sau update: đọc lại từ MySQL (một query) rồi ghi đè cache
+    Đọc lại thay vì dùng instance trong memory: hai update commit gần nhau
+    luôn để lại trạng thái mới nhất
+    """
+    from .models import Link
+
+    if not codes:
+        return
+    links = list(Link.objects.select_related('owner').filter(short_code__in=codes))
+    prime_link_cache(links)
+
+    missing = set(codes) - {link.short_code for link in links}
+    if missing:
+        invalidate_link_caches(missing)
+
+
+def sweep_expired_links(now: float = None) -> int:
+    """
+    Ghi lại entry của các link đã tới expires_at (đọc lại từ MySQL theo batch)
+    và broadcast để các worker bỏ entry L1
+
+    Returns:
+        Số codes đã xử lý
+    """
+    redis = get_redis()
+    now = time.time() if now is None else now
+    zrem_if_due = RedisClient.get_script("link_cache_zrem_if_due", ZREM_IF_DUE_SCRIPT)
+
+    swept = 0
+    while True:
+        codes = redis.zrangebyscore(EXPIRY_KEY, '-inf', now, start=0, num=SWEEP_BATCH)
+        if not codes:
+            break
+        refresh_link_cache(codes)
+        zrem_if_due(keys=[EXPIRY_KEY], args=[*codes, now])
+        swept += len(codes)
+
+    if swept:
+        logger.info(
+            "Expired links swept from cache",
+            extra={"extra": {"codes": swept}}
+        )
+    return swept
+
+
+def invalidate_link_cache(short_code: str):
+    """
+    Xóa cache của link (gọi khi link được cập nhật)
+    Xóa L1 local ngay, sau đó broadcast cho các worker khác
+    """
+    invalidate_link_caches([short_code])
+
+    logger.info(
+        "Link cache invalidated",
+        extra={"extra": {"short_code": short_code}}
+    )
+
+
+def invalidate_link_caches(codes: list):
+    """Bản batch: một DEL nhiều key + một PUBLISH trong một pipeline"""
+    if not codes:
+        return
+    codes = list(codes)
+    _drop_local(codes)
+
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.delete(*[cache_key(code) for code in codes])
+    pipe.publish(INVALIDATION_CHANNEL, json.dumps({"codes": codes}))
+    pipe.execute()
+
+
+def rebuild_bloom() -> int:
+    """Build lại Bloom filter từ toàn bộ short_code trong MySQL"""
+    from .models import Link
+
+    started_at = timezone.now()
+    codes = Link.objects.values_list('short_code', flat=True).iterator(chunk_size=10000)
+    count = link_bloom.rebuild(codes)
+
+    # Code được tạo trong lúc rebuild có thể đã ghi vào bitmap cũ
+    recent = list(
+        Link.objects.filter(created_at__gte=started_at - timedelta(minutes=1))
+        .values_list('short_code', flat=True)
+    )
+    if recent:
+        link_bloom.add(recent)
+
+    get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"bloom_reload": True}))
+    return count
+
+
+def publish_invalidation(codes: list):
+    """Broadcast danh sách short code cần xóa khỏi L1"""
+    get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"codes": list(codes)}))
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters theo từng tier của process hiện tại"""
+    return get_counters("link_cache.")
+
+
+def _ensure_listener():
+    """Start thread lắng nghe invalidation (một lần cho mỗi process)"""
+    global _listener_pid
+
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        # Sau fork, L1 kế thừa từ master có thể đã cũ
+        _l1.clear()
+        thread = threading.Thread(
+            target=_listen_invalidations,
+            name="link-cache-invalidation",
+            daemon=True,
+        )
+        thread.start()
+        _listener_pid = pid
+
+
+def _listen_invalidations():
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Load mirror sau khi đã subscribe: code thêm sau thời điểm này
+            # sẽ nằm trong hàng đợi message và được áp dụng sau khi load
+            link_bloom.load()
+            for message in pubsub.listen():
+                _handle_invalidation(message['data'])
+        except Exception as e:
+            # Có thể đã bỏ lỡ message trong lúc mất kết nối -> xóa toàn bộ L1
+            # và tắt Bloom filter cho đến khi load lại
+            link_bloom.unload()
+            _drop_local([])
+            _l1.clear()
+            _owner_gens.clear()
+            logger.warning(f"Link cache invalidation listener error: {e}")
+            time.sleep(1)
+
+
+def _handle_invalidation(data: str):
+    try:
+        payload = json.loads(data)
+    except (TypeError, ValueError):
+        return
+
+    if payload.get("bloom"):
+        link_bloom.add_local(payload["bloom"])
+    if payload.get("bloom_reload"):
+        link_bloom.load()
+    for owner_id, generation in payload.get("owner_gen", {}).items():
+        _owner_gens.set(owner_id, generation)
+    _drop_local(payload.get("codes", []))
+
+
+def _drop_local(codes):
+    global _invalidation_seq
+
+    _invalidation_seq += 1
+    for code in codes:
+        _l1.delete(code)
@@ -0,0 +1,15 @@
+from .models import SHORT_CODE_PATTERN
+
+
+class ShortCodeConverter:
+    """
+    Path converter cho short code
+    Code sai độ dài/ký tự bị reject ở tầng URL routing, không chạm cache/DB
+    """
+    regex = SHORT_CODE_PATTERN
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -0,0 +1,200 @@
+"""
+Write-behind click counters
+- Redirect path: HINCRBY link_clicks:pending <link_id> 1 (cùng pipeline với XADD)
+- Flusher định kỳ: RENAME pending -> flushing (kèm batch id), áp dụng delta vào
+  Link.click_count bằng một UPDATE ... CASE cho mỗi chunk (theo thứ tự link id);
+  chunk được ghi vào click_flush_chunks trong cùng transaction nên crash giữa
+  commit và HDEL không làm cộng chunk đó lần hai
+- API đọc giá trị live = click_count + delta chưa flush
+- Flush cũng cộng clicks vào stats của owner (owner_stats.py)
+- Song song: HINCRBY owner_clicks:pending <owner_id> 1 để stats của owner
+  cũng thấy clicks chưa flush (get_owner_pending_clicks)
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Case, When, F, Value
+
+from applications.common.redis_client import RedisClient, get_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("link_counters")
+
+PENDING_KEY = "link_clicks:pending"
+FLUSHING_KEY = "link_clicks:flushing"
+FLUSH_LOCK_KEY = "link_clicks:flush_lock"
+FLUSH_LOCK_TTL = 300
+FLUSH_CHUNK = 1000
+
+FLUSH_BATCH_KEY = "link_clicks:flush_batch"
+
+OWNER_PENDING_KEY = "owner_clicks:pending"
+OWNER_FLUSHING_KEY = "owner_clicks:flushing"
+
+# pending -> flushing cho cả hai hash trong một bước (không lệch nhau), kèm batch id
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('RENAME', KEYS[3], KEYS[4])
+end
+redis.call('SET', KEYS[5], ARGV[1])
+return 1
+"""
+
+# Chỉ xóa lock nếu vẫn là của mình (flush chạy quá FLUSH_LOCK_TTL -> worker khác đã lấy lock)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def incr_pending(pipe, link_id, amount: int = 1, owner_id=None):
+    """Thêm HINCRBY vào pipeline của redirect path (owner_id lấy từ cache entry)"""
+    pipe.hincrby(PENDING_KEY, str(link_id), amount)
+    if owner_id:
+        pipe.hincrby(OWNER_PENDING_KEY, str(owner_id), amount)
+
+
+def get_pending_clicks(link_ids) -> dict:
+    """
+    Delta chưa flush của các link
+
+    Returns:
+        {link_id: pending_clicks}, rỗng nếu Redis không khả dụng
+    """
+    link_ids = [int(link_id) for link_id in link_ids]
+    if not link_ids:
+        return {}
+
+    fields = [str(link_id) for link_id in link_ids]
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hmget(PENDING_KEY, fields)
+        pipe.hmget(FLUSHING_KEY, fields)
+        pending, flushing = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read pending click counters: {e}")
+        return {}
+
+    result = {}
+    for link_id, a, b in zip(link_ids, pending, flushing):
+        total = int(a or 0) + int(b or 0)
+        if total:
+            result[link_id] = total
+    return result
+
+
+def get_owner_pending_clicks(owner_id: int) -> int:
+    """Clicks chưa flush trên các links của owner, 0 nếu Redis không khả dụng"""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hget(OWNER_PENDING_KEY, str(owner_id))
+        pipe.hget(OWNER_FLUSHING_KEY, str(owner_id))
+        pending, flushing = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read pending owner clicks: {e}")
+        return 0
+    return int(pending or 0) + int(flushing or 0)
+
+
+def acquire_flush_lock() -> str | None:
+    """
+    Lock của bước flush (swap pending -> flushing và áp dụng delta)
+    Reconcile owner stats cũng giữ lock này để không chạy xen giữa một flush
+
+    Returns:
+        token để release, None nếu lock đang bị giữ
+    """
+    token = uuid.uuid4().hex
+    if get_redis().set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TTL):
+        return token
+    return None
+
+
+def release_flush_lock(token: str):
+    release = RedisClient.get_script("click_counters_release", RELEASE_LOCK_SCRIPT)
+    release(keys=[FLUSH_LOCK_KEY], args=[token])
+
+
+def flush_click_counters() -> int:
+    """
+    Áp dụng delta từ Redis vào Link.click_count
+
+    Returns:
+        Số links đã cập nhật
+    """
+    from .models import Link, ClickFlushChunk
+    from .owner_stats import apply_deltas, click_deltas
+
+    redis = get_redis()
+
+    token = acquire_flush_lock()
+    if token is None:
+        return 0
+
+    try:
+        # Lần flush trước có thể bị dừng giữa chừng -> xử lý nốt flushing trước
+        if redis.exists(FLUSHING_KEY):
+            batch = redis.get(FLUSH_BATCH_KEY) or uuid.uuid4().hex
+            redis.set(FLUSH_BATCH_KEY, batch)
+        else:
+            batch = uuid.uuid4().hex
+            rotate = RedisClient.get_script("click_counters_rotate", ROTATE_SCRIPT)
+            if not rotate(keys=[PENDING_KEY, FLUSHING_KEY, OWNER_PENDING_KEY, OWNER_FLUSHING_KEY, FLUSH_BATCH_KEY],
+                          args=[batch]):
+                # Không có pending key
+                return 0
+
+        deltas = {
+            int(link_id): int(count)
+            for link_id, count in redis.hgetall(FLUSHING_KEY).items()
+            if int(count)
+        }
+
+        # Theo thứ tự link id: chunk đã HDEL không còn trong hash nên phần còn lại
+        # sau crash được chia lại thành đúng các chunk cũ (định danh bằng link id đầu)
+        items = sorted(deltas.items())
+        for start in range(0, len(items), FLUSH_CHUNK):
+            chunk = items[start:start + FLUSH_CHUNK]
+
+            with transaction.atomic():
+                owner_deltas = click_deltas(dict(chunk))
+                _, created = ClickFlushChunk.objects.get_or_create(batch=batch, first_link_id=chunk[0][0])
+                if created:
+                    apply_deltas(owner_deltas)
+                    Link.objects.filter(id__in=[link_id for link_id, _ in chunk]).update(
+                        click_count=Case(
+                            *[When(id=link_id, then=F('click_count') + Value(delta))
+                              for link_id, delta in chunk],
+                            default=F('click_count'),
+                            output_field=Link._meta.get_field('click_count'),
+                        )
+                    )
+
+            # Xóa sau khi commit; chunk đã commit trước crash chỉ còn bước này
+            # Clicks đã vào owner_stats -> trừ khỏi pending của owner
+            pipe = redis.pipeline(transaction=False)
+            pipe.hdel(FLUSHING_KEY, *[str(link_id) for link_id, _ in chunk])
+            for owner_id, delta in owner_deltas.items():
+                pipe.hincrby(OWNER_FLUSHING_KEY, str(owner_id), -delta['total_clicks'])
+            pipe.execute()
+
+        # Phần còn lại (link đã xóa, click không có owner_id) không vào stats
+        redis.delete(FLUSHING_KEY, OWNER_FLUSHING_KEY, FLUSH_BATCH_KEY)
+        # Batch cũ đã xong hoàn toàn, chỉ giữ marker của batch vừa flush
+        ClickFlushChunk.objects.exclude(batch=batch).delete()
+
+        if items:
+            logger.info(
+                "Click counters flushed",
+                extra={"extra": {"links": len(items), "clicks": sum(deltas.values())}}
+            )
+        return len(items)
+
+    finally:
+        release_flush_lock(token)
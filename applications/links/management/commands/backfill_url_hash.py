@@ -0,0 +1,47 @@
+"""
+Điền url_hash cho các links tạo trước khi có cột này
+Chạy theo chunk id tăng dần, có thể dừng/chạy lại bất kỳ lúc nào
+
+    python manage.py backfill_url_hash --chunk 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from applications.links.models import Link, compute_url_hash
+
+
+class Command(BaseCommand):
+    help = 'Populate Link.url_hash for existing rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        last_id = 0
+        updated = 0
+
+        while True:
+            rows = list(
+                Link.objects.filter(id__gt=last_id, url_hash='')
+                .order_by('id')
+                .values_list('id', 'original_url')[:options['chunk']]
+            )
+            if not rows:
+                break
+
+            with transaction.atomic():
+                Link.objects.bulk_update(
+                    [Link(id=link_id, url_hash=compute_url_hash(url)) for link_id, url in rows],
+                    ['url_hash'],
+                )
+
+            last_id = rows[-1][0]
+            updated += len(rows)
+            self.stdout.write(f'{updated} links updated (last id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'url_hash backfilled for {updated} links ({time.monotonic() - start:.1f}s)'
+        ))
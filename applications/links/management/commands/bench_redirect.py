@@ -0,0 +1,94 @@
+"""
+Benchmark redirect path: RedirectView (sync, thread pool) vs AsyncRedirectView (asyncio)
+
+    python manage.py bench_redirect --requests 5000 --concurrency 200
+    python manage.py bench_redirect --cold   # bỏ qua L1, đo Redis round trip
+"""
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, AsyncRequestFactory
+
+from applications.links import cache
+from applications.links.models import Link
+from applications.links.redirect import RedirectView, AsyncRedirectView
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync vs async redirect views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--code', help='Short code to request (default: first active link)')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--cold', action='store_true', help='Clear L1 before every request')
+        parser.add_argument('--record-clicks', action='store_true', help='Do not stub click recording')
+
+    def handle(self, *args, **options):
+        code = options['code'] or Link.objects.active().values_list('short_code', flat=True).first()
+        if not code:
+            raise CommandError('No active link to benchmark, pass --code')
+
+        with ExitStack() as stack:
+            if not options['record_clicks']:
+                stack.enter_context(mock.patch('applications.links.redirect.record_click'))
+                stack.enter_context(mock.patch('applications.links.redirect.dispatch_click'))
+
+            results = [
+                ('sync', self._bench_sync(code, options)),
+                ('async', asyncio.run(self._bench_async(code, options))),
+            ]
+
+        self.stdout.write(f"code={code} requests={options['requests']} "
+                          f"concurrency={options['concurrency']} cold={options['cold']}")
+        self.stdout.write(f"{'mode':<6} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'status':>8}")
+        for mode, (elapsed, latencies, statuses) in results:
+            latencies.sort()
+            self.stdout.write(
+                f"{mode:<6} {len(latencies) / elapsed:>10.0f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} "
+                f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>8.2f} "
+                f"{','.join(str(s) for s in sorted(statuses)):>8}"
+            )
+
+    def _bench_sync(self, code, options):
+        view = RedirectView.as_view()
+        factory = RequestFactory()
+        statuses = set()
+
+        def one(_):
+            if options['cold']:
+                cache._l1.clear()
+            start = time.perf_counter()
+            response = view(factory.get(f'/r/{code}'), code=code)
+            statuses.add(response.status_code)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = list(pool.map(one, range(options['requests'])))
+        return time.perf_counter() - start, latencies, statuses
+
+    async def _bench_async(self, code, options):
+        view = AsyncRedirectView.as_view()
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        statuses = set()
+
+        async def one():
+            async with semaphore:
+                if options['cold']:
+                    cache._l1.clear()
+                start = time.perf_counter()
+                response = await view(factory.get(f'/r/{code}'), code=code)
+                statuses.add(response.status_code)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(options['requests'])))
+        return time.perf_counter() - start, list(latencies), statuses
@@ -0,0 +1,290 @@
+"""
+Import links từ file dump (CSV hoặc JSONL) của shortener khác
+
+    python manage.py import_links links.csv --owner admin@example.com
+    python manage.py import_links links.jsonl --owner 1 --workers 8 --chunk 2000
+    python manage.py import_links links.csv --owner 1 --restart   # bỏ qua checkpoint
+
+- Đọc file theo record (CSV: field trong dấu nháy có thể chứa xuống dòng),
+  bộ nhớ giới hạn bởi chunk * số chunk đang xử lý
+- Validate/normalize URL trong process pool
+- Giữ custom code nếu hợp lệ và chưa bị dùng, ngược lại cấp code mới
+  và ghi cặp (code cũ, code mới) vào --remap
+- Mỗi chunk: bulk_create và checkpoint (byte offset, luôn ở ranh giới record)
+  trong cùng một transaction (row LinkImport) -> crash không làm import trùng
+- Worker được spawn/forkserver (mặc định từ Python 3.14) không thừa hưởng
+  app registry nên mỗi worker tự django.setup() khi khởi động
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from datetime import timezone as dt_timezone
+from urllib.parse import urlsplit, urlunsplit
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import URLValidator
+from django.db import transaction, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from applications.accounts.models import User
+from applications.links.bulk import bulk_create_links, CODE_TAKEN_ERROR
+from applications.links.models import Link, LinkImport, is_valid_short_code
+
+URL_FIELDS = ('original_url', 'url', 'long_url', 'target')
+CODE_FIELDS = ('short_code', 'code', 'slug')
+URL_MAX_LENGTH = Link._meta.get_field('original_url').max_length
+TITLE_MAX_LENGTH = Link._meta.get_field('title').max_length
+
+PROGRESS_INTERVAL = 5.0
+
+STATE_FIELDS = ('offset', 'rows', 'created', 'rejected', 'remapped')
+
+_url_validator = URLValidator(schemes=['http', 'https'])
+
+
+def _first(row: dict, names: tuple) -> str:
+    for name in names:
+        value = row.get(name)
+        if value:
+            return str(value).strip()
+    return ''
+
+
+def normalize_url(url: str) -> str:
+    """Thêm scheme nếu thiếu, lowercase scheme + host, validate"""
+    if '://' not in url:
+        url = f'http://{url}'
+    parts = urlsplit(url)
+    url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/',
+                      parts.query, parts.fragment))
+    if len(url) > URL_MAX_LENGTH:
+        raise ValidationError('URL is too long')
+    _url_validator(url)
+    return url
+
+
+def clean_rows(rows: list) -> list:
+    """
+    Chạy trong worker process: [(line_no, row)] -> [(line_no, data | None, error)]
+    """
+    results = []
+    for line_no, row in rows:
+        try:
+            url = _first(row, URL_FIELDS)
+            if not url:
+                raise ValidationError('Missing URL')
+            data = {'original_url': normalize_url(url)}
+
+            code = _first(row, CODE_FIELDS)
+            if code and is_valid_short_code(code):
+                data['short_code'] = code
+            elif code:
+                # Code cũ không hợp lệ -> cấp code mới, vẫn ghi vào remap
+                data['legacy_code'] = code
+
+            title = (row.get('title') or '').strip()
+            if title:
+                data['title'] = title[:TITLE_MAX_LENGTH]
+
+            expires_at = (row.get('expires_at') or '').strip()
+            if expires_at:
+                parsed = parse_datetime(expires_at)
+                if parsed is None:
+                    raise ValidationError('Invalid expires_at')
+                if timezone.is_naive(parsed):
+                    parsed = parsed.replace(tzinfo=dt_timezone.utc)
+                data['expires_at'] = parsed
+
+            results.append((line_no, data, None))
+        except (ValidationError, ValueError) as e:
+            message = e.messages[0] if isinstance(e, ValidationError) else str(e)
+            results.append((line_no, None, str(message)))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Stream-import links from a CSV or JSONL dump'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help='Owner email or id')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from file extension')
+        parser.add_argument('--chunk', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--checkpoint', help='Checkpoint name (default: absolute path of the file)')
+        parser.add_argument('--restart', action='store_true', help='Ignore existing checkpoint')
+        parser.add_argument('--errors', help='Write rejected rows (JSONL) to this file')
+        parser.add_argument('--remap', help='Write reassigned codes (CSV old,new) to this file')
+
+    def handle(self, *args, **options):
+        self.owner = self._get_owner(options['owner'])
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.progress = self._get_progress(options['checkpoint'] or os.path.abspath(path), options['restart'])
+
+        state = {field: getattr(self.progress, field) for field in STATE_FIELDS}
+        if state['offset']:
+            self.stdout.write(f"Resuming at byte {state['offset']} ({state['rows']} rows done)")
+
+        errors_file = open(options['errors'], 'a') if options['errors'] else None
+        remap_file = open(options['remap'], 'a', newline='') if options['remap'] else None
+        self.remap_writer = csv.writer(remap_file) if remap_file else None
+
+        started = last_report = time.monotonic()
+        start_rows = state['rows']
+        max_in_flight = options['workers'] * 2
+
+        # Worker process không dùng DB, không để chúng thừa hưởng connection đang mở
+        connections.close_all()
+
+        try:
+            # Worker import module này (và models) khi nhận task đầu tiên,
+            # initializer chạy trước đó nên đúng với mọi start method
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+                in_flight = deque()
+                chunks = self._read_chunks(path, fmt, state['offset'], options['chunk'])
+
+                for rows, end_offset in chunks:
+                    in_flight.append((pool.submit(clean_rows, rows), end_offset))
+                    # Giới hạn số chunk đang xử lý -> bộ nhớ không tăng theo kích thước file
+                    if len(in_flight) >= max_in_flight:
+                        self._write_chunk(*in_flight.popleft(), state, errors_file)
+
+                    now = time.monotonic()
+                    if now - last_report >= PROGRESS_INTERVAL:
+                        self._report(state, state['rows'] - start_rows, now - started)
+                        last_report = now
+
+                while in_flight:
+                    self._write_chunk(*in_flight.popleft(), state, errors_file)
+        finally:
+            if errors_file:
+                errors_file.close()
+            if remap_file:
+                remap_file.close()
+
+        self._report(state, state['rows'] - start_rows, time.monotonic() - started)
+        self.stdout.write(self.style.SUCCESS('Import completed'))
+
+    def _get_owner(self, value):
+        lookup = {'pk': value} if value.isdigit() else {'email': value}
+        try:
+            return User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f'Owner not found: {value}')
+
+    def _get_progress(self, name: str, restart: bool) -> LinkImport:
+        key = hashlib.blake2b(f'{self.owner.pk}:{name}'.encode(), digest_size=16).hexdigest()
+        progress, _ = LinkImport.objects.get_or_create(key=key, defaults={'owner': self.owner, 'name': name})
+        if restart:
+            for field in STATE_FIELDS:
+                setattr(progress, field, 0)
+            progress.save()
+        return progress
+
+    def _read_chunks(self, path, fmt, offset, size):
+        """Yield ([(line_no, row)], byte offset sau chunk)"""
+        with open(path, 'rb') as raw:
+            # newline='' để csv tự xử lý xuống dòng trong field
+            # readline (không dùng next(f)) để f.tell() vẫn dùng được
+            f = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+            records = self._csv_records(f, offset) if fmt == 'csv' else self._jsonl_records(f, offset)
+
+            rows = []
+            for line_no, row in records:
+                rows.append((line_no, row))
+                if len(rows) >= size:
+                    # Generator dừng ngay sau record cuối -> tell() là ranh giới record
+                    yield rows, f.tell()
+                    rows = []
+
+            if rows:
+                yield rows, f.tell()
+
+    def _csv_records(self, f, offset):
+        """Yield (dòng đầu của record, tính từ offset, row)"""
+        reader = csv.reader(iter(f.readline, ''))
+        header = next(reader, None)
+        if not header:
+            return
+        header = [name.strip().lower() for name in header]
+        if offset > f.tell():
+            f.seek(offset)
+
+        base = reader.line_num
+        while True:
+            line_no = reader.line_num - base + 1
+            values = next(reader, None)
+            if values is None:
+                return
+            if any(value.strip() for value in values):
+                yield line_no, dict(zip(header, values))
+
+    def _jsonl_records(self, f, offset):
+        f.seek(offset)
+        for line_no, line in enumerate(iter(f.readline, ''), start=1):
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = {}
+            yield line_no, row if isinstance(row, dict) else {}
+
+    def _write_chunk(self, future, end_offset, state, errors_file):
+        cleaned = future.result()
+        valid = [data for _, data, error in cleaned if error is None]
+        legacy_codes = [data.pop('legacy_code', None) for data in valid]
+
+        for line_no, _, error in cleaned:
+            if error is not None and errors_file:
+                errors_file.write(json.dumps({'line': line_no, 'offset': state['offset'], 'error': error}) + '\n')
+
+        with transaction.atomic():
+            results = bulk_create_links(self.owner, valid, prime_cache=False)
+
+            # Custom code đã bị dùng -> cấp code mới
+            retry = [index for index, result in enumerate(results) if result is CODE_TAKEN_ERROR]
+            if retry:
+                items = [{k: v for k, v in valid[i].items() if k != 'short_code'} for i in retry]
+                for index, result in zip(retry, bulk_create_links(self.owner, items, prime_cache=False)):
+                    legacy_codes[index] = valid[index]['short_code']
+                    results[index] = result
+
+            # Mọi code bị thay (trùng hoặc không hợp lệ) đều vào remap
+            remapped = [
+                (legacy_code, result.short_code)
+                for legacy_code, result in zip(legacy_codes, results)
+                if legacy_code and isinstance(result, Link)
+            ]
+            created = sum(1 for result in results if isinstance(result, Link))
+            chunk_state = {
+                'rows': state['rows'] + len(cleaned),
+                'created': state['created'] + created,
+                'rejected': state['rejected'] + len(cleaned) - created,
+                'remapped': state['remapped'] + len(remapped),
+                'offset': end_offset,
+            }
+            # Checkpoint commit cùng links: chunk đã commit không bao giờ bị import lại
+            LinkImport.objects.filter(pk=self.progress.pk).update(**chunk_state)
+
+        state.update(chunk_state)
+        if self.remap_writer:
+            self.remap_writer.writerows(remapped)
+
+    def _report(self, state, rows, elapsed):
+        rate = rows / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            f"rows={state['rows']} created={state['created']} rejected={state['rejected']} "
+            f"remapped={state['remapped']} {rate:,.0f} rows/s"
+        )
@@ -0,0 +1,25 @@
+"""
+Build lại Bloom filter của short codes
+Chạy một lần khi deploy, sau đó filter được cập nhật từ Link.save
+
+    python manage.py rebuild_link_bloom
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.links.cache import rebuild_bloom, link_bloom
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Bloom filter of all short codes in Redis'
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        count = rebuild_bloom()
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Bloom filter rebuilt: {count} codes, '
+            f'{link_bloom.size} bits, {link_bloom.hash_count} hashes ({elapsed:.1f}s)'
+        ))
@@ -0,0 +1,44 @@
+"""
+Dựng lại search tokens cho toàn bộ links (lần đầu, hoặc khi đổi quy tắc tokenize)
+
+    python manage.py rebuild_search_index --chunk 2000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from applications.links.models import Link
+from applications.links.search import index_links
+
+
+class Command(BaseCommand):
+    help = 'Rebuild link search tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        last_id = 0
+        indexed = 0
+
+        while True:
+            links = list(
+                Link.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'owner_id', 'title', 'original_url')[:options['chunk']]
+            )
+            if not links:
+                break
+
+            with transaction.atomic():
+                index_links(links)
+
+            last_id = links[-1].id
+            indexed += len(links)
+            self.stdout.write(f'{indexed} links indexed (last id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt for {indexed} links ({time.monotonic() - start:.1f}s)'
+        ))
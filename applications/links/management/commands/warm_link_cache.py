@@ -0,0 +1,54 @@
+"""
+Nạp sẵn Redis cache cho các links nhiều traffic nhất (sau Redis flush / failover)
+Link đã có entry trong cache được giữ nguyên
+
+    python manage.py warm_link_cache --limit 50000 --rate 5000 --budget 120
+    python manage.py warm_link_cache --source click_count
+"""
+from django.core.management.base import BaseCommand
+
+from applications.links.warmup import (
+    warm_link_cache, SOURCES, WARMUP_LIMIT, WARMUP_CHUNK, WARMUP_RATE, WARMUP_BUDGET, WARMUP_DAYS,
+)
+
+
+class Command(BaseCommand):
+    help = 'Preload the redirect cache with the most clicked links'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=WARMUP_LIMIT)
+        parser.add_argument('--source', choices=SOURCES, default='stats',
+                            help='stats: clicks trong --days ngày gần nhất (MongoDB), '
+                                 'click_count: tổng clicks trong MySQL')
+        parser.add_argument('--days', type=int, default=WARMUP_DAYS)
+        parser.add_argument('--chunk', type=int, default=WARMUP_CHUNK)
+        parser.add_argument('--rate', type=float, default=WARMUP_RATE,
+                            help='Số links tối đa đọc từ MySQL mỗi giây (0 = không giới hạn)')
+        parser.add_argument('--budget', type=float, default=WARMUP_BUDGET,
+                            help='Thời gian tối đa (giây)')
+
+    def handle(self, *args, **options):
+        stats = warm_link_cache(
+            limit=options['limit'],
+            source=options['source'],
+            days=options['days'],
+            chunk=options['chunk'],
+            rate=options['rate'],
+            budget=options['budget'],
+            progress=self._progress,
+        )
+
+        message = (
+            f"{stats['written']} entries written, {stats['loaded']}/{stats['selected']} links loaded "
+            f"({stats['elapsed']:.1f}s, {stats['keys_per_second']:.0f} keys/s)"
+        )
+        if stats['completed']:
+            self.stdout.write(self.style.SUCCESS(f'Link cache warmed: {message}'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Time budget exceeded: {message}'))
+
+    def _progress(self, stats):
+        self.stdout.write(
+            f"{stats['loaded']}/{stats['selected']} links loaded, "
+            f"{stats['written']} written ({stats['keys_per_second']:.0f} keys/s)"
+        )
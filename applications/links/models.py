@@ -1,17 +1,51 @@
-import string
-import random
-from django.db import models
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+from django.db import models, transaction, IntegrityError
 from django.utils import timezone
 from applications.accounts.models import User
 
+# Short code hợp lệ: chữ, số, '-', '_' (4-20 ký tự)
+SHORT_CODE_MIN_LENGTH = 4
+SHORT_CODE_MAX_LENGTH = 20
+SHORT_CODE_PATTERN = r'[A-Za-z0-9_-]{%d,%d}' % (SHORT_CODE_MIN_LENGTH, SHORT_CODE_MAX_LENGTH)
+SHORT_CODE_RE = re.compile(SHORT_CODE_PATTERN)
 
-def generate_short_code(length=7):
-    """Tạo short code ngẫu nhiên"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choices(chars, k=length))
+# Code sinh tự động có thể trùng custom code / code cũ -> cấp code khác
+MAX_CODE_ATTEMPTS = 5
 
+# Fields ảnh hưởng tới link data được cache cho redirect (cache.build_link_data)
+CACHED_FIELDS = {'original_url', 'is_active', 'deleted_at', 'expires_at'}
 
 
+def is_valid_short_code(code: str) -> bool:
+    """Kiểm tra cú pháp short code (không cần I/O)"""
+    return SHORT_CODE_RE.fullmatch(code) is not None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Dạng chuẩn của URL để so trùng:
+    lowercase scheme + host, bỏ port mặc định, path rỗng -> '/'
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {'http': ':80', 'https': ':443'}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+
+
+def compute_url_hash(url: str) -> str:
+    """Hash cố định 32 ký tự hex của canonical URL"""
+    return hashlib.blake2b(canonicalize_url(url).encode(), digest_size=16).hexdigest()
+
+
+def is_short_code_conflict(exc: IntegrityError) -> bool:
+    """IntegrityError do trùng unique index short_code"""
+    return 'short_code' in str(exc)
+
 
 class LinkQuerySet(models.QuerySet):
     """Custom QuerySet với các query thường dùng"""
@@ -43,6 +77,10 @@ class LinkQuerySet(models.QuerySet):
         """Lấy các link đã soft delete"""
         return self.filter(deleted_at__isnull=False)
 
+    def with_url(self, url: str):
+        """Links trỏ tới cùng canonical URL (lookup theo index (owner, url_hash))"""
+        return self.filter(url_hash=compute_url_hash(url))
+
 
 class Link(models.Model):
     """Model lưu trữ short links"""
@@ -58,11 +96,18 @@ class Link(models.Model):
         verbose_name='Original URL'
     )
     short_code = models.CharField(
-        max_length=20,
+        max_length=SHORT_CODE_MAX_LENGTH,
         unique=True,
         db_index=True,
         verbose_name='Short Code'
     )
+    url_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='URL Hash'
+    )
     title = models.CharField(
         max_length=255,
         blank=True,
@@ -108,24 +153,96 @@ class Link(models.Model):
         indexes = [
             models.Index(fields=['owner', 'is_active']),
             models.Index(fields=['owner', 'deleted_at']),
+            models.Index(fields=['owner', 'url_hash']),
+            # Keyset pagination (LinkPagination): owner + deleted_at IS NULL, rồi (field, id)
+            models.Index(fields=['owner', 'deleted_at', 'created_at', 'id']),
+            models.Index(fields=['owner', 'deleted_at', 'click_count', 'id']),
+            models.Index(fields=['owner', 'deleted_at', 'expires_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.short_code} -> {self.original_url[:50]}"
 
     def save(self, *args, **kwargs):
-        """Tự động tạo short_code nếu chưa có"""
-        if not self.short_code:
-            self.short_code = self._generate_unique_code()
-        super().save(*args, **kwargs)
-
-    def _generate_unique_code(self):
-        """Tạo short code unique"""
-        for _ in range(10):  # Thử tối đa 10 lần
-            code = generate_short_code()
-            if not Link.objects.filter(short_code=code).exists():
-                return code
-        raise ValueError("Could not generate unique short code")
+        """
+        Tự động cấp short_code nếu chưa có
+        Cập nhật url_hash và search tokens theo original_url/title
+        Ghi cache redirect sau commit khi tạo mới hoặc field được cache thay đổi
+        """
+        from .allocator import allocate_short_code
+        from .cache import register_code, prime_link_cache, refresh_link_cache
+        from .search import index_links
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'original_url' in update_fields:
+            self.url_hash = compute_url_hash(self.original_url)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'url_hash'}
+
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            if update_fields is None or {'title', 'original_url'} & set(update_fields):
+                index_links([self])
+            self._track_owner_stats()
+            if update_fields is None or CACHED_FIELDS & set(update_fields):
+                code = self.short_code
+                transaction.on_commit(lambda: refresh_link_cache([code]))
+            return
+
+        generated = not self.short_code
+        for attempt in range(MAX_CODE_ATTEMPTS):
+            if generated:
+                self.short_code = allocate_short_code()
+
+            # Thêm vào Bloom filter trước khi INSERT, xóa negative cache sau commit
+            register_code(self.short_code)
+
+            try:
+                # Savepoint: INSERT trùng code không làm hỏng transaction bên ngoài
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError as e:
+                if not generated or attempt == MAX_CODE_ATTEMPTS - 1 or not is_short_code_conflict(e):
+                    raise
+
+        index_links([self], replace=False)
+        self._track_owner_stats()
+
+        # Write-through: redirect đầu tiên không phải xuống MySQL
+        transaction.on_commit(lambda: prime_link_cache([self]))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_state = instance._stats_contribution()
+        return instance
+
+    def _stats_contribution(self) -> dict:
+        from .owner_stats import link_contribution
+
+        # Instance load bằng only()/defer() không có đủ field
+        deferred = self.get_deferred_fields()
+        if deferred & {'is_active', 'deleted_at', 'click_count'}:
+            return None
+        return link_contribution(self.is_active, self.is_deleted, self.click_count)
+
+    def _track_owner_stats(self):
+        """Delta stats của owner giữa lần load/save trước và hiện tại"""
+        from .owner_stats import apply_deltas, diff_contribution
+
+        before = getattr(self, '_stats_state', {})
+        after = self._stats_contribution()
+        if before is None or after is None:
+            return
+
+        delta = diff_contribution(before, after)
+        # click_count chỉ thay đổi qua flush (đã tự cập nhật stats), chỉ tính khi xóa/khôi phục
+        if before.get('total_links') == after.get('total_links'):
+            delta.pop('total_clicks', None)
+
+        apply_deltas({self.owner_id: delta})
+        self._stats_state = after
 
     @property
     def is_expired(self):
@@ -155,6 +272,117 @@ class Link(models.Model):
         self.save(update_fields=['deleted_at', 'updated_at'])
 
     def increment_click(self):
-        """Tăng click count (dùng cho fallback, chính sẽ dùng Redis)"""
+        """
+        Tăng click count trực tiếp trong MySQL
+        Redirect path dùng counter Redis (xem counters.py), flush theo batch
+        """
         self.click_count = models.F('click_count') + 1
         self.save(update_fields=['click_count'])
+
+
+class LinkSearchToken(models.Model):
+    """
+    Token tìm kiếm của link (title + original_url), cập nhật khi link được lưu
+    Tìm kiếm = prefix lookup trên index (owner_id, token), xem search.py
+    """
+
+    link = models.ForeignKey(
+        Link,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name='Link'
+    )
+    # Denormalize owner để lookup theo user chỉ cần một index
+    owner_id = models.BigIntegerField(verbose_name='Owner ID')
+    token = models.CharField(
+        max_length=32,
+        verbose_name='Token'
+    )
+
+    class Meta:
+        db_table = 'link_search_tokens'
+        verbose_name = 'Link Search Token'
+        verbose_name_plural = 'Link Search Tokens'
+        indexes = [
+            models.Index(fields=['owner_id', 'token', 'link']),
+            models.Index(fields=['token', 'link']),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.link_id}"
+
+
+class LinkImport(models.Model):
+    """
+    Tiến độ của lệnh import_links (một row cho mỗi file + owner)
+    Cập nhật trong cùng transaction với bulk_create của chunk nên
+    chạy lại sau crash không import trùng chunk đã commit
+    """
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='link_imports',
+        verbose_name='Owner'
+    )
+    # blake2b của (owner, checkpoint name), xem import_links
+    key = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='Key'
+    )
+    name = models.CharField(
+        max_length=1024,
+        verbose_name='Checkpoint Name'
+    )
+    offset = models.BigIntegerField(
+        default=0,
+        verbose_name='Byte Offset'
+    )
+    rows = models.BigIntegerField(default=0, verbose_name='Rows')
+    created = models.BigIntegerField(default=0, verbose_name='Created')
+    rejected = models.BigIntegerField(default=0, verbose_name='Rejected')
+    remapped = models.BigIntegerField(default=0, verbose_name='Remapped')
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated At'
+    )
+
+    class Meta:
+        db_table = 'link_imports'
+        verbose_name = 'Link Import'
+        verbose_name_plural = 'Link Imports'
+
+    def __str__(self):
+        return f"{self.name} @ {self.offset}"
+
+
+class ClickFlushChunk(models.Model):
+    """
+    Chunk của flush click counters đã áp dụng vào Link.click_count
+    Ghi trong cùng transaction với UPDATE: crash sau commit, trước HDEL
+    -> lần flush sau thấy row và bỏ qua chunk thay vì cộng lần hai
+    """
+
+    # Batch = một lần RENAME pending -> flushing (counters.py)
+    batch = models.CharField(
+        max_length=32,
+        verbose_name='Batch'
+    )
+    # Link id nhỏ nhất của chunk (chunk ổn định khi flush lại phần còn lại)
+    first_link_id = models.BigIntegerField(verbose_name='First Link ID')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created At'
+    )
+
+    class Meta:
+        db_table = 'click_flush_chunks'
+        verbose_name = 'Click Flush Chunk'
+        verbose_name_plural = 'Click Flush Chunks'
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'first_link_id'], name='click_flush_chunk_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.batch}:{self.first_link_id}"
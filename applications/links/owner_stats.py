@@ -0,0 +1,238 @@
+"""
+Thống kê tổng quan theo owner (LinkViewSet.stats)
+- Redis hash owner_stats:{owner_id}: total_links, active_links, inactive_links, total_clicks
+- Cập nhật bằng delta khi link thay đổi (create, soft delete, restore, toggle active)
+  và khi flush click counters
+- Hash chưa tồn tại -> tính từ MySQL một lần; delta chỉ áp dụng khi hash đã có.
+  Delta đến trong lúc đang tính (bị bỏ qua vì chưa có hash) làm snapshot cũ
+  -> không ghi snapshot, lần đọc sau tính lại (owner_stats:init:{owner_id})
+- Reconcile định kỳ để sửa sai lệch (queryset.update, lỗi giữa chừng, ...),
+  giữ lock của flush click counters để không ghi đè delta của flush đang chạy
+- total_clicks khi đọc = giá trị trong hash + clicks chưa flush của owner (counters.py)
+"""
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from applications.common.redis_client import RedisClient, get_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("owner_stats")
+
+OWNER_STATS_KEY = "owner_stats:{owner_id}"
+# Tồn tại khi có request đang tính stats từ MySQL, tăng mỗi khi delta bị bỏ qua
+OWNER_STATS_INIT_KEY = "owner_stats:init:{owner_id}"
+INIT_TTL = 60
+STATS_FIELDS = ('total_links', 'active_links', 'inactive_links', 'total_clicks')
+
+RECONCILE_CHUNK = 500
+# Chờ flush click counters đang chạy (giây)
+RECONCILE_LOCK_WAIT = 30
+
+# HINCRBY chỉ khi hash đã được khởi tạo (tránh hash thiếu field)
+# Chưa có hash mà đang có request tính snapshot -> đánh dấu snapshot đó đã cũ
+INCR_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        redis.call('INCR', KEYS[2])
+    end
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# Ghi snapshot chỉ khi chưa có hash và không delta nào bị bỏ qua từ lúc bắt đầu tính
+STORE_SNAPSHOT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('DEL', KEYS[2])
+return 1
+"""
+
+
+def stats_key(owner_id) -> str:
+    return OWNER_STATS_KEY.format(owner_id=owner_id)
+
+
+def init_key(owner_id) -> str:
+    return OWNER_STATS_INIT_KEY.format(owner_id=owner_id)
+
+
+def link_contribution(is_active: bool, is_deleted: bool, click_count=0) -> dict:
+    """Phần đóng góp của một link vào stats của owner"""
+    if is_deleted:
+        return {}
+    contribution = {
+        'total_links': 1,
+        'active_links': 1 if is_active else 0,
+        'inactive_links': 0 if is_active else 1,
+    }
+    # click_count có thể là F() sau increment_click
+    if isinstance(click_count, int):
+        contribution['total_clicks'] = click_count
+    return contribution
+
+
+def diff_contribution(before: dict, after: dict) -> dict:
+    return {
+        field: after.get(field, 0) - before.get(field, 0)
+        for field in STATS_FIELDS
+        if after.get(field, 0) != before.get(field, 0)
+    }
+
+
+def apply_deltas(deltas: dict):
+    """
+    Cộng delta vào hash của các owners sau khi transaction commit
+
+    Args:
+        deltas: {owner_id: {field: delta}}
+    """
+    deltas = {owner_id: delta for owner_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply_now(deltas))
+
+
+def _apply_now(deltas: dict):
+    script = RedisClient.get_script("owner_stats_incr", INCR_IF_EXISTS_SCRIPT)
+    pipe = get_redis().pipeline(transaction=False)
+    for owner_id, delta in deltas.items():
+        args = []
+        for field, value in delta.items():
+            args.extend((field, value))
+        script(keys=[stats_key(owner_id), init_key(owner_id)], args=args, client=pipe)
+    pipe.execute()
+
+
+def get_owner_stats(owner_id: int) -> dict:
+    """Stats của owner: một HGETALL, tính từ MySQL nếu chưa có, cộng clicks chưa flush"""
+    from .counters import get_owner_pending_clicks
+
+    redis = get_redis()
+    data = redis.hgetall(stats_key(owner_id))
+    if data:
+        stats = {field: int(data.get(field, 0)) for field in STATS_FIELDS}
+    else:
+        # Đánh dấu trước khi query: delta commit trong lúc tính sẽ đổi giá trị này
+        pipe = redis.pipeline(transaction=True)
+        pipe.incr(init_key(owner_id))
+        pipe.expire(init_key(owner_id), INIT_TTL)
+        version = pipe.execute()[0]
+
+        stats = compute_owner_stats([owner_id])[owner_id]
+        args = [version]
+        for field, value in stats.items():
+            args.extend((field, value))
+        store = RedisClient.get_script("owner_stats_store", STORE_SNAPSHOT_SCRIPT)
+        store(keys=[stats_key(owner_id), init_key(owner_id)], args=args)
+
+    stats['total_clicks'] += get_owner_pending_clicks(owner_id)
+    return stats
+
+
+def compute_owner_stats(owner_ids: list) -> dict:
+    """Aggregate từ MySQL, một query cho cả danh sách owners"""
+    from .models import Link
+
+    stats = {owner_id: {field: 0 for field in STATS_FIELDS} for owner_id in owner_ids}
+    rows = Link.objects.filter(
+        owner_id__in=owner_ids, deleted_at__isnull=True
+    ).order_by().values('owner_id').annotate(
+        total_links=Count('id'),
+        active_links=Count('id', filter=Q(is_active=True)),
+        inactive_links=Count('id', filter=Q(is_active=False)),
+        total_clicks=Sum('click_count', default=0),
+    )
+    for row in rows:
+        stats[row['owner_id']] = {field: row[field] for field in STATS_FIELDS}
+    return stats
+
+
+def _store(redis, stats: dict):
+    pipe = redis.pipeline(transaction=False)
+    for owner_id, values in stats.items():
+        pipe.hset(stats_key(owner_id), mapping=values)
+    pipe.execute()
+
+
+def reconcile_owner_stats(owner_ids=None) -> int:
+    """
+    Ghi đè stats bằng giá trị tính lại từ MySQL
+
+    Args:
+        owner_ids: None = tất cả owners đang có hash hoặc có links
+
+    Returns:
+        Số owners đã reconcile
+    """
+    from .models import Link
+    from .counters import release_flush_lock
+
+    redis = get_redis()
+    if owner_ids is None:
+        owner_ids = set(Link.objects.order_by().values_list('owner_id', flat=True).distinct())
+        owner_ids.update(
+            int(key.rsplit(':', 1)[1]) for key in redis.scan_iter(OWNER_STATS_KEY.format(owner_id='*'))
+        )
+    owner_ids = sorted(owner_ids)
+
+    reconciled = 0
+    for start in range(0, len(owner_ids), RECONCILE_CHUNK):
+        # Flush đang chạy: clicks đã vào MySQL nhưng delta chưa cộng vào hash
+        # (hoặc ngược lại) -> snapshot ghi đè sẽ mất/lặp clicks của flush đó
+        token = _wait_for_flush_lock()
+        if token is None:
+            logger.warning(
+                "Owner stats reconcile stopped, click flush still running",
+                extra={"extra": {"owners": reconciled}}
+            )
+            break
+        try:
+            chunk = owner_ids[start:start + RECONCILE_CHUNK]
+            _store(redis, compute_owner_stats(chunk))
+            reconciled += len(chunk)
+        finally:
+            release_flush_lock(token)
+
+    logger.info(
+        "Owner stats reconciled",
+        extra={"extra": {"owners": reconciled}}
+    )
+    return reconciled
+
+
+def _wait_for_flush_lock():
+    from .counters import acquire_flush_lock
+
+    deadline = time.monotonic() + RECONCILE_LOCK_WAIT
+    while True:
+        token = acquire_flush_lock()
+        if token is not None or time.monotonic() >= deadline:
+            return token
+        time.sleep(0.2)
+
+
+def click_deltas(link_deltas: dict) -> dict:
+    """{link_id: clicks} -> {owner_id: {'total_clicks': n}} (bỏ qua link đã xóa)"""
+    from .models import Link
+
+    owners = Link.objects.filter(
+        id__in=list(link_deltas), deleted_at__isnull=True
+    ).values_list('id', 'owner_id')
+
+    deltas = defaultdict(lambda: {'total_clicks': 0})
+    for link_id, owner_id in owners:
+        deltas[owner_id]['total_clicks'] += link_deltas[link_id]
+    return dict(deltas)
@@ -0,0 +1,135 @@
+"""
+Pagination cho LinkViewSet
+- Mặc định: page number (tương thích client cũ)
+- ?pagination=cursor hoặc ?cursor=...: keyset trên (ordering field, id),
+  không COUNT(*), không OFFSET -> mọi page có chi phí như page đầu
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination theo một field trong ordering_fields + id (tie-breaker)
+    NULL (expires_at) theo thứ tự native của MySQL: đầu khi tăng dần, cuối khi giảm dần
+    -> ORDER BY chỉ gồm (field, id), dùng được index (owner, deleted_at, field, id)
+    """
+    cursor_query_param = 'cursor'
+    ordering_fields = ('created_at', 'click_count', 'expires_at')
+    default_ordering = '-created_at'
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        position = self._decode_cursor(encoded) if encoded else None
+
+        self.ordering = position['o'] if position else self._get_ordering(request)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        if descending:
+            order = [f'-{field}', '-id']
+        else:
+            order = [field, 'id']
+        queryset = queryset.order_by(*order)
+
+        if position:
+            nullable = queryset.model._meta.get_field(field).null
+            queryset = queryset.filter(self._after(field, descending, position, nullable))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        field = self.ordering.lstrip('-')
+        value = getattr(last, field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'o': self.ordering, 'v': value, 'i': last.id}).encode()
+        ).decode()
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _get_ordering(self, request) -> str:
+        ordering = request.query_params.get('ordering', '').split(',')[0].strip()
+        if ordering.lstrip('-') in self.ordering_fields:
+            return ordering
+        return self.default_ordering
+
+    def _decode_cursor(self, encoded: str) -> dict:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            field = position['o'].lstrip('-')
+            if field not in self.ordering_fields:
+                raise ValueError(field)
+            if field != 'click_count' and position['v'] is not None:
+                position['v'] = parse_datetime(position['v'])
+            position['i'] = int(position['i'])
+            return position
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise NotFound('Invalid cursor')
+
+    def _after(self, field: str, descending: bool, position: dict, nullable: bool) -> Q:
+        """
+        Điều kiện 'sau vị trí (value, id)' theo thứ tự đã sắp xếp
+        Giảm dần: các giá trị rồi tới vùng NULL; tăng dần: vùng NULL rồi tới các giá trị
+        """
+        value, last_id = position['v'], position['i']
+        cmp = 'lt' if descending else 'gt'
+
+        if value is None:
+            # Trong vùng NULL: tie-break theo id, tăng dần thì sau đó là mọi giá trị khác NULL
+            after = Q(**{f'{field}__isnull': True, f'id__{cmp}': last_id})
+            if not descending:
+                after |= Q(**{f'{field}__isnull': False})
+            return after
+
+        after = Q(**{f'{field}__{cmp}': value}) | Q(**{field: value, f'id__{cmp}': last_id})
+        if nullable and descending:
+            after |= Q(**{f'{field}__isnull': True})
+        return after
+
+
+class LinkPagination(PageNumberPagination):
+    """Page number mặc định, keyset khi client yêu cầu (opt-in)"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get('pagination') == 'cursor' or \
+                KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.get_page_size(request) or self.keyset.page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
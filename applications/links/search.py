@@ -0,0 +1,117 @@
+"""
+Search index cho links
+- Token: các từ (chữ/số Unicode) của title và original_url, casefold;
+  từ có dấu được index thêm dạng bỏ dấu ("khuyến" -> "khuyen") để tìm không dấu
+- Lưu trong bảng link_search_tokens, cập nhật khi link được lưu
+- Tìm kiếm: mỗi từ khóa là một prefix lookup trên index (owner_id, token),
+  short_code khớp chính xác dùng unique index
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+from rest_framework import filters
+
+from .models import LinkSearchToken, is_valid_short_code
+
+# \w trừ '_' (tách từ trong URL kiểu django_tips)
+TOKEN_RE = re.compile(r'[^\W_]+')
+TOKEN_MIN_LENGTH = 2
+TOKEN_MAX_LENGTH = 32
+MAX_TOKENS_PER_LINK = 64
+MAX_SEARCH_TERMS = 5
+
+# Token xuất hiện ở hầu hết URL, không có giá trị tìm kiếm
+STOP_TOKENS = {'http', 'https', 'www', 'com', 'html', 'php'}
+
+
+def fold_accents(token: str) -> str:
+    """Bỏ dấu: 'khuyến' -> 'khuyen', 'đường' -> 'duong'"""
+    decomposed = unicodedata.normalize('NFKD', token.replace('đ', 'd'))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str, fold: bool = False) -> list:
+    """
+    Danh sách token không trùng, giữ thứ tự xuất hiện
+
+    Args:
+        fold: thêm dạng bỏ dấu ngay sau token có dấu (dùng khi index)
+    """
+    # NFC trước: text dạng tổ hợp (NFD) có dấu là ký tự riêng, không thuộc \w
+    text = unicodedata.normalize('NFC', text or '').casefold()
+
+    tokens = []
+    seen = set()
+    for word in TOKEN_RE.findall(text):
+        for token in (word, fold_accents(word)) if fold else (word,):
+            token = token[:TOKEN_MAX_LENGTH]
+            if len(token) < TOKEN_MIN_LENGTH or token in STOP_TOKENS or token in seen:
+                continue
+            seen.add(token)
+            tokens.append(token)
+    return tokens
+
+
+def link_tokens(link) -> list:
+    return tokenize(f'{link.title} {link.original_url}', fold=True)[:MAX_TOKENS_PER_LINK]
+
+
+def index_links(links: list, replace: bool = True):
+    """
+    Ghi lại tokens của các links (một DELETE + một bulk INSERT)
+
+    Args:
+        replace: False khi links vừa được tạo (chưa có token cũ)
+    """
+    links = [link for link in links if link.pk is not None]
+    if not links:
+        return
+
+    if replace:
+        LinkSearchToken.objects.filter(link_id__in=[link.pk for link in links]).delete()
+
+    LinkSearchToken.objects.bulk_create([
+        LinkSearchToken(link_id=link.pk, owner_id=link.owner_id, token=token)
+        for link in links
+        for token in link_tokens(link)
+    ])
+
+
+def search_links(queryset, text: str, owner_id: int = None):
+    """
+    Lọc queryset theo từ khóa
+    Link phải khớp tất cả từ khóa (prefix của token), hoặc short_code khớp chính xác
+    """
+    terms = tokenize(text)[:MAX_SEARCH_TERMS]
+    text = (text or '').strip()
+
+    if not terms:
+        if is_valid_short_code(text):
+            return queryset.filter(short_code=text)
+        return queryset.none()
+
+    matched = None
+    for term in terms:
+        tokens = LinkSearchToken.objects.filter(token__startswith=term)
+        if owner_id is not None:
+            tokens = tokens.filter(owner_id=owner_id)
+        condition = Q(id__in=tokens.values('link_id'))
+        matched = condition if matched is None else matched & condition
+
+    if is_valid_short_code(text):
+        matched |= Q(short_code=text)
+
+    return queryset.filter(matched)
+
+
+class LinkSearchFilter(filters.SearchFilter):
+    """SearchFilter (?search=) dùng search index thay vì LIKE '%term%'"""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not text.strip():
+            return queryset
+
+        owner_id = request.user.id if request.user.is_authenticated else None
+        return search_links(queryset, text, owner_id=owner_id)
@@ -1,5 +1,18 @@
+from django.db import IntegrityError
 from rest_framework import serializers
-from .models import Link
+from .counters import get_pending_clicks
+from .models import Link, SHORT_CODE_MIN_LENGTH, is_valid_short_code, is_short_code_conflict
+
+
+class LinkListSerializer(serializers.ListSerializer):
+    """Lấy pending clicks của cả page bằng một lần đọc Redis"""
+
+    def to_representation(self, data):
+        items = data.all() if hasattr(data, 'all') else data
+        items = list(items)
+        if 'pending_clicks' not in self._context:
+            self._context['pending_clicks'] = get_pending_clicks(item.id for item in items)
+        return super().to_representation(items)
 
 
 class LinkSerializer(serializers.ModelSerializer):
@@ -17,6 +30,16 @@ class LinkSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'short_code', 'click_count', 'created_at', 'updated_at']
+        list_serializer_class = LinkListSerializer
+
+    def to_representation(self, instance):
+        """click_count = giá trị trong MySQL + delta chưa flush trong Redis"""
+        data = super().to_representation(instance)
+        pending = self.context.get('pending_clicks')
+        if pending is None:
+            pending = get_pending_clicks([instance.id])
+        data['click_count'] += pending.get(instance.id, 0)
+        return data
 
     def get_short_url(self, obj):
         request = self.context.get('request')
@@ -26,12 +49,18 @@ class LinkSerializer(serializers.ModelSerializer):
 
 
 class LinkCreateSerializer(serializers.ModelSerializer):
-    """Serializer cho tạo link mới"""
+    """
+    Serializer cho tạo link mới
+
+    reuse_existing=true (không kèm short_code): trả về link đang active của user
+    trỏ tới cùng URL thay vì tạo bản ghi mới
+    """
     short_code = serializers.CharField(required=False, allow_blank=True)
+    reuse_existing = serializers.BooleanField(required=False, default=False, write_only=True)
 
     class Meta:
         model = Link
-        fields = ['original_url', 'short_code', 'title', 'expires_at', 'is_active']
+        fields = ['original_url', 'short_code', 'title', 'expires_at', 'is_active', 'reuse_existing']
         extra_kwargs = {
             'title': {'required': False},
             'expires_at': {'required': False},
@@ -40,15 +69,34 @@ class LinkCreateSerializer(serializers.ModelSerializer):
 
     def validate_short_code(self, value):
         if value:
-            if len(value) < 4:
+            if len(value) < SHORT_CODE_MIN_LENGTH:
                 raise serializers.ValidationError("Short code must be at least 4 characters.")
-            if Link.objects.filter(short_code=value).exists():
-                raise serializers.ValidationError("This short code is already taken.")
+            if not is_valid_short_code(value):
+                raise serializers.ValidationError(
+                    "Short code may only contain letters, digits, '-' and '_' (max 20 characters)."
+                )
         return value
 
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
-        return super().create(validated_data)
+
+        reuse_existing = validated_data.pop('reuse_existing', False)
+        if reuse_existing and not validated_data.get('short_code'):
+            # Một point lookup trên index (owner, url_hash)
+            existing = Link.objects.filter(
+                owner=validated_data['owner']
+            ).active().with_url(validated_data['original_url']).first()
+            if existing is not None:
+                self.reused = True
+                return existing
+
+        try:
+            return super().create(validated_data)
+        except IntegrityError as e:
+            # Unique index là nguồn sự thật, không cần exists() trước
+            if validated_data.get('short_code') and is_short_code_conflict(e):
+                raise serializers.ValidationError({'short_code': ["This short code is already taken."]})
+            raise
 
 
 class LinkUpdateSerializer(serializers.ModelSerializer):
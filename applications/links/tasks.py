@@ -0,0 +1,59 @@
+"""
+Celery tasks cho links
+"""
+from celery import shared_task
+
+from applications.common.logger import get_logger
+
+logger = get_logger("celery.links")
+
+
+@shared_task(bind=True)
+def flush_click_counters(self):
+    """
+    Task flush click counters từ Redis vào Link.click_count
+    Chạy định kỳ (beat)
+    """
+    try:
+        from applications.links.counters import flush_click_counters as flush
+
+        updated = flush()
+        return {"status": "success", "links": updated}
+
+    except Exception as exc:
+        logger.error(f"Failed to flush click counters: {exc}")
+        raise
+
+
+@shared_task(bind=True)
+def reconcile_owner_stats(self):
+    """
+    Task tính lại stats của tất cả owners từ MySQL (sửa sai lệch của delta)
+    Chạy định kỳ (beat)
+    """
+    try:
+        from applications.links.owner_stats import reconcile_owner_stats as reconcile
+
+        owners = reconcile()
+        return {"status": "success", "owners": owners}
+
+    except Exception as exc:
+        logger.error(f"Failed to reconcile owner stats: {exc}")
+        raise
+
+
+@shared_task(bind=True)
+def sweep_expired_links(self):
+    """
+    Task ghi lại cache của các link vừa hết hạn
+    Chạy định kỳ (beat)
+    """
+    try:
+        from applications.links.cache import sweep_expired_links as sweep
+
+        swept = sweep()
+        return {"status": "success", "codes": swept}
+
+    except Exception as exc:
+        logger.error(f"Failed to sweep expired links: {exc}")
+        raise
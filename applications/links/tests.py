@@ -5,16 +5,24 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
 from applications.accounts.models import User
-from applications.links.models import Link
+from applications.links.models import Link, LinkImport
 
 class LinkTests(TestCase):
     def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links.counters import (
+            PENDING_KEY, FLUSHING_KEY, OWNER_PENDING_KEY, OWNER_FLUSHING_KEY,
+        )
+        from applications.links.owner_stats import stats_key
+        get_redis().delete(PENDING_KEY, FLUSHING_KEY, OWNER_PENDING_KEY, OWNER_FLUSHING_KEY)
+
         self.client = APIClient()
         self.user = User.objects.create_user(
             email='test@example.com',
             password='testpassword'
         )
         self.client.force_authenticate(user=self.user)
+        get_redis().delete(stats_key(self.user.id))
 
         # Create links
         # 1. Active link
@@ -99,3 +107,1337 @@ class LinkTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['original_url'], 'http://example.com/1')
+
+
+class LinkCacheTests(TestCase):
+    def setUp(self):
+        from applications.links import cache
+        self.cache = cache
+        self.user = User.objects.create_user(
+            email='cache@example.com',
+            password='testpassword'
+        )
+        self.link = Link.objects.create(
+            owner=self.user,
+            original_url='http://example.com/cached'
+        )
+        cache.invalidate_link_cache(self.link.short_code)
+
+    def test_l1_hit_after_first_lookup(self):
+        """Lần đọc thứ hai phải lấy từ L1, không chạm Redis/MySQL"""
+        code = self.link.short_code
+        self.cache.get_link_data(code)
+        before = self.cache.get_cache_stats().get('link_cache.l1.hit', 0)
+
+        with self.assertNumQueries(0):
+            data = self.cache.get_link_data(code)
+
+        self.assertEqual(data['original_url'], 'http://example.com/cached')
+        self.assertEqual(self.cache.get_cache_stats()['link_cache.l1.hit'], before + 1)
+
+    def test_invalidate_drops_l1_entry(self):
+        code = self.link.short_code
+        self.cache.get_link_data(code)
+        Link.objects.filter(pk=self.link.pk).update(is_active=False)
+        self.cache.invalidate_link_cache(code)
+
+        data = self.cache.get_link_data(code)
+        self.assertFalse(data['is_accessible'])
+        self.assertEqual(data['reason'], 'Link is disabled')
+
+    def test_stale_entry_served_and_refreshed_in_background(self):
+        from unittest import mock
+        from applications.common.redis_client import get_redis
+        code = self.link.short_code
+        key = self.cache.cache_key(code)
+        self.cache.get_link_data(code)
+        self.cache._l1.clear()
+
+        # Quá soft expiry, DB đã đổi: vẫn trả về giá trị cũ, refresh nền một lần
+        get_redis().hset(key, 'soft', '0')
+        get_redis().expire(key, 100)
+        Link.objects.filter(pk=self.link.pk).update(original_url='http://example.com/moved')
+        with mock.patch.object(self.cache, '_schedule_refresh') as schedule, self.assertNumQueries(0):
+            data = self.cache.get_link_data(code)
+        self.assertEqual(data['original_url'], 'http://example.com/cached')
+        schedule.assert_called_once_with(code)
+        # Hit không kéo dài TTL
+        self.assertLessEqual(get_redis().ttl(key), 100)
+
+        self.cache._reload(code)
+        self.cache._l1.clear()
+        with mock.patch.object(self.cache, '_schedule_refresh') as schedule:
+            data = self.cache.get_link_data(code)
+        self.assertEqual(data['original_url'], 'http://example.com/moved')
+        schedule.assert_not_called()
+
+    def test_expiry_checked_at_read_and_swept(self):
+        from unittest import mock
+        from applications.common.redis_client import get_redis
+        code = self.link.short_code
+        redis = get_redis()
+        redis.delete(self.cache.EXPIRY_KEY)
+
+        Link.objects.filter(pk=self.link.pk).update(expires_at=timezone.now() + timedelta(seconds=60))
+        self.assertTrue(self.cache.get_link_data(code)['is_accessible'])
+        score = redis.zscore(self.cache.EXPIRY_KEY, code)
+        self.assertIsNotNone(score)
+
+        # Hết hạn trong lúc đang cache (cả L1): không redirect nữa
+        with mock.patch('applications.links.cache.time.time', return_value=score + 1):
+            with self.assertNumQueries(0):
+                data = self.cache.get_link_data(code)
+            self.assertFalse(data['is_accessible'])
+            self.assertEqual(data['reason'], 'Link has expired')
+
+        Link.objects.filter(pk=self.link.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.cache.sweep_expired_links(now=score + 1), 1)
+        self.assertEqual(redis.hget(self.cache.cache_key(code), 'is_accessible'), 'False')
+        self.assertIsNone(redis.zscore(self.cache.EXPIRY_KEY, code))
+
+    def test_xfetch_refreshes_early_with_increasing_probability(self):
+        import time
+        now = time.time()
+        fresh = {'soft': str(now + 600), 'delta': '0.01'}
+        near = {'soft': str(now + 0.01), 'delta': '0.01'}
+
+        self.assertFalse(any(self.cache._should_refresh(fresh) for _ in range(200)))
+        early = sum(self.cache._should_refresh(near) for _ in range(200))
+        self.assertGreater(early, 0)
+        self.assertLess(early, 200)
+
+    def test_admission_keeps_frequent_keys(self):
+        """One-off key không được evict key đang hot"""
+        from applications.common.local_cache import LocalCache, MISSING
+        l1 = LocalCache(maxsize=2, ttl=60)
+        for _ in range(5):
+            l1.set('hot', 1)
+            l1.get('hot')
+        l1.set('warm', 2)
+        l1.get('warm')
+
+        self.assertFalse(l1.set('scan', 3))
+        self.assertIs(l1.get('scan'), MISSING)
+        self.assertEqual(l1.get('hot'), 1)
+
+
+class PackedCacheEncodingTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links import cache
+        self.cache = cache
+        self.redis = get_redis()
+        self.user = User.objects.create_user(
+            email='packed@example.com',
+            password='testpassword'
+        )
+        self.link = Link.objects.create(
+            owner=self.user,
+            original_url='https://example.com/blog/2024/launch-announcement',
+            expires_at=timezone.now() + timedelta(days=3)
+        )
+        cache.invalidate_link_cache(self.link.short_code)
+
+    def test_codec_round_trip_and_size(self):
+        mapping = self.cache._to_mapping(self.cache.build_link_data(self.link), delta=0.004)
+        blob = self.cache._codec.encode(mapping)
+        decoded = self.cache._codec.decode(blob)
+
+        self.assertEqual(decoded['id'], mapping['id'])
+        self.assertEqual(decoded['original_url'], mapping['original_url'])
+        self.assertEqual(decoded['is_accessible'], 'True')
+        self.assertAlmostEqual(float(decoded['expires_at']), float(mapping['expires_at']), places=3)
+        self.assertEqual(self.cache._codec.decode(self.cache._codec.encode({'missing': '1'})), {'missing': '1'})
+
+        # Field names + values của hash so với cả chuỗi packed
+        hash_bytes = sum(len(field) + len(value) for field, value in mapping.items())
+        self.assertLess(len(blob) * 2, hash_bytes)
+
+    def test_formats_coexist_during_rollout(self):
+        from asgiref.sync import async_to_sync
+        from django.test import override_settings
+        code = self.link.short_code
+        key = self.cache.cache_key(code)
+
+        with override_settings(LINK_CACHE_ENCODING='packed'):
+            self.cache.get_link_data(code)
+            self.assertEqual(self.redis.type(key), 'string')
+
+        # Reader ở mode hash vẫn đọc được entry packed (sync + async)
+        self.cache._l1.clear()
+        with self.assertNumQueries(0):
+            data = self.cache.get_link_data(code)
+            self.cache._l1.clear()
+            async_data = async_to_sync(self.cache.aget_link_data)(code)
+        self.assertEqual(data['original_url'], self.link.original_url)
+        self.assertEqual(async_data['id'], self.link.id)
+
+        # Ghi lại theo format hiện tại
+        self.cache.prime_link_cache([self.link])
+        self.assertEqual(self.redis.type(key), 'hash')
+        with override_settings(LINK_CACHE_ENCODING='packed'):
+            self.cache.prime_link_cache([self.link])
+            self.cache.set_negative('nonexistent-packed')
+        self.assertEqual(self.redis.type(key), 'string')
+        self.cache._l1.clear()
+        self.assertTrue(self.cache.get_link_data(code)['is_accessible'])
+
+
+class OwnerGenerationTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links import cache
+        self.cache = cache
+        self.redis = get_redis()
+        self.user = User.objects.create_user(
+            email='owner-gen@example.com',
+            password='testpassword'
+        )
+        self.links = [
+            Link.objects.create(owner=self.user, original_url=f'https://example.com/{i}')
+            for i in range(3)
+        ]
+        self.redis.delete(cache.owner_gen_key(self.user.id))
+        cache._owner_gens.clear()
+        for link in self.links:
+            cache.invalidate_link_cache(link.short_code)
+            cache.get_link_data(link.short_code)
+
+    def test_deactivating_owner_invalidates_all_links(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        for link in self.links:
+            # Entry cũ vẫn còn trong Redis, chỉ bị coi là stale
+            self.assertTrue(self.redis.exists(self.cache.cache_key(link.short_code)))
+            data = self.cache.get_link_data(link.short_code)
+            self.assertFalse(data['is_accessible'])
+            self.assertEqual(data['reason'], 'Link owner is disabled')
+
+        self.user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertTrue(self.cache.get_link_data(self.links[0].short_code)['is_accessible'])
+
+    def test_bump_invalidates_l1_and_redis(self):
+        code = self.links[0].short_code
+        with self.assertNumQueries(0):
+            self.cache.get_link_data(code)
+
+        # Mirror được cập nhật ngay -> entry L1 và Redis (gen cũ) đều bị bỏ qua
+        self.cache.bump_owner_generation(self.user.id)
+        with self.assertNumQueries(1):
+            self.cache.get_link_data(code)
+        with self.assertNumQueries(0):
+            self.cache.get_link_data(code)
+
+    def test_bump_during_load_is_not_cached(self):
+        from unittest import mock
+        code = self.links[0].short_code
+        load = self.cache.load_link_data
+
+        def load_then_bump(short_code):
+            # Dữ liệu đọc trước commit, bump chạy ngay sau đó
+            data = load(short_code)
+            self.cache.bump_owner_generation(self.user.id)
+            return data
+
+        self.cache.invalidate_link_cache(code)
+        with mock.patch.object(self.cache, 'load_link_data', side_effect=load_then_bump):
+            self.assertIsNotNone(self.cache.get_link_data(code))
+        self.assertFalse(self.redis.exists(self.cache.cache_key(code)))
+
+    def test_mirror_expiry_is_not_counted_as_stale(self):
+        from applications.common.metrics import get_counters
+        code = self.links[0].short_code
+        self.cache.get_link_data(code)
+        stale = get_counters('link_cache.generation.').get('link_cache.generation.stale', 0)
+
+        self.cache._owner_gens.clear()
+        with self.assertNumQueries(0):
+            self.cache.get_link_data(code)
+        self.assertEqual(
+            get_counters('link_cache.generation.').get('link_cache.generation.stale', 0), stale
+        )
+
+    def test_entries_without_generation_are_stale(self):
+        code = self.links[0].short_code
+        key = self.cache.cache_key(code)
+        self.redis.hdel(key, 'owner', 'gen')
+        self.cache._l1.clear()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.cache.get_link_data(code)['is_accessible'])
+        self.assertTrue(self.redis.hexists(key, 'gen'))
+
+
+class NegativeCacheTests(TestCase):
+    def setUp(self):
+        from applications.links import cache
+        self.cache = cache
+        # Mirror Bloom còn sót từ test khác sẽ chặn trước nhánh negative cache
+        cache.link_bloom.unload()
+        self.addCleanup(cache.link_bloom.unload)
+        self.user = User.objects.create_user(
+            email='bloom@example.com',
+            password='testpassword'
+        )
+
+    def test_invalid_code_rejected_by_router(self):
+        """Code sai cú pháp bị 404 trước khi chạm cache/DB"""
+        with self.assertNumQueries(0):
+            response = self.client.get('/r/a.b')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_code_is_negatively_cached(self):
+        code = 'missing1'
+        self.cache.invalidate_link_cache(code)
+        self.assertIsNone(self.cache.get_link_data(code))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.get_link_data(code))
+
+    def test_reads_do_not_extend_negative_entries(self):
+        from applications.common.redis_client import get_redis
+        redis = get_redis()
+        code = 'missing2'
+        self.cache.invalidate_link_cache(code)
+        self.assertIsNone(self.cache.get_link_data(code))
+
+        # Entry âm hết hạn sau NEGATIVE_TTL dù bị đọc liên tục
+        key = self.cache.cache_key(code)
+        self.assertTrue(redis.expire(key, 5))
+        for _ in range(3):
+            self.cache._l1.clear()
+            self.assertIsNone(self.cache.get_link_data(code))
+        self.assertTrue(0 < redis.ttl(key) <= 5)
+
+    def test_bloom_rejects_unknown_codes(self):
+        from unittest import mock
+        from applications.common.redis_client import get_redis
+
+        link = Link.objects.create(owner=self.user, original_url='http://example.com/b')
+        # Không phát bloom_reload: listener sẽ load lại mirror sau khi test đã unload
+        with mock.patch.object(get_redis(), 'publish'):
+            self.cache.rebuild_bloom()
+        self.cache.link_bloom.load()
+        try:
+            self.assertTrue(self.cache.link_bloom.might_contain(link.short_code))
+            self.assertFalse(self.cache.link_bloom.might_contain('zzzzzzzzzz'))
+        finally:
+            self.cache.link_bloom.unload()
+
+    def test_created_link_clears_negative_entry(self):
+        code = 'newcode1'
+        self.assertIsNone(self.cache.get_link_data(code))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Link.objects.create(
+                owner=self.user,
+                original_url='http://example.com/new',
+                short_code=code
+            )
+
+        data = self.cache.get_link_data(code)
+        self.assertEqual(data['original_url'], 'http://example.com/new')
+
+
+class RedirectParityTests(TestCase):
+    """RedirectView và AsyncRedirectView phải trả về cùng kết quả"""
+
+    def setUp(self):
+        from django.test import RequestFactory, AsyncRequestFactory
+        from applications.links import cache
+        self.factory = RequestFactory()
+        self.async_factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(
+            email='parity@example.com',
+            password='testpassword'
+        )
+        self.links = {
+            'active': Link.objects.create(owner=self.user, original_url='http://example.com/a'),
+            'inactive': Link.objects.create(
+                owner=self.user, original_url='http://example.com/i', is_active=False
+            ),
+            'expired': Link.objects.create(
+                owner=self.user, original_url='http://example.com/e',
+                expires_at=timezone.now() - timedelta(days=1)
+            ),
+            'deleted': Link.objects.create(
+                owner=self.user, original_url='http://example.com/d', deleted_at=timezone.now()
+            ),
+        }
+        self.codes = [link.short_code for link in self.links.values()] + ['nosuchcode']
+        for code in self.codes:
+            cache.invalidate_link_cache(code)
+
+    def _sync_response(self, code):
+        from unittest import mock
+        from applications.links.redirect import RedirectView
+        with mock.patch('applications.links.redirect.record_click') as record:
+            response = RedirectView.as_view()(self.factory.get(f'/r/{code}'), code=code)
+        return response, record.call_count
+
+    async def _async_response(self, code):
+        from unittest import mock
+        from applications.links.redirect import AsyncRedirectView
+        with mock.patch('applications.links.redirect.dispatch_click') as dispatch:
+            response = await AsyncRedirectView.as_view()(self.async_factory.get(f'/r/{code}'), code=code)
+        return response, dispatch.call_count
+
+    async def test_spool_fallback_runs_off_event_loop(self):
+        import threading
+        from unittest import mock
+        from applications.links.redirect import _adispatch_click
+
+        threads = []
+        with mock.patch('applications.analytics.stream.aenqueue_click', side_effect=ConnectionError('down')), \
+                mock.patch('applications.links.redirect.spool_click',
+                           side_effect=lambda *args, **kwargs: threads.append(threading.current_thread())):
+            await _adispatch_click(1, 'abc1234', '10.0.0.1', 'ua', '', owner_id=self.user.id)
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    async def test_parity(self):
+        from asgiref.sync import sync_to_async
+        from applications.links import cache
+
+        for code in self.codes:
+            # Lần 1: cache miss (MySQL), lần 2: cache hit
+            for _ in range(2):
+                expected, expected_clicks = await sync_to_async(self._sync_response)(code)
+                cache._l1.clear()
+                actual, actual_clicks = await self._async_response(code)
+                cache._l1.clear()
+
+                self.assertEqual(actual.status_code, expected.status_code, code)
+                self.assertEqual(actual.get('Location'), expected.get('Location'), code)
+                self.assertEqual(actual.content, expected.content, code)
+                self.assertEqual(actual_clicks, expected_clicks, code)
+
+        response, clicks = await self._async_response(self.links['active'].short_code)
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(clicks, 1)
+
+
+class RedirectFastPathTests(TestCase):
+    def setUp(self):
+        from applications.links import cache
+        self.user = User.objects.create_user(
+            email='fastpath@example.com',
+            password='testpassword'
+        )
+        self.link = Link.objects.create(owner=self.user, original_url='http://example.com/fast')
+        cache.invalidate_link_cache(self.link.short_code)
+
+    async def _call(self, app, path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'headers': [(b'user-agent', b'test')], 'client': ('10.0.0.1', 1234),
+        }
+        await app(scope, receive, send)
+        return messages
+
+    async def test_redirect_handled_without_django(self):
+        from unittest import mock
+        from applications.links.asgi_redirect import RedirectFastPath
+
+        django_app = mock.AsyncMock()
+        app = RedirectFastPath(django_app)
+
+        with mock.patch('applications.links.asgi_redirect.dispatch_click') as dispatch:
+            messages = await self._call(app, f'/r/{self.link.short_code}')
+
+        self.assertEqual(messages[0]['status'], 301)
+        self.assertIn((b'location', b'http://example.com/fast'), messages[0]['headers'])
+        dispatch.assert_called_once_with(
+            self.link.id, self.link.short_code, '10.0.0.1', 'test', '', owner_id=self.link.owner_id
+        )
+        django_app.assert_not_called()
+
+        messages = await self._call(app, '/r/nosuchcode')
+        self.assertEqual(messages[0]['status'], 404)
+
+    async def test_other_paths_go_to_django(self):
+        from unittest import mock
+        from applications.links.asgi_redirect import RedirectFastPath
+
+        django_app = mock.AsyncMock()
+        app = RedirectFastPath(django_app)
+
+        await self._call(app, '/api/links/')
+        await self._call(app, '/r/a.b')
+        self.assertEqual(django_app.await_count, 2)
+
+
+class ClickCounterTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links import counters
+        from applications.links.owner_stats import stats_key
+        self.counters = counters
+        from applications.analytics.stream import CLICK_STREAM
+        redis = get_redis()
+        redis.delete(counters.PENDING_KEY, counters.FLUSHING_KEY, CLICK_STREAM,
+                     counters.OWNER_PENDING_KEY, counters.OWNER_FLUSHING_KEY, counters.FLUSH_BATCH_KEY)
+        for key in redis.scan_iter('visitors:*'):
+            redis.delete(key)
+        for key in redis.scan_iter('leaderboard:*'):
+            redis.delete(key)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='counter@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        redis.delete(stats_key(self.user.id))
+        self.link = Link.objects.create(
+            owner=self.user,
+            original_url='http://example.com/counted',
+            click_count=2
+        )
+
+    def test_pending_clicks_visible_before_flush(self):
+        from applications.analytics.stream import enqueue_click
+        for _ in range(3):
+            enqueue_click(self.link.id, self.link.short_code, '10.0.0.1', owner_id=self.user.id)
+
+        response = self.client.get(reverse('link-detail', args=[self.link.id]))
+        self.assertEqual(response.data['click_count'], 5)
+
+        response = self.client.get(reverse('link-list'))
+        self.assertEqual(response.data['results'][0]['click_count'], 5)
+
+        response = self.client.get(reverse('link-stats'))
+        self.assertEqual(response.data['total_clicks'], 5)
+
+        # Sau flush: clicks chuyển vào owner_stats, không bị cộng hai lần
+        with self.captureOnCommitCallbacks(execute=True):
+            self.counters.flush_click_counters()
+        response = self.client.get(reverse('link-stats'))
+        self.assertEqual(response.data['total_clicks'], 5)
+
+    def test_flush_applies_deltas_once(self):
+        from applications.analytics.stream import enqueue_click
+        other = Link.objects.create(owner=self.user, original_url='http://example.com/other')
+        for _ in range(3):
+            enqueue_click(self.link.id, self.link.short_code, '10.0.0.1')
+        enqueue_click(other.id, other.short_code, '10.0.0.1')
+
+        self.assertEqual(self.counters.flush_click_counters(), 2)
+        self.assertEqual(self.counters.flush_click_counters(), 0)
+
+        self.link.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.link.click_count, 5)
+        self.assertEqual(other.click_count, 1)
+        self.assertEqual(self.counters.get_pending_clicks([self.link.id, other.id]), {})
+
+    def test_flush_after_crash_before_hdel_does_not_double_count(self):
+        from unittest import mock
+        from applications.analytics.stream import enqueue_click
+        from applications.common.redis_client import get_redis
+        for _ in range(3):
+            enqueue_click(self.link.id, self.link.short_code, '10.0.0.1')
+
+        # UPDATE đã commit, process chết trước HDEL
+        pipeline_class = type(get_redis().pipeline())
+        with mock.patch.object(pipeline_class, 'hdel', side_effect=RuntimeError('crash')), \
+                self.assertRaises(RuntimeError):
+            self.counters.flush_click_counters()
+        self.link.refresh_from_db()
+        self.assertEqual(self.link.click_count, 5)
+
+        self.assertEqual(self.counters.flush_click_counters(), 1)
+        self.link.refresh_from_db()
+        self.assertEqual(self.link.click_count, 5)
+        self.assertEqual(self.counters.get_pending_clicks([self.link.id]), {})
+
+    def test_flush_keeps_lock_taken_by_other_worker(self):
+        from unittest import mock
+        from applications.analytics.stream import enqueue_click
+        from applications.common.redis_client import get_redis
+        redis = get_redis()
+        enqueue_click(self.link.id, self.link.short_code, '10.0.0.1')
+
+        def lock_expired(deltas):
+            # Flush chạy quá FLUSH_LOCK_TTL, worker khác đã lấy lock
+            redis.set(self.counters.FLUSH_LOCK_KEY, 'other-worker')
+            return {}
+
+        with mock.patch('applications.links.owner_stats.click_deltas', side_effect=lock_expired):
+            self.assertEqual(self.counters.flush_click_counters(), 1)
+        self.assertEqual(redis.get(self.counters.FLUSH_LOCK_KEY), 'other-worker')
+        redis.delete(self.counters.FLUSH_LOCK_KEY)
+
+    def test_link_analytics_endpoint(self):
+        from applications.analytics.stream import ClickStreamConsumer, enqueue_click
+        from unittest import mock
+        enqueue_click(self.link.id, self.link.short_code, '10.0.0.1', 'ua')
+        enqueue_click(self.link.id, self.link.short_code, '10.0.0.2', 'ua')
+        enqueue_click(self.link.id, self.link.short_code, '10.0.0.2', 'ua')
+        with mock.patch('applications.analytics.services.ClickEventService.record_clicks',
+                        side_effect=lambda events: events), \
+                mock.patch('applications.analytics.services.LinkStatsService.bulk_update_stats'):
+            ClickStreamConsumer(name='test').consume()
+
+        response = self.client.get(reverse('link-analytics', args=[self.link.id]), {'days': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['click_count'], 5)
+        self.assertEqual(len(response.data['daily']), 3)
+        self.assertEqual(response.data['daily'][0]['clicks'], 3)
+        self.assertEqual(response.data['daily'][0]['unique_visitors'], 2)
+
+
+class ShortCodeAllocatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='allocator@example.com',
+            password='testpassword'
+        )
+
+    def test_feistel_is_a_permutation(self):
+        from applications.links.allocator import FeistelPermutation
+        permutation = FeistelPermutation(62 ** 2, b'key')
+        values = [permutation.permute(i) for i in range(62 ** 2)]
+        self.assertEqual(sorted(values), list(range(62 ** 2)))
+        self.assertEqual([permutation.invert(v) for v in values[:100]], list(range(100)))
+
+    def test_code_length_grows_when_tier_is_full(self):
+        from applications.links.allocator import ShortCodeAllocator, TIER_FILL
+        allocator = ShortCodeAllocator(key=b'key', start_length=2, max_length=3)
+        capacity = int(62 ** 2 * TIER_FILL)
+
+        codes = [allocator.encode(i) for i in range(capacity + 5)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual({len(code) for code in codes[:capacity]}, {2})
+        self.assertEqual({len(code) for code in codes[capacity:]}, {3})
+        self.assertEqual(allocator.decode(codes[capacity + 3]), capacity + 3)
+
+    def test_create_without_lookup_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Link.objects.create(owner=self.user, original_url='http://example.com/warm')
+
+        with CaptureQueriesContext(connection) as queries:
+            link = Link.objects.create(owner=self.user, original_url='http://example.com/new')
+
+        self.assertEqual(len(link.short_code), 7)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('SELECT')])
+
+    def test_conflicting_code_is_reallocated(self):
+        from unittest import mock
+        taken = Link.objects.create(owner=self.user, original_url='http://example.com/a', short_code='Taken01')
+
+        with mock.patch('applications.links.allocator.code_allocator.allocate',
+                        side_effect=['Taken01', 'Fresh01']):
+            link = Link.objects.create(owner=self.user, original_url='http://example.com/b')
+
+        self.assertEqual(link.short_code, 'Fresh01')
+        self.assertNotEqual(link.pk, taken.pk)
+
+    def test_taken_custom_code_rejected(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        Link.objects.create(owner=self.user, original_url='http://example.com/a', short_code='custom1')
+
+        response = client.post(reverse('link-list'), {
+            'original_url': 'http://example.com/b',
+            'short_code': 'custom1',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('short_code', response.data)
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='bulk@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        get_redis().delete(f'rate_limit:create_link:{self.user.id}', f'rate_limit:create_links:{self.user.id}')
+
+    def test_results_returned_in_order(self):
+        from applications.links.cache import get_link_data
+        Link.objects.create(owner=self.user, original_url='http://example.com/x', short_code='takenA')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('link-bulk'), {'links': [
+                {'original_url': 'http://example.com/1'},
+                {'original_url': 'not a url'},
+                {'original_url': 'http://example.com/3', 'short_code': 'takenA'},
+                {'original_url': 'http://example.com/4', 'short_code': 'bulk-4', 'title': 'Four'},
+                {'original_url': 'http://example.com/5', 'short_code': 'bulk-4'},
+            ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        statuses = [(r['index'], r['status']) for r in response.data['results']]
+        self.assertEqual(statuses, [(0, 'created'), (1, 'error'), (2, 'error'), (3, 'created'), (4, 'error')])
+        self.assertIn('original_url', response.data['results'][1]['errors'])
+        self.assertIn('short_code', response.data['results'][2]['errors'])
+
+        created = response.data['results'][3]['link']
+        self.assertEqual(created['short_code'], 'bulk-4')
+        self.assertEqual(Link.objects.get(short_code='bulk-4').title, 'Four')
+
+        # Cache đã được ghi sẵn, redirect không cần query
+        with self.assertNumQueries(0):
+            data = get_link_data(response.data['results'][0]['link']['short_code'])
+        self.assertEqual(data['original_url'], 'http://example.com/1')
+
+    def test_rate_limit_counts_items(self):
+        from unittest import mock
+        with mock.patch('applications.links.views.LINK_RATE_LIMIT', 3):
+            response = self.client.post(reverse('link-bulk'), {'links': [
+                {'original_url': f'http://example.com/{i}'} for i in range(4)
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Link.objects.filter(owner=self.user).count(), 0)
+
+    def test_bulk_and_single_create_share_link_budget(self):
+        from unittest import mock
+        with mock.patch('applications.links.views.LINK_RATE_LIMIT', 3):
+            response = self.client.post(reverse('link-bulk'), {'links': [
+                {'original_url': f'http://example.com/{i}'} for i in range(2)
+            ]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            response = self.client.post(reverse('link-list'), {'original_url': 'http://example.com/a'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post(reverse('link-list'), {'original_url': 'http://example.com/b'})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Link.objects.filter(owner=self.user).count(), 3)
+
+
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links import cache
+        from applications.links.owner_stats import stats_key
+        self.cache = cache
+        self.redis = get_redis()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='bulk-update@example.com',
+            password='testpassword'
+        )
+        self.other = User.objects.create_user(
+            email='bulk-update-other@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.redis.delete(stats_key(self.user.id))
+
+        self.links = [
+            Link.objects.create(owner=self.user, original_url=f'http://example.com/{i}')
+            for i in range(3)
+        ]
+        self.foreign = Link.objects.create(owner=self.other, original_url='http://example.com/foreign')
+        for link in self.links + [self.foreign]:
+            self.cache.get_link_data(link.short_code)
+
+    def _post(self, action, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('link-bulk-update'), {'action': action, 'ids': ids}, format='json'
+            )
+
+    def test_deactivate_invalidates_cache_and_stats(self):
+        self.client.get(reverse('link-stats'))
+        ids = [self.links[0].id, self.links[1].id, self.foreign.id]
+
+        response = self._post('deactivate', ids)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertTrue(Link.objects.get(id=self.foreign.id).is_active)
+
+        for link in self.links[:2]:
+            self.assertEqual(self.redis.hget(self.cache.cache_key(link.short_code), 'is_accessible'), 'False')
+            self.assertFalse(self.cache.get_link_data(link.short_code)['is_accessible'])
+        self.assertEqual(self.redis.hget(self.cache.cache_key(self.links[2].short_code), 'is_accessible'), 'True')
+
+        stats = self.client.get(reverse('link-stats')).data
+        self.assertEqual((stats['active_links'], stats['inactive_links']), (1, 2))
+
+        # Đã ở trạng thái đích -> không đổi gì
+        self.assertEqual(self._post('deactivate', ids).data['updated'], 0)
+
+    def test_delete_and_restore(self):
+        ids = [link.id for link in self.links]
+        self.assertEqual(self._post('delete', ids).data['updated'], 3)
+        self.assertEqual(Link.objects.by_owner(self.user).count(), 0)
+        self.assertEqual(self.cache.get_link_data(self.links[0].short_code)['reason'], 'Link has been deleted')
+
+        self.assertEqual(self._post('restore', ids[:1]).data['updated'], 1)
+        self.assertTrue(self.cache.get_link_data(self.links[0].short_code)['is_accessible'])
+
+    def test_rows_changed_concurrently_do_not_skew_stats(self):
+        from unittest import mock
+        from applications.links import bulk
+        from applications.links.owner_stats import apply_deltas
+        self.client.get(reverse('link-stats'))
+        concurrent = self.links[1]
+
+        def apply_and_toggle(deltas):
+            apply_deltas(deltas)
+            if Link.objects.filter(id=concurrent.id, is_active=True).update(is_active=False):
+                # Request khác deactivate link giữa hai chunk (kèm delta của nó)
+                apply_deltas({self.user.id: {'active_links': -1, 'inactive_links': 1}})
+
+        with mock.patch.object(bulk, 'BULK_CHUNK', 1), \
+                mock.patch.object(bulk, 'apply_deltas', side_effect=apply_and_toggle):
+            response = self._post('deactivate', [link.id for link in self.links])
+
+        self.assertEqual(response.data['updated'], 2)
+        stats = self.client.get(reverse('link-stats')).data
+        self.assertEqual((stats['active_links'], stats['inactive_links']), (0, 3))
+
+    def test_invalid_payload(self):
+        self.assertEqual(self._post('archive', [1]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._post('delete', ['1']).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_single_update_invalidates_cache(self):
+        link = self.links[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('link-toggle-active', args=[link.id]))
+        self.assertFalse(self.cache.get_link_data(link.short_code)['is_accessible'])
+
+
+class WriteThroughCacheTests(TestCase):
+    def setUp(self):
+        from applications.links import cache
+        self.cache = cache
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='write-through@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_and_update_prime_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('link-list'), {
+                'original_url': 'http://example.com/launch', 'short_code': 'launch1'
+            }, format='json')
+        self.cache._l1.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get_link_data('launch1')['original_url'], 'http://example.com/launch')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('link-detail', args=[Link.objects.get(short_code='launch1').id]), {
+                'original_url': 'http://example.com/launch-v2'
+            }, format='json')
+        self.cache._l1.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get_link_data('launch1')['original_url'], 'http://example.com/launch-v2')
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.common.singleflight import SingleFlight
+        self.redis = get_redis()
+        self.flight = SingleFlight('test_flight', wait_timeout=1.0)
+        self.redis.delete(self.flight.lease_key('hot'), 'test_flight:value')
+
+    def _counter(self, event):
+        from applications.common.metrics import get_counters
+        return get_counters('test_flight.').get(f'test_flight.singleflight.{event}', 0)
+
+    def test_concurrent_misses_load_once(self):
+        import threading
+        import time
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        before = self._counter('coalesced_local')
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('hot', load, lambda: (False, None))))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self._counter('coalesced_local') - before, 7)
+        self.assertFalse(self.redis.exists(self.flight.lease_key('hot')))
+
+    def test_waits_for_lease_holder_in_other_process(self):
+        import threading
+        self.redis.set(self.flight.lease_key('hot'), 'other-process', px=2000)
+        threading.Timer(0.05, lambda: self.redis.set('test_flight:value', 'remote')).start()
+
+        def peek():
+            value = self.redis.get('test_flight:value')
+            return value is not None, value
+
+        before = self._counter('coalesced_remote')
+        result = self.flight.do('hot', lambda: self.fail('should not load'), peek)
+        self.assertEqual(result, 'remote')
+        self.assertEqual(self._counter('coalesced_remote') - before, 1)
+
+    def test_async_lease_released_with_evalsha(self):
+        from unittest import mock
+        from asgiref.sync import async_to_sync
+        from applications.common.redis_client import get_async_redis
+
+        async def load():
+            return 'value'
+
+        async def peek():
+            return False, None
+
+        client = get_async_redis()
+        with mock.patch.object(type(client), 'eval', autospec=True, wraps=type(client).eval) as eval_:
+            async_to_sync(self.flight.ado)('hot', load, peek)
+            async_to_sync(self.flight.ado)('hot', load, peek)
+
+        # Lần đầu EVAL (NOSCRIPT), sau đó chỉ EVALSHA
+        self.assertLessEqual(eval_.call_count, 1)
+        self.assertFalse(self.redis.exists(self.flight.lease_key('hot')))
+
+
+class ImportLinksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='import@example.com',
+            password='testpassword'
+        )
+        Link.objects.create(owner=self.user, original_url='http://example.com/old', short_code='taken1')
+
+    def test_import_csv_with_checkpoint(self):
+        import io
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'links.csv')
+            remap = os.path.join(tmp, 'remap.csv')
+            with open(path, 'w') as f:
+                f.write('url,code,title\n')
+                f.write('Example.COM/a,keep01,A\n')
+                f.write('http://example.com/b,taken1,B\n')
+                f.write('not a url at all,,C\n')
+                f.write('https://example.com/d,,D\n')
+
+            call_command('import_links', path, owner=self.user.email, chunk=2, workers=1,
+                         remap=remap, stdout=io.StringIO())
+
+            self.assertEqual(Link.objects.get(short_code='keep01').original_url, 'http://example.com/a')
+            self.assertEqual(Link.objects.filter(owner=self.user).count(), 4)
+            with open(remap) as f:
+                old, new = f.read().strip().split(',')
+            self.assertEqual(old, 'taken1')
+            self.assertEqual(Link.objects.get(short_code=new).original_url, 'http://example.com/b')
+
+            progress = LinkImport.objects.get(owner=self.user, name=path)
+            self.assertEqual((progress.rows, progress.created, progress.rejected), (4, 3, 1))
+
+            # Chạy lại: checkpoint ở cuối file, không import trùng
+            call_command('import_links', path, owner=self.user.email, workers=1, stdout=io.StringIO())
+            self.assertEqual(Link.objects.filter(owner=self.user).count(), 4)
+
+    def test_crash_after_commit_does_not_reimport_chunk(self):
+        import io
+        import os
+        import tempfile
+        from unittest import mock
+        from django.core.management import call_command
+        from applications.links.management.commands import import_links
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'links.csv')
+            remap = os.path.join(tmp, 'remap.csv')
+            with open(path, 'w') as f:
+                f.write('url,code\n')
+                f.write('http://example.com/c1,taken1\n')
+                f.write('http://example.com/c2,\n')
+
+            # Chunk đầu đã commit, process chết trước khi xử lý chunk tiếp theo
+            write_chunk = import_links.Command._write_chunk
+            calls = []
+
+            def crash_after_first(command, *args):
+                if calls:
+                    raise KeyboardInterrupt
+                calls.append(1)
+                return write_chunk(command, *args)
+
+            with mock.patch.object(import_links.Command, '_write_chunk', crash_after_first), \
+                    self.assertRaises(KeyboardInterrupt):
+                call_command('import_links', path, owner=self.user.email, chunk=1, workers=1,
+                             remap=remap, stdout=io.StringIO())
+
+            call_command('import_links', path, owner=self.user.email, chunk=1, workers=1,
+                         remap=remap, stdout=io.StringIO())
+            self.assertEqual(Link.objects.filter(original_url='http://example.com/c1').count(), 1)
+            self.assertEqual(Link.objects.filter(original_url='http://example.com/c2').count(), 1)
+            with open(remap) as f:
+                self.assertEqual(len(f.read().strip().splitlines()), 1)
+
+    def test_multiline_fields_and_invalid_codes(self):
+        import csv
+        import io
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'links.csv')
+            remap = os.path.join(tmp, 'remap.csv')
+            with open(path, 'w', newline='') as f:
+                f.write('url,code,title\n')
+                f.write('http://example.com/m1,multi1,"first line\nsecond line"\n')
+                f.write('http://example.com/m2,bad code!,B\n')
+                f.write('http://example.com/m3,,"x\n\ny"\n')
+
+            call_command('import_links', path, owner=self.user.email, chunk=1, workers=1,
+                         remap=remap, stdout=io.StringIO())
+
+            self.assertEqual(Link.objects.get(short_code='multi1').title, 'first line\nsecond line')
+            self.assertEqual(Link.objects.get(original_url='http://example.com/m3').title, 'x\n\ny')
+            with open(remap, newline='') as f:
+                (old, new), = list(csv.reader(f))
+            self.assertEqual(old, 'bad code!')
+            self.assertEqual(Link.objects.get(short_code=new).original_url, 'http://example.com/m2')
+
+            # Checkpoint sau record nhiều dòng: resume từ đó không import trùng / lệch field
+            progress = LinkImport.objects.filter(owner=self.user, name=path)
+            self.assertEqual(progress.values_list('rows', 'created', 'remapped').get(), (3, 3, 1))
+            with open(path, 'rb') as f:
+                data = f.read()
+            progress.update(offset=data.index(b'http://example.com/m2'), rows=1, created=1, remapped=0)
+            Link.objects.filter(original_url__in=['http://example.com/m2', 'http://example.com/m3']).delete()
+
+            call_command('import_links', path, owner=self.user.email, workers=1, stdout=io.StringIO())
+            self.assertEqual(Link.objects.filter(owner=self.user).count(), 4)
+            self.assertEqual(Link.objects.get(original_url='http://example.com/m3').title, 'x\n\ny')
+
+
+class LinkDedupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='dedup@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_reuse_existing_returns_same_link(self):
+        first = self.client.post(reverse('link-list'), {'original_url': 'HTTP://Example.com:80'}, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(1):
+            again = self.client.post(reverse('link-list'), {
+                'original_url': 'http://example.com/', 'reuse_existing': True,
+            }, format='json')
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data['short_code'], first.data['short_code'])
+
+        # Mặc định vẫn tạo link mới
+        other = self.client.post(reverse('link-list'), {'original_url': 'http://example.com/'}, format='json')
+        self.assertEqual(other.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(other.data['short_code'], first.data['short_code'])
+
+    def test_backfill_url_hash(self):
+        import io
+        from django.core.management import call_command
+        from applications.links.models import compute_url_hash
+        link = Link.objects.create(owner=self.user, original_url='http://example.com/legacy')
+        Link.objects.filter(pk=link.pk).update(url_hash='')
+
+        call_command('backfill_url_hash', stdout=io.StringIO())
+
+        link.refresh_from_db()
+        self.assertEqual(link.url_hash, compute_url_hash('http://example.com/legacy'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='keyset@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        for i, (clicks, expires_in) in enumerate([(5, 1), (3, None), (5, 3), (0, None), (3, 2)]):
+            Link.objects.create(
+                owner=self.user,
+                original_url=f'http://example.com/{i}',
+                click_count=clicks,
+                expires_at=now + timedelta(days=expires_in) if expires_in else None,
+            )
+
+    def _walk(self, params):
+        from unittest import mock
+        from applications.links.pagination import LinkPagination
+
+        ids, url, pages = [], reverse('link-list'), 0
+        with mock.patch.object(LinkPagination, 'page_size', 2):
+            response = self.client.get(url, params)
+            while True:
+                pages += 1
+                self.assertNotIn('count', response.data)
+                ids += [item['id'] for item in response.data['results']]
+                if not response.data['next']:
+                    break
+                response = self.client.get(response.data['next'])
+        return ids, pages
+
+    def test_keyset_matches_full_ordering(self):
+        links = Link.objects.filter(owner=self.user)
+        for ordering, expected in [
+            ('-created_at', links.order_by('-created_at', '-id')),
+            ('-click_count', links.order_by('-click_count', '-id')),
+            # NULL theo thứ tự native: đầu khi tăng dần, cuối khi giảm dần
+            ('expires_at', links.order_by('expires_at', 'id')),
+            ('-expires_at', links.order_by('-expires_at', '-id')),
+        ]:
+            ids, pages = self._walk({'pagination': 'cursor', 'ordering': ordering})
+            self.assertEqual(ids, list(expected.values_list('id', flat=True)), ordering)
+            self.assertEqual(pages, 3)
+
+    def test_page_number_is_default(self):
+        response = self.client.get(reverse('link-list'))
+        self.assertEqual(response.data['count'], 5)
+
+
+class LinkSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='search@example.com',
+            password='testpassword'
+        )
+        self.other = User.objects.create_user(
+            email='other-search@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.docs = Link.objects.create(
+            owner=self.user, original_url='https://docs.python.org/3/library/asyncio.html',
+            title='Asyncio reference'
+        )
+        self.blog = Link.objects.create(
+            owner=self.user, original_url='https://blog.example.org/posts/django-tips',
+            title='Django tips', short_code='djtips'
+        )
+        Link.objects.create(owner=self.other, original_url='https://docs.python.org/3/', title='Python docs')
+
+    def _search(self, text):
+        response = self.client.get(reverse('link-list'), {'search': text})
+        return sorted(item['id'] for item in response.data['results'])
+
+    def test_prefix_terms_are_matched(self):
+        self.assertEqual(self._search('async'), [self.docs.id])
+        self.assertEqual(self._search('python asyncio'), [self.docs.id])
+        self.assertEqual(self._search('python django'), [])
+        self.assertEqual(self._search('djtips'), [self.blog.id])
+
+    def test_index_follows_updates(self):
+        self.blog.title = 'Celery notes'
+        self.blog.save()
+        self.assertEqual(self._search('celery'), [self.blog.id])
+        self.assertEqual(self._search('tips'), [self.blog.id])  # vẫn còn trong URL
+        self.assertEqual(self._search('django'), [self.blog.id])
+
+        self.blog.original_url = 'https://example.org/queue'
+        self.blog.save(update_fields=['original_url'])
+        self.assertEqual(self._search('django'), [])
+
+    def test_vietnamese_titles(self):
+        import unicodedata
+        sale = Link.objects.create(
+            owner=self.user, original_url='https://shop.example.vn/sale',
+            title='Khuyến mãi Tết ĐƯỜNG phố'
+        )
+        self.assertEqual(self._search('khuyến'), [sale.id])
+        self.assertEqual(self._search('KHUYẾN mãi'), [sale.id])
+        self.assertEqual(self._search('đường'), [sale.id])
+        # Tìm không dấu vẫn khớp
+        self.assertEqual(self._search('khuyen mai'), [sale.id])
+        self.assertEqual(self._search('duong'), [sale.id])
+        # Từ khóa dạng tổ hợp (NFD)
+        self.assertEqual(self._search(unicodedata.normalize('NFD', 'mãi')), [sale.id])
+
+
+class OwnerStatsTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links.counters import (
+            PENDING_KEY, FLUSHING_KEY, OWNER_PENDING_KEY, OWNER_FLUSHING_KEY,
+        )
+        from applications.links.owner_stats import stats_key
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='owner-stats@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.redis = get_redis()
+        self.key = stats_key(self.user.id)
+        self.redis.delete(self.key, PENDING_KEY, FLUSHING_KEY, OWNER_PENDING_KEY, OWNER_FLUSHING_KEY)
+
+        Link.objects.create(owner=self.user, original_url='http://example.com/a', click_count=4)
+        Link.objects.create(owner=self.user, original_url='http://example.com/b', is_active=False)
+
+    def _stats(self):
+        return self.client.get(reverse('link-list') + 'stats/').data
+
+    def test_deltas_follow_link_changes(self):
+        self.assertEqual(self._stats()['total_links'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            link = Link.objects.create(owner=self.user, original_url='http://example.com/c', click_count=1)
+        self.assertEqual(self.redis.hget(self.key, 'total_clicks'), '5')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('link-toggle-active', args=[link.id]))
+        stats = self._stats()
+        self.assertEqual((stats['active_links'], stats['inactive_links']), (1, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('link-detail', args=[link.id]))
+        stats = self._stats()
+        self.assertEqual((stats['total_links'], stats['inactive_links'], stats['total_clicks']), (2, 1, 4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Link.objects.get(id=link.id).restore()
+        stats = self._stats()
+        self.assertEqual((stats['total_links'], stats['inactive_links'], stats['total_clicks']), (3, 2, 5))
+
+    def test_flush_adds_clicks(self):
+        from applications.links.counters import flush_click_counters, incr_pending
+
+        self._stats()
+        link = Link.objects.get(original_url='http://example.com/a')
+        pipe = self.redis.pipeline()
+        incr_pending(pipe, link.id)
+        incr_pending(pipe, link.id)
+        pipe.execute()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_click_counters()
+        self.assertEqual(self._stats()['total_clicks'], 6)
+
+    def test_reconcile_fixes_drift(self):
+        from applications.links.owner_stats import reconcile_owner_stats
+
+        self._stats()
+        Link.objects.filter(owner=self.user).update(is_active=True)
+        self.redis.hincrby(self.key, 'total_clicks', 100)
+
+        reconcile_owner_stats([self.user.id])
+        stats = self._stats()
+        self.assertEqual((stats['active_links'], stats['inactive_links'], stats['total_clicks']), (2, 0, 4))
+
+    def test_reconcile_waits_for_running_flush(self):
+        from unittest import mock
+        from applications.links.counters import acquire_flush_lock, release_flush_lock
+        from applications.links.owner_stats import reconcile_owner_stats
+
+        self._stats()
+        self.redis.hincrby(self.key, 'total_clicks', 100)
+        token = acquire_flush_lock()
+        try:
+            with mock.patch('applications.links.owner_stats.RECONCILE_LOCK_WAIT', 0):
+                self.assertEqual(reconcile_owner_stats([self.user.id]), 0)
+        finally:
+            release_flush_lock(token)
+        self.assertEqual(self.redis.hget(self.key, 'total_clicks'), '104')
+
+    def test_snapshot_not_stored_when_delta_arrives_during_compute(self):
+        from unittest import mock
+        from applications.links import owner_stats
+
+        compute = owner_stats.compute_owner_stats
+
+        def compute_then_create(owner_ids):
+            # Snapshot đã đọc MySQL, link mới commit trước khi snapshot được ghi
+            stats = compute(owner_ids)
+            with self.captureOnCommitCallbacks(execute=True):
+                Link.objects.create(owner=self.user, original_url='http://example.com/late')
+            return stats
+
+        with mock.patch.object(owner_stats, 'compute_owner_stats', side_effect=compute_then_create):
+            self.assertEqual(self._stats()['total_links'], 2)
+        self.assertFalse(self.redis.exists(self.key))
+        self.assertEqual(self._stats()['total_links'], 3)
+
+
+
+class CacheWarmupTests(TestCase):
+    def setUp(self):
+        from applications.common.redis_client import get_redis
+        from applications.links import cache
+        self.cache = cache
+        self.redis = get_redis()
+        self.user = User.objects.create_user(
+            email='warmup@example.com',
+            password='testpassword'
+        )
+        self.links = [
+            Link.objects.create(owner=self.user, original_url=f'https://example.com/{i}', click_count=i)
+            for i in range(5)
+        ]
+        cache.invalidate_link_caches([link.short_code for link in self.links])
+
+    def test_warm_top_links_by_click_count(self):
+        from applications.links.warmup import warm_link_cache
+
+        hottest = self.links[-1]
+        self.cache.prime_link_cache([hottest])
+        # Top-N + một query mỗi chunk
+        with self.assertNumQueries(3):
+            stats = warm_link_cache(limit=3, source='click_count', chunk=2, rate=0)
+
+        self.assertEqual((stats['selected'], stats['loaded'], stats['written']), (3, 3, 2))
+        self.assertTrue(stats['completed'])
+        for link in self.links[2:]:
+            self.assertTrue(self.redis.exists(self.cache.cache_key(link.short_code)))
+        self.assertFalse(self.redis.exists(self.cache.cache_key(self.links[1].short_code)))
+
+        self.cache._l1.clear()
+        with self.assertNumQueries(0):
+            data = self.cache.get_link_data(self.links[2].short_code)
+        self.assertEqual(data['original_url'], self.links[2].original_url)
+
+    def test_stats_source_and_budget(self):
+        from unittest import mock
+        from applications.links.warmup import warm_link_cache
+
+        ids = [self.links[0].id, self.links[1].id]
+        with mock.patch('applications.analytics.services.LinkStatsService.top_link_ids',
+                        return_value=ids):
+            stats = warm_link_cache(limit=2, chunk=1, rate=0, budget=0)
+        self.assertEqual((stats['selected'], stats['loaded']), (2, 0))
+        self.assertFalse(stats['completed'])
+
+        with mock.patch('applications.analytics.services.LinkStatsService.top_link_ids',
+                        side_effect=RuntimeError('mongo down')):
+            stats = warm_link_cache(limit=1, rate=0)
+        self.assertEqual(stats['written'], 1)
+        self.assertTrue(self.redis.exists(self.cache.cache_key(self.links[-1].short_code)))
@@ -1,16 +1,36 @@
-from django.db.models import Sum, Count, Q
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .bulk import bulk_create_links, bulk_update_links, BULK_ACTIONS
+from .counters import get_pending_clicks
 from .models import Link
+from .owner_stats import get_owner_stats
 from .serializers import LinkSerializer, LinkCreateSerializer, LinkUpdateSerializer
 from .filters import LinkFilter
+from .pagination import LinkPagination
+from .search import LinkSearchFilter
+from applications.analytics.leaderboard import LeaderboardService
+from applications.analytics.visitors import UniqueVisitorService
 from applications.common.rate_limit import check_rate_limit, RateLimitExceeded
 from applications.common.exceptions import RateLimitException
 
+# Bucket ngày của leaderboard giữ 35 ngày
+MAX_ANALYTICS_DAYS = 30
+
+# Tạo link đơn lẻ: 10 requests/phút/user
+CREATE_RATE_LIMIT = 10
+CREATE_RATE_WINDOW = 60
+
+# Số links được tạo mỗi giờ/user, dùng chung cho create và bulk
+# (bulk tính theo số items) -> bulk không phải đường vòng qua giới hạn create
+LINK_RATE_LIMIT = 20000
+LINK_RATE_WINDOW = 3600
+
+BULK_MAX_ITEMS = 5000
+
 
 class LinkViewSet(viewsets.ModelViewSet):
     """
@@ -21,11 +41,13 @@ class LinkViewSet(viewsets.ModelViewSet):
     retrieve: Xem chi tiết link
     update: Cập nhật link
     destroy: Soft delete link
+
+    List hỗ trợ keyset pagination: ?pagination=cursor (xem pagination.py)
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, LinkSearchFilter, filters.OrderingFilter]
     filterset_class = LinkFilter
-    search_fields = ['title', 'original_url', 'short_code']
+    pagination_class = LinkPagination
     ordering_fields = ['created_at', 'click_count', 'expires_at']
     ordering = ['-created_at']
 
@@ -42,20 +64,106 @@ class LinkViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """Tạo link mới với rate limiting"""
-        # Rate limit: 10 links per minute per user
-        try:
-            check_rate_limit(
-                key=f"create_link:{request.user.id}",
-                limit=10,
-                window_seconds=60
+        _check_rate_limit(f"create_link:{request.user.id}", CREATE_RATE_LIMIT, CREATE_RATE_WINDOW)
+        _check_rate_limit(f"create_links:{request.user.id}", LINK_RATE_LIMIT, LINK_RATE_WINDOW)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        # reuse_existing: trả về link có sẵn với 200 thay vì 201
+        if getattr(serializer, 'reused', False):
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Tạo nhiều links trong một request
+
+        Body: {"links": [{"original_url": ..., "short_code": ..., ...}, ...]}
+        Trả về kết quả từng item theo đúng thứ tự
+        """
+        items = request.data.get('links') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "'links' must be a non-empty list."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        except RateLimitExceeded as e:
-            raise RateLimitException(
-                detail=str(e),
-                retry_after=e.retry_after
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"At most {BULK_MAX_ITEMS} links per request."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        return super().create(request, *args, **kwargs)
+        _check_rate_limit(f"create_links:{request.user.id}", LINK_RATE_LIMIT, LINK_RATE_WINDOW, cost=len(items))
+
+        results = [None] * len(items)
+        valid_indexes, valid_items = [], []
+        for index, item in enumerate(items):
+            serializer = LinkCreateSerializer(data=item, context={'request': request})
+            if serializer.is_valid():
+                valid_indexes.append(index)
+                valid_items.append(serializer.validated_data)
+            else:
+                results[index] = serializer.errors
+
+        for index, result in zip(valid_indexes, bulk_create_links(request.user, valid_items)):
+            results[index] = result
+
+        links = [result for result in results if isinstance(result, Link)]
+        serialized = iter(LinkSerializer(links, many=True, context={'request': request}).data)
+
+        response = []
+        for index, result in enumerate(results):
+            if isinstance(result, Link):
+                item_status = 'existing' if getattr(result, 'reused', False) else 'created'
+                response.append({'index': index, 'status': item_status, 'link': next(serialized)})
+            else:
+                response.append({'index': index, 'status': 'error', 'errors': result})
+
+        created = sum(1 for item in response if item['status'] == 'created')
+        return Response({
+            'created': created,
+            'existing': len(links) - created,
+            'failed': len(results) - len(links),
+            'results': response,
+        }, status=status.HTTP_201_CREATED if links else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        Activate/deactivate/delete/restore nhiều links trong một request
+
+        Body: {"action": "activate" | "deactivate" | "delete" | "restore", "ids": [1, 2, ...]}
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        action_name = data.get('action')
+        ids = data.get('ids')
+
+        if action_name not in BULK_ACTIONS:
+            return Response(
+                {"detail": f"'action' must be one of: {', '.join(BULK_ACTIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(ids, list) or not ids or \
+                not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            return Response(
+                {"detail": "'ids' must be a non-empty list of integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"At most {BULK_MAX_ITEMS} links per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Gồm cả links đã deleted (restore)
+        queryset = Link.objects.filter(owner=request.user, id__in=ids)
+        updated = bulk_update_links(queryset, action_name)
+        return Response({'action': action_name, 'updated': updated})
 
     def perform_destroy(self, instance):
         """Soft delete thay vì hard delete"""
@@ -105,14 +213,57 @@ class LinkViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Thống kê tổng quan links của user"""
-        user_links = Link.objects.filter(owner=request.user, deleted_at__isnull=True)
-
-        data = user_links.aggregate(
-            total_links=Count('id'),
-            active_links=Count('id', filter=Q(is_active=True)),
-            inactive_links=Count('id', filter=Q(is_active=False)),
-            total_clicks=Sum('click_count', default=0)
-        )
+        """
+        Thống kê tổng quan links của user
+        Đọc từ hash owner_stats (cập nhật theo delta), không aggregate trên links
+        total_clicks gồm cả clicks chưa flush (counter pending theo owner)
+        """
+        data = get_owner_stats(request.user.id)
+
+        # Visitors khác nhau hôm nay trên tất cả links (sketch HLL theo owner)
+        data['unique_visitors_today'] = UniqueVisitorService.count_owner_today(request.user.id)
 
         return Response(data)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Clicks và unique visitors theo ngày của một link (?days=7, tối đa 30)"""
+        link = self.get_object()
+
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), MAX_ANALYTICS_DAYS)
+        except ValueError:
+            return Response(
+                {"detail": "days must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        clicks = LeaderboardService.daily_clicks(link.id, link.short_code, days)
+        visitors = UniqueVisitorService.daily_counts(link.id, days)
+
+        return Response({
+            'id': link.id,
+            'short_code': link.short_code,
+            'click_count': link.click_count + get_pending_clicks([link.id]).get(link.id, 0),
+            'days': days,
+            'clicks': sum(clicks.values()),
+            'unique_visitors': UniqueVisitorService.count_link(link.id, days),
+            'daily': [
+                {
+                    'date': date_str,
+                    'clicks': clicks[date_str],
+                    'unique_visitors': visitors.get(date_str, 0),
+                }
+                for date_str in clicks
+            ],
+        })
+
+
+def _check_rate_limit(key: str, limit: int, window_seconds: int, cost: int = 1):
+    try:
+        check_rate_limit(key=key, limit=limit, window_seconds=window_seconds, cost=cost)
+    except RateLimitExceeded as e:
+        raise RateLimitException(
+            detail=str(e),
+            retry_after=e.retry_after
+        )
@@ -0,0 +1,164 @@
+"""
+Warm-up link cache sau khi Redis bị flush / failover
+- Chọn top-N links theo traffic gần đây: link_stats (MongoDB), fallback Link.click_count
+- Đọc MySQL bằng values() theo chunk, ghi Redis bằng pipeline (cache.warm_links)
+- Giới hạn tốc độ (keys/s) để warm-up không tự làm quá tải MySQL
+- Dừng khi hết time budget, trả về phần đã làm được
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .cache import warm_links, CACHE_TTL
+from .models import Link
+from applications.accounts.models import User
+from applications.common.redis_client import get_redis
+from applications.common.logger import get_logger
+
+logger = get_logger("links.warmup")
+
+WARMUP_LIMIT = 50_000
+WARMUP_CHUNK = 1000
+# keys/s
+WARMUP_RATE = 5000
+# Giây
+WARMUP_BUDGET = 120
+WARMUP_DAYS = 7
+
+SOURCES = ('stats', 'click_count')
+
+# Startup hook: một process warm cho cả cluster, marker mất cùng dữ liệu Redis
+WARMUP_MARKER_KEY = "link_cache:warmup"
+
+LINK_FIELDS = (
+    'id', 'short_code', 'original_url', 'is_active', 'expires_at', 'deleted_at',
+    'owner_id', 'owner__is_active',
+)
+
+
+def hot_link_ids(limit: int, source: str = 'stats', days: int = WARMUP_DAYS) -> list:
+    """
+    ID các links nhiều traffic nhất, giảm dần
+
+    source='stats': clicks trong N ngày gần nhất từ link_stats,
+    rỗng hoặc MongoDB lỗi -> Link.click_count (tổng từ trước tới nay)
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown warm-up source: {source}")
+
+    if source == 'stats':
+        from applications.analytics.services import LinkStatsService
+
+        start_date = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        try:
+            ids = LinkStatsService.top_link_ids(start_date, limit)
+        except Exception as e:
+            logger.warning(
+                "Link stats unavailable for warm-up, using click_count",
+                extra={"extra": {"error": str(e)}}
+            )
+            ids = []
+        if ids:
+            return ids
+
+    return list(
+        Link.objects.filter(deleted_at__isnull=True)
+        .order_by('-click_count')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def warm_link_cache(limit: int = WARMUP_LIMIT, source: str = 'stats', days: int = WARMUP_DAYS,
+                    chunk: int = WARMUP_CHUNK, rate: float = WARMUP_RATE,
+                    budget: float = WARMUP_BUDGET, progress=None) -> dict:
+    """
+    Nạp sẵn cache cho top-N links
+
+    Args:
+        rate: số links tối đa đọc từ MySQL mỗi giây (0 = không giới hạn)
+        budget: thời gian tối đa (giây), hết budget -> dừng sau chunk hiện tại
+        progress: callback(stats) sau mỗi chunk
+
+    Returns:
+        {"selected", "loaded", "written", "elapsed", "keys_per_second", "completed"}
+    """
+    start = time.monotonic()
+    ids = hot_link_ids(limit, source, days)
+
+    loaded = written = 0
+    completed = True
+    for offset in range(0, len(ids), chunk):
+        if time.monotonic() - start >= budget:
+            completed = False
+            break
+
+        rows = Link.objects.filter(id__in=ids[offset:offset + chunk]).order_by().values(*LINK_FIELDS)
+        links = [_link_from_row(row) for row in rows]
+        written += warm_links(links)
+        loaded += len(links)
+
+        if progress is not None:
+            progress(_stats(ids, loaded, written, start, completed))
+
+        # Giữ tốc độ trung bình <= rate, không ngủ quá budget
+        if rate:
+            delay = loaded / rate - (time.monotonic() - start)
+            delay = min(delay, budget - (time.monotonic() - start))
+            if delay > 0:
+                time.sleep(delay)
+
+    stats = _stats(ids, loaded, written, start, completed)
+    logger.info("Link cache warmed", extra={"extra": {"source": source, **stats}})
+    return stats
+
+
+def _link_from_row(row: dict) -> Link:
+    """Link (chưa save) đủ field cho build_link_data"""
+    owner = User(id=row.pop('owner_id'), is_active=row.pop('owner__is_active'))
+    return Link(owner=owner, **row)
+
+
+def _stats(ids: list, loaded: int, written: int, start: float, completed: bool) -> dict:
+    elapsed = time.monotonic() - start
+    return {
+        "selected": len(ids),
+        "loaded": loaded,
+        "written": written,
+        "elapsed": round(elapsed, 3),
+        "keys_per_second": round(written / elapsed, 1) if elapsed else 0.0,
+        "completed": completed,
+    }
+
+
+def start_warmup():
+    """
+    Startup hook (settings.LINK_CACHE_WARMUP): warm trong thread nền
+    Chỉ process lấy được marker mới warm; marker có TTL bằng cache nên
+    Redis mất dữ liệu -> lần khởi động tiếp theo warm lại
+    """
+    if not settings.LINK_CACHE_WARMUP:
+        return None
+    try:
+        if not get_redis().set(WARMUP_MARKER_KEY, int(time.time()), nx=True, ex=CACHE_TTL):
+            return None
+    except Exception as e:
+        logger.warning("Link cache warm-up skipped", extra={"extra": {"error": str(e)}})
+        return None
+
+    thread = threading.Thread(target=_warm_in_background, name="link-cache-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _warm_in_background():
+    try:
+        warm_link_cache()
+    except Exception as e:
+        logger.error(f"Link cache warm-up failed: {e}")
+        # Cho phép process khởi động sau thử lại
+        get_redis().delete(WARMUP_MARKER_KEY)
+    finally:
+        close_old_connections()
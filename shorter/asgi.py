@@ -3,6 +3,9 @@ ASGI config for shorter project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+/r/<code> được xử lý bởi RedirectFastPath trước khi vào Django
+(bỏ qua middleware stack), các path khác đi qua Django như bình thường.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +16,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shorter.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Import sau khi Django đã setup
+from django.conf import settings  # noqa: E402
+from applications.links.asgi_redirect import RedirectFastPath  # noqa: E402
+from applications.links.warmup import start_warmup  # noqa: E402
+
+start_warmup()
+
+if settings.FAST_REDIRECT:
+    application = RedirectFastPath(django_application)
+else:
+    application = django_application
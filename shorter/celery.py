@@ -38,11 +38,32 @@ app.conf.task_default_queue = 'default'
 # Task routing
 app.conf.task_routes = {
     'applications.analytics.tasks.record_click_event': {'queue': 'analytics'},
+    'applications.analytics.tasks.consume_click_stream': {'queue': 'analytics'},
     'applications.analytics.tasks.aggregate_clicks': {'queue': 'aggregation'},
     'applications.analytics.tasks.rollup_daily': {'queue': 'aggregation'},
     'applications.analytics.tasks.detect_anomaly': {'queue': 'analytics'},
 }
 
+# Periodic tasks (celery beat)
+app.conf.beat_schedule = {
+    'consume-click-stream': {
+        'task': 'applications.analytics.tasks.consume_click_stream',
+        'schedule': 2.0,
+    },
+    'flush-click-counters': {
+        'task': 'applications.links.tasks.flush_click_counters',
+        'schedule': 10.0,
+    },
+    'sweep-expired-links': {
+        'task': 'applications.links.tasks.sweep_expired_links',
+        'schedule': 30.0,
+    },
+    'reconcile-owner-stats': {
+        'task': 'applications.links.tasks.reconcile_owner_stats',
+        'schedule': 3600.0,
+    },
+}
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
@@ -69,6 +69,25 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'shorter.wsgi.application'
+ASGI_APPLICATION = 'shorter.asgi.application'
+
+# Dùng AsyncRedirectView cho /r/<code> (bật khi chạy bằng ASGI server, vd uvicorn)
+ASYNC_REDIRECT = get_config("app.async_redirect", False)
+
+# ASGI: xử lý /r/<code> trước Django, bỏ qua toàn bộ MIDDLEWARE (xem shorter/asgi.py)
+FAST_REDIRECT = get_config("app.fast_redirect", True)
+
+# Khóa của hoán vị short code (applications/links/allocator.py)
+# Không đổi sau khi đã cấp code: code mới có thể trùng code cũ
+SHORT_CODE_KEY = get_config("app.short_code_key", SECRET_KEY)
+
+# Format cache entry link:{code}: "hash" hoặc "packed" (chuỗi nhị phân, ít bộ nhớ hơn)
+# Đọc luôn hỗ trợ cả hai, đổi giá trị khi đang chạy không cần xóa cache
+LINK_CACHE_ENCODING = get_config("app.link_cache_encoding", "hash")
+
+# Warm link cache khi process khởi động (applications/links/warmup.py)
+# Chỉ một process trong cluster warm, warm lại sau khi Redis mất dữ liệu
+LINK_CACHE_WARMUP = get_config("app.link_cache_warmup", False)
 
 
 # Database
@@ -187,6 +206,10 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Spool click trên local disk khi Redis/broker không khả dụng
+# (replay: python manage.py replay_click_spool)
+CLICK_SPOOL_DIR = BASE_DIR / 'spool'
+
 
 # Logging
 LOGGING = {
@@ -14,17 +14,24 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, register_converter
 
-from applications.links.redirect import RedirectView
+from applications.links.converters import ShortCodeConverter
+from applications.links.redirect import RedirectView, AsyncRedirectView
 from applications.analytics.admin import DashboardView, HealthCheckView, JobsView
-from applications.common.health import HealthCheckView as HealthView, ReadinessCheckView
+from applications.common.health import HealthCheckView as HealthView, ReadinessCheckView, MetricsView
+
+register_converter(ShortCodeConverter, 'shortcode')
+
+redirect_view = AsyncRedirectView if settings.ASYNC_REDIRECT else RedirectView
 
 urlpatterns = [
     # Health check endpoints
     path('health/', HealthView.as_view(), name='health'),
     path('readyz/', ReadinessCheckView.as_view(), name='readiness'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
     # Custom admin views (phải đặt trước admin/)
     path('admin/dashboard/', DashboardView.as_view(), name='admin_dashboard'),
@@ -38,5 +45,5 @@ urlpatterns = [
     path('api/links/', include('applications.links.urls')),
 
     # Redirect endpoint
-    path('r/<str:code>', RedirectView.as_view(), name='redirect'),
+    path('r/<shortcode:code>', redirect_view.as_view(), name='redirect'),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shorter.settings')
 
 application = get_wsgi_application()
+
+# Import sau khi Django đã setup
+from applications.links.warmup import start_warmup  # noqa: E402
+
+start_warmup()